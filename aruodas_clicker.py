@@ -1,2046 +1,7362 @@
-# -*- coding: utf-8 -*-
-"""
-Šis įrankis skirtas tik testavimui / asmeniniams eksperimentams.
-NENAUDOKITE PRODUKCINĖJE APLINKOJE.
-
-Prieš naudodami įsivertinkite:
-- ar turite teisę / leidimą tikrinti trečiųjų šalių puslapius tokiu būdu,
-- ar nepažeidžiate taisyklių,
-- ar neapkraunate serverių.
-
-OPTIMIZACIJOS (2026):
-- „Visi ID“ lentelė rodoma puslapiais (nebekuriama 50k+ DOM eilučių).
-- Batch dydžiai UI papildyti (100..1000) + serverio MAX_BATCH_IDS default=1000.
-- RAW_CACHE apribotas (LRU) – kad serveris nepradėtų valgyti RAM.
-- Persistencijos (state) išsaugojimas į diską „throttle“ (nebepersistinama po kiekvieno ID).
-- Pridėtas /api/cache_batch: UI puslapio statusus užkrauna iš cache be fetch į tikslą.
-- PRIDĖTA: greičio rodymas (kiek realių fetch'ų per minutę) UI.
-- PRIDĖTA: iki 3 lygiagrečių užklausų į tikslinę svetainę (ThreadPoolExecutor + semaphore).
-
-ŠI VERSIJA:
-- TIKRINA VISUS ID IŠ EILĖS (tiek lyginius, tiek nelyginius) -> STEP=1.
-"""
-
-import re
-import random
-import time
-import threading
-import html
-import json
-import os
-from pathlib import Path
-from urllib.parse import urlparse
-from datetime import datetime, timezone
-from collections import OrderedDict
-from concurrent.futures import ThreadPoolExecutor
-
-from flask import Flask, request, jsonify, Response
-import requests
-from bs4 import BeautifulSoup
-
-# =========================
-# Konfigūracija (DEFAULT)
-# =========================
-DEFAULT_START_NUM = 3000000
-DEFAULT_END_NUM = 3000033
-DEFAULT_STEP = 1  # VISI -> STEP=1
-
-START_NUM = DEFAULT_START_NUM
-END_NUM = DEFAULT_END_NUM
-STEP = DEFAULT_STEP
-
-# Apsauga nuo per didelio intervalo (UI gali pasirinkti bet ką)
-MAX_RANGE_ITEMS = int(os.getenv("MAX_RANGE_ITEMS", "500000"))
-
-# Maksimalus batch dydis (kiek ID galima paduoti į /api/check_batch vienu kartu)
-MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "1000"))
-
-# Cache batch (be fetch į tikslą)
-MAX_CACHE_BATCH_IDS = int(os.getenv("MAX_CACHE_BATCH_IDS", str(max(2000, MAX_BATCH_IDS))))
-
-# Tikslinės svetainės lygiagretumas (kiek max vienu metu fetch'inti į aruodas.lt)
-TARGET_CONCURRENCY = int(os.getenv("TARGET_CONCURRENCY", "10"))
-if TARGET_CONCURRENCY < 1:
-    TARGET_CONCURRENCY = 1
-if TARGET_CONCURRENCY > 10:
-    TARGET_CONCURRENCY = 10
-
-# Keičiamas rate limit (per UI mygtukus)
-MIN_INTERVAL_SECONDS = 2.0  # default
-
-# Jitter: proporcingas + lubos
-JITTER_FRAC = (0.02, 0.15)         # 2%..15% nuo MIN_INTERVAL_SECONDS
-JITTER_CAP_SECONDS = (0.02, 0.15)  # absoliučios lubos sekundėmis
-
-JITTER_SECONDS = (
-    min(JITTER_CAP_SECONDS[0], MIN_INTERVAL_SECONDS * JITTER_FRAC[0]),
-    min(JITTER_CAP_SECONDS[1], MIN_INTERVAL_SECONDS * JITTER_FRAC[1]),
-)
-
-ALLOWED_RATE_LIMITS = [0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0]
-
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/121.0.0.0 Safari/537.36"
-)
-
-# Persistencijos failas:
-DEFAULT_STATE_FILE = Path(__file__).with_name("aruodas_state.json")
-STATE_FILE_ENV = (os.getenv("STATE_FILE") or "").strip()
-STATE_DIR_ENV = (os.getenv("STATE_DIR") or "").strip()
-
-if STATE_FILE_ENV:
-    STATE_FILE = Path(STATE_FILE_ENV)
-elif STATE_DIR_ENV:
-    STATE_FILE = Path(STATE_DIR_ENV) / "aruodas_state.json"
-else:
-    STATE_FILE = DEFAULT_STATE_FILE
-
-# Persistencijos optimizacija: nerašyti į diską po kiekvieno ID.
-STATE_SAVE_MIN_INTERVAL_SECONDS = float(os.getenv("STATE_SAVE_MIN_INTERVAL_SECONDS", "5"))
-STATE_SAVE_EVERY_N = int(os.getenv("STATE_SAVE_EVERY_N", "50"))
-_last_state_save_mono = 0.0
-_dirty_since_save = 0
-
-# =========================
-# HTTP / concurrency
-# =========================
-_last_request_at = 0.0
-_rate_lock = threading.Lock()
-
-TARGET_SEM = threading.BoundedSemaphore(TARGET_CONCURRENCY)
-EXECUTOR = ThreadPoolExecutor(max_workers=TARGET_CONCURRENCY)
-
-_thread_local = threading.local()
-
-_SESSION_HEADERS = {
-    "User-Agent": USER_AGENT,
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "lt-LT,lt;q=0.9,en;q=0.8",
-    "Accept-Encoding": "gzip, deflate",
-    "Connection": "keep-alive",
-    "DNT": "1",
-    "Upgrade-Insecure-Requests": "1",
-}
-
-
-def get_session() -> requests.Session:
-    # requests.Session nėra idealu share'inti tarp thread'ų -> thread-local
-    s = getattr(_thread_local, "session", None)
-    if s is None:
-        s = requests.Session()
-        s.headers.update(_SESSION_HEADERS)
-        _thread_local.session = s
-    return s
-
-
-# Cache atmintyje
-CACHE: dict[str, dict] = {}  # id -> parsed result (be raw_html)
-
-# RAW_CACHE: LRU
-RAW_CACHE = OrderedDict()  # id -> raw_html (tik tiems, kuriuos tikrinai; NEPERSISTINAM)
-RAW_CACHE_MAX_ITEMS = int(os.getenv("RAW_CACHE_MAX_ITEMS", "200"))
-RAW_CACHE_MAX_BYTES = int(os.getenv("RAW_CACHE_MAX_BYTES", "500000"))
-
-CACHE_LOCK = threading.Lock()
-
-NOT_FOUND_MARKERS = [
-    "Šiame puslapyje nėra informacijos, kurios jūs ieškote",
-    "Siame puslapyje nera informacijos, kurios jus ieskote",
-    "block-404",
-]
-
-CHALLENGE_MARKERS = [
-    "Just a moment",
-    "Enable JavaScript and cookies to continue",
-    "cdn-cgi/challenge-platform",
-    "_cf_chl_opt",
-]
-
-# =========================
-# Pagalbinės funkcijos
-# =========================
-def now_iso() -> str:
-    return datetime.now(timezone.utc).astimezone().isoformat(timespec="seconds")
-
-
-def range_count(start: int, end: int, step: int) -> int:
-    if start > end:
-        return 0
-    return ((end - start) // step) + 1
-
-
-def normalize_range(start: int, end: int, step: int) -> tuple[int, int, int]:
-    """Normalizuoja intervalą:
-    - STEP palaikomas tik 1 (visi).
-    - riboja max įrašų skaičių.
-    """
-    if step != 1:
-        raise ValueError("Šiuo metu palaikomas tik STEP=1 (visi ID).")
-
-    if start > end:
-        raise ValueError("start negali būti didesnis už end.")
-
-    cnt = range_count(start, end, step)
-    if cnt > MAX_RANGE_ITEMS:
-        raise ValueError(f"Per didelis intervalas: {cnt} įrašų. Max: {MAX_RANGE_ITEMS}.")
-
-    return start, end, step
-
-
-def in_range(n: int) -> bool:
-    return START_NUM <= n <= END_NUM
-
-
-def id_num(id_str: str) -> int:
-    return int(id_str.split("-", 1)[1])
-
-
-def normalize_id(id_like: str) -> str:
-    s = (id_like or "").strip()
-    if not s:
-        raise ValueError("Trūksta ID")
-    # priimam: "1-2890001", "1-2890001/", "https://www.aruodas.lt/1-2890001/"
-    s = s.replace("https://", "").replace("http://", "")
-    s = s.replace("www.aruodas.lt/", "")
-    s = s.strip("/")
-    if not re.fullmatch(r"1-\d+", s):
-        raise ValueError("Netinkamas ID formatas. Pvz: 1-3000000")
-    return s
-
-
-def parse_range_value(v) -> int:
-    """Priimam start/end kaip:
-    - int
-    - '3000000'
-    - '1-3000000'
-    """
-    if v is None:
-        raise ValueError("Trūksta start arba end reikšmės.")
-
-    if isinstance(v, int):
-        return v
-    if isinstance(v, float) and v.is_integer():
-        return int(v)
-
-    s = str(v).strip()
-    if not s:
-        raise ValueError("Tuščia start/end reikšmė.")
-
-    if re.fullmatch(r"1-\d+", s):
-        return id_num(s)
-    if re.fullmatch(r"\d+", s):
-        return int(s)
-
-    raise ValueError("Netinkamas start/end formatas. Naudok skaičių (pvz 3000000) arba ID (pvz 1-3000000).")
-
-
-def _safe_float(x, default: float) -> float:
-    try:
-        return float(x)
-    except Exception:
-        return default
-
-
-def recompute_jitter():
-    """Jitter = procentas nuo MIN_INTERVAL, bet su absoliučiom lubom (sekundėmis)."""
-    global JITTER_SECONDS
-
-    mi = float(MIN_INTERVAL_SECONDS)
-
-    jmin = min(float(JITTER_CAP_SECONDS[0]), mi * float(JITTER_FRAC[0]))
-    jmax = min(float(JITTER_CAP_SECONDS[1]), mi * float(JITTER_FRAC[1]))
-
-    if jmin < 0:
-        jmin = 0.0
-    if jmax < jmin:
-        jmax = jmin
-
-    JITTER_SECONDS = (jmin, jmax)
-
-
-def is_allowed_rate(x: float) -> bool:
-    try:
-        xf = float(x)
-    except Exception:
-        return False
-    return any(abs(xf - r) < 1e-9 for r in ALLOWED_RATE_LIMITS)
-
-
-def snap_rate(x: float) -> float:
-    xf = float(x)
-    return min(ALLOWED_RATE_LIMITS, key=lambda r: abs(r - xf))
-
-
-def rate_limit():
-    """Globalus rate-limit (bendras visiems thread'ams)."""
-    global _last_request_at
-    with _rate_lock:
-        now = time.monotonic()
-        earliest = _last_request_at + float(MIN_INTERVAL_SECONDS)
-        if now < earliest:
-            time.sleep((earliest - now) + random.uniform(*JITTER_SECONDS))
-        _last_request_at = time.monotonic()
-
-
-def detect_status(html_text: str, http_status: int | None = None) -> str:
-    low = (html_text or "").lower()
-
-    if http_status == 404:
-        return "NOT_FOUND"
-    if any(m.lower() in low for m in NOT_FOUND_MARKERS):
-        return "NOT_FOUND"
-    if any(m.lower() in low for m in CHALLENGE_MARKERS):
-        return "CHALLENGE"
-    return "FOUND"
-
-
-def extract_inserted_date(text: str) -> str | None:
-    m = re.search(r"Įdėtas\s*(\d{4}-\d{2}-\d{2})", text, flags=re.IGNORECASE)
-    if m:
-        return m.group(1)
-    m = re.search(r"Idetas\s*(\d{4}-\d{2}-\d{2})", text, flags=re.IGNORECASE)
-    if m:
-        return m.group(1)
-    return None
-
-
-def extract_title_text(soup: BeautifulSoup) -> str:
-    h1 = soup.find("h1")
-    if h1:
-        return " ".join(h1.stripped_strings)
-    og = soup.find("meta", attrs={"property": "og:title"})
-    if og and og.get("content"):
-        return og["content"].strip()
-    if soup.title and soup.title.string:
-        return soup.title.string.strip()
-    return ""
-
-
-def parse_city_district_from_h1(title_text: str) -> tuple[str | None, str | None]:
-    parts = [p.strip() for p in title_text.split(",") if p.strip()]
-    if len(parts) >= 2:
-        return parts[0], parts[1]
-    return None, None
-
-
-def parse_city_district_from_url(final_url: str) -> tuple[str | None, str | None]:
-    if not final_url:
-        return None, None
-    path = urlparse(final_url).path.strip("/")
-    if not path:
-        return None, None
-    slug = path.split("/")[-1].strip("/")
-    low = slug.lower()
-
-    if "vilniuje" in low:
-        tokens = low.split("-")
-        try:
-            i = tokens.index("vilniuje")
-            district = tokens[i + 1] if i + 1 < len(tokens) else None
-        except ValueError:
-            district = None
-        return "Vilnius", district
-
-    return None, None
-
-
-def make_snippet_html(source_text: str, word: str = "sugiharos", radius: int = 80) -> str | None:
-    if not source_text:
-        return None
-    low = source_text.lower()
-    idx = low.find(word.lower())
-    if idx == -1:
-        return None
-
-    start = max(0, idx - radius)
-    end = min(len(source_text), idx + len(word) + radius)
-    snippet = source_text[start:end]
-
-    esc = html.escape(snippet)
-    esc = re.sub(r"(?i)(sugiharos)", r'<span class="hit">\1</span>', esc)
-
-    prefix = "… " if start > 0 else ""
-    suffix = " …" if end < len(source_text) else ""
-    return prefix + esc + suffix
-
-
-def parse_html(html_text: str, final_url: str = "", http_status: int | None = None) -> dict:
-    status = detect_status(html_text, http_status=http_status)
-
-    sug_snippet = make_snippet_html(html_text, "sugiharos", radius=120)
-    sug_found = sug_snippet is not None
-
-    result = {
-        "status": status,  # FOUND / NOT_FOUND / CHALLENGE
-        "inserted_date": None,
-        "city": None,
-        "district": None,
-        "final_url": final_url or None,
-        "sugiharos_found": sug_found,
-        "sugiharos_snippet_html": sug_snippet,
-    }
-
-    if status != "FOUND":
-        # jei challenge, bent miestą/rajoną pabandom iš URL
-        city2, dist2 = parse_city_district_from_url(final_url)
-        if city2:
-            result["city"] = city2
-        if dist2:
-            result["district"] = dist2
-        return result
-
-    soup = BeautifulSoup(html_text, "html.parser")
-    title_text = extract_title_text(soup)
-    city, district = parse_city_district_from_h1(title_text)
-
-    text = soup.get_text("\n", strip=True)
-    inserted = extract_inserted_date(text)
-
-    if not city:
-        if re.search(r"\bvilni(?:us|uje|aus)\b", text, flags=re.IGNORECASE):
-            city = "Vilnius"
-        else:
-            city2, _ = parse_city_district_from_url(final_url)
-            city = city2 or city
-
-    if city and city.strip().lower() == "vilnius":
-        if not district:
-            _, dist2 = parse_city_district_from_url(final_url)
-            district = dist2 or district
-    else:
-        # taisyklė: jei miestas ne Vilnius – miesto/rajono nerodom
-        district = None
-        city = None
-
-    result["inserted_date"] = inserted
-    result["city"] = city
-    result["district"] = district
-    return result
-
-
-def fetch_and_parse(id_str: str) -> tuple[dict, str]:
-    """Fetch + parse vienam ID. Leidžia iki TARGET_CONCURRENCY paralelinių fetch'ų."""
-    url = f"https://www.aruodas.lt/{id_str}/"
-
-    with TARGET_SEM:
-        rate_limit()
-        session = get_session()
-        r = session.get(url, timeout=25, allow_redirects=True)
-
-    if not r.encoding:
-        r.encoding = "utf-8"
-    html_text = r.text
-
-    parsed = parse_html(html_text, final_url=r.url, http_status=r.status_code)
-
-    out = {
-        "id": id_str,
-        "checked_at": now_iso(),
-        "http_status": r.status_code,
-        **parsed,
-    }
-    return out, html_text
-
-
-def _raw_cache_put_locked(id_str: str, raw_html: str):
-    """LRU raw cache – kad RAM nesprogtų tikrinant tūkstančius ID."""
-    if RAW_CACHE_MAX_ITEMS <= 0:
-        return
-    RAW_CACHE[id_str] = (raw_html or "")[:RAW_CACHE_MAX_BYTES]
-    RAW_CACHE.move_to_end(id_str)
-    while len(RAW_CACHE) > RAW_CACHE_MAX_ITEMS:
-        RAW_CACHE.popitem(last=False)
-
-
-# =========================
-# Persistencija (istorija)
-# =========================
-def load_state_from_disk():
-    """Užkrauna CACHE + config (rate limit) + range iš aruodas_state.json, jei yra."""
-    global MIN_INTERVAL_SECONDS, START_NUM, END_NUM, STEP
-    global _last_state_save_mono, _dirty_since_save
-
-    if not STATE_FILE.exists():
-        return
-
-    try:
-        with open(STATE_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        return
-
-    cfg = (data or {}).get("config") or {}
-    min_int = _safe_float(cfg.get("min_interval"), MIN_INTERVAL_SECONDS)
-    if is_allowed_rate(min_int):
-        MIN_INTERVAL_SECONDS = snap_rate(min_int)
-        recompute_jitter()
-
-    rng = (data or {}).get("range") or {}
-    try:
-        start = int(rng.get("start", START_NUM))
-        end = int(rng.get("end", END_NUM))
-        step = int(rng.get("step", STEP))
-        start, end, step = normalize_range(start, end, step)
-        START_NUM, END_NUM, STEP = start, end, step
-    except Exception:
-        pass
-
-    cached = (data or {}).get("cache") or {}
-    if isinstance(cached, dict):
-        with CACHE_LOCK:
-            for k, v in cached.items():
-                if isinstance(k, str) and isinstance(v, dict) and "id" in v:
-                    CACHE[k] = v
-
-    _last_state_save_mono = time.monotonic()
-    _dirty_since_save = 0
-
-
-def save_state_to_disk_locked():
-    """Išsaugo CACHE + config + range į aruodas_state.json (CALL ONLY UNDER CACHE_LOCK)."""
-    tmp = STATE_FILE.with_suffix(".tmp")
-    payload = {
-        "version": 1,
-        "saved_at": now_iso(),
-        "config": {
-            "min_interval": MIN_INTERVAL_SECONDS,
-            "jitter": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
-            "allowed_rates": ALLOWED_RATE_LIMITS,
-        },
-        "range": {
-            "start": START_NUM,
-            "end": END_NUM,
-            "step": STEP,
-        },
-        "cache": CACHE,
-    }
-    try:
-        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, STATE_FILE)
-    except Exception:
-        try:
-            if tmp.exists():
-                tmp.unlink()
-        except Exception:
-            pass
-
-
-def mark_state_dirty_locked(force: bool = False):
-    """Throttle disk writes (CALL ONLY UNDER CACHE_LOCK)."""
-    global _dirty_since_save, _last_state_save_mono
-
-    _dirty_since_save += 1
-    if force:
-        save_state_to_disk_locked()
-        _dirty_since_save = 0
-        _last_state_save_mono = time.monotonic()
-        return
-
-    now = time.monotonic()
-    if _dirty_since_save >= STATE_SAVE_EVERY_N or (now - _last_state_save_mono) >= STATE_SAVE_MIN_INTERVAL_SECONDS:
-        save_state_to_disk_locked()
-        _dirty_since_save = 0
-        _last_state_save_mono = now
-
-
-def _iter_cached_in_current_range_locked():
-    for id_str, entry in CACHE.items():
-        try:
-            n = id_num(id_str)
-            if in_range(n):
-                yield id_str, entry
-        except Exception:
-            continue
-
-
-def get_cached_ids_for_current_range_locked() -> list[str]:
-    ids = []
-    for id_str, _ in _iter_cached_in_current_range_locked():
-        ids.append(id_str)
-    return ids
-
-
-def get_cached_stats_for_current_range_locked() -> dict:
-    stats = {
-        "checked": 0,
-        "found": 0,
-        "not_found": 0,
-        "challenge": 0,
-        "error": 0,
-        "bad_total": 0,
-    }
-    for _, entry in _iter_cached_in_current_range_locked():
-        stats["checked"] += 1
-        st = (entry or {}).get("status")
-        sug = (entry or {}).get("sugiharos_found") is True
-        if st == "FOUND" or sug:
-            stats["found"] += 1
-        if st == "NOT_FOUND":
-            stats["not_found"] += 1
-        elif st == "CHALLENGE":
-            stats["challenge"] += 1
-        elif st == "ERROR":
-            stats["error"] += 1
-
-    stats["bad_total"] = stats["not_found"] + stats["challenge"] + stats["error"]
-    return stats
-
-
-def get_cached_items_for_current_range_locked(mode: str = "all") -> list[dict]:
-    mode = (mode or "all").strip().lower()
-    items = []
-
-    for _, entry in _iter_cached_in_current_range_locked():
-        if not isinstance(entry, dict):
-            continue
-
-        st = entry.get("status")
-        sug = entry.get("sugiharos_found") is True
-
-        if mode == "none":
-            continue
-        if mode == "found":
-            if st == "FOUND" or sug:
-                items.append(entry)
-        elif mode == "bad":
-            if st in ("ERROR", "CHALLENGE", "NOT_FOUND"):
-                items.append(entry)
-        else:
-            items.append(entry)
-
-    return items
-
-
-# užkraunam state iš karto startuojant
-load_state_from_disk()
-
-# =========================
-# Flask
-# =========================
-app = Flask(__name__)
-
-INDEX_HTML = r"""<!doctype html>
-<html lang="lt">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width,initial-scale=1" />
-  <title>Aruodas ID tikrintuvas</title>
-  <style>
-    body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 16px; }
-    .bar { display:flex; flex-wrap:wrap; gap:8px; align-items:center; margin-bottom: 12px; }
-    input[type="text"], input[type="number"], select { padding: 6px 8px; font-size: 14px; }
-    input[type="text"] { width: 170px; }
-    input[type="number"] { width: 140px; }
-    button { padding: 7px 10px; font-size: 14px; cursor:pointer; }
-    button:disabled { opacity: 0.55; cursor: not-allowed; }
-    small { color:#666; }
-    .grid { display:grid; grid-template-columns: 1fr; gap: 14px; }
-    @media (min-width: 1000px) { .grid { grid-template-columns: 1fr 1fr; } }
-    table { width:100%; border-collapse: collapse; table-layout: fixed; }
-    th, td { border: 1px solid #ddd; padding: 6px 8px; font-size: 13px; vertical-align: top; }
-    th { background: #f7f7f7; position: sticky; top:0; z-index: 1; }
-    td.nowrap { white-space:nowrap; }
-    tr.found { background: #eaffea; }
-    tr.notfound { background: #ffecec; }
-    tr.challenge { background: #fff4db; }
-    tr.error { background: #f5d6ff; }
-    tr.unknown { background: #fbfbfb; }
-    a { color: inherit; }
-    .status { font-weight: 700; }
-    .hit { color: #0b63d1; font-weight: 700; }
-    .mono { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; }
-    .note { color:#444; word-break: break-word; }
-    .pill { display:inline-block; padding:2px 6px; border:1px solid #ccc; border-radius:999px; font-size:12px; background:#fff; }
-    textarea { width: 100%; height: 180px; font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size: 12px; }
-    .card { border:1px solid #ddd; border-radius:8px; padding:10px; }
-    .muted { color:#777; }
-    .rate-btn { border: 1px solid #bbb; background: #fff; border-radius: 8px; }
-    .rate-btn.active { border-color: #111; font-weight: 700; }
-    #btnAutoToggle { border-radius: 10px; }
-    #btnAutoToggle.running { font-weight: 800; }
-    .warn { background:#fff4db; border:1px solid #f0d28a; padding:10px; border-radius:8px; }
-  </style>
-</head>
-<body>
-  <h2 style="margin:0 0 6px 0;">Aruodas ID tikrintuvas</h2>
-
-  <div class="warn" style="margin: 8px 0 12px 0;">
-    <b>⚠️ ĮSPĖJIMAS:</b> tik testavimui/eksperimentams. <b>Nenaudoti produkcinėje aplinkoje.</b>
-    <div class="muted" style="margin-top:4px;">Pastaba: turi iki <b>__CONC__</b> lygiagrečių užklausų į tikslą (su global rate-limit).</div>
-  </div>
-
-  <div class="bar">
-    <span class="pill" id="rangePill">ID intervalas: <b class="mono" id="pillStart">1-__START__</b> … <b class="mono" id="pillEnd">1-__END__</b> (visi, STEP=1)</span>
-    <span class="pill" id="countPill">Kiekis: <b class="mono" id="countVal">—</b></span>
-    <span class="pill">User-Agent: <span class="mono">__UA__</span></span>
-    <span class="pill" id="ratePill">Rate limit: min <b class="mono" id="rateVal">__MIN__</b>s + jitter</span>
-    <span class="pill" id="autoPill">Auto: OFF</span>
-    <span class="pill" id="speedPill">Greitis: <b class="mono" id="speedVal">0</b>/min</span>
-  </div>
-
-  <div class="bar">
-    <span class="muted">Nustatyk ID intervalą:</span>
-    <input id="rangeStart" type="number" step="1" value="__START__" />
-    <input id="rangeEnd" type="number" step="1" value="__END__" />
-    <button id="btnGenerate">Generuoti sąrašą</button>
-    <small class="muted">Ši versija tikrina VISUS ID (lyginius+nelyginius) – STEP=1.</small>
-  </div>
-
-  <div class="bar">
-    <span class="muted">Rate limit:</span>
-    <button class="rate-btn" data-rate="0.02">0.02s</button>
-    <button class="rate-btn" data-rate="0.05">0.05s</button>
-    <button class="rate-btn" data-rate="0.1">0.1s</button>
-    <button class="rate-btn" data-rate="0.2">0.2s</button>
-    <button class="rate-btn" data-rate="0.5">0.5s</button>
-    <button class="rate-btn" data-rate="1">1s</button>
-    <button class="rate-btn" data-rate="2">2s</button>
-    <small class="muted">Keičia serverio limitą ir išsisaugo (persist).</small>
-  </div>
-
-  <div class="bar">
-    <span class="muted">Auto batch (IDs per API call):</span>
-    <select id="batchSize">
-      <option value="1">1</option>
-      <option value="5">5</option>
-      <option value="10">10</option>
-      <option value="20">20</option>
-      <option value="50" selected>50</option>
-      <option value="100">100</option>
-      <option value="200">200</option>
-      <option value="250">250</option>
-      <option value="500">500</option>
-      <option value="1000">1000</option>
-    </select>
-    <small class="muted">Serveris vykdo iki __CONC__ fetch'ų į tikslą.</small>
-  </div>
-
-  <div class="bar">
-    <input id="idInput" type="text" value="1-__START__" />
-    <button id="btnCheck">Tikrinti ID</button>
-    <button id="btnRandom">Atsitiktinis ID</button>
-    <button id="btnForce">Tikrinti (force)</button>
-    <button id="btnAutoToggle">▶ Auto (OFF)</button>
-    <small class="muted">Auto eina per netikrintus ID iš eilės. Sustos, jei gaus <b>ERROR</b>.</small>
-  </div>
-
-  <div class="grid">
-    <div>
-      <h3 style="margin: 8px 0;">✅ Rasti skelbimai (FOUND arba sugiharos hit)</h3>
-      <table>
-        <thead>
-          <tr>
-            <th style="width:120px;">ID</th>
-            <th style="width:90px;">Įdėtas</th>
-            <th style="width:120px;">Miestas</th>
-            <th style="width:140px;">Rajonas</th>
-            <th>Pastabos</th>
-          </tr>
-        </thead>
-        <tbody id="foundBody"></tbody>
-      </table>
-      <div class="muted" style="margin-top:6px;">Rūšiuojama (naujausi viršuje).</div>
-    </div>
-
-    <div>
-      <h3 style="margin: 8px 0;">📋 Visi ID (puslapiais)</h3>
-
-      <div class="bar">
-        <span class="muted">Puslapis:</span>
-        <button id="btnPrevPage">◀</button>
-        <span class="pill mono" id="pagePill">—</span>
-        <button id="btnNextPage">▶</button>
-
-        <span class="muted">Eilutės/pusl.:</span>
-        <select id="pageSize">
-          <option value="100">100</option>
-          <option value="250">250</option>
-          <option value="500" selected>500</option>
-          <option value="1000">1000</option>
-        </select>
-
-        <span class="muted">Šokti į ID:</span>
-        <input id="jumpTo" type="text" value="1-__START__" style="width:170px;" />
-        <button id="btnJump">Eiti</button>
-
-        <small class="muted">Dideliems intervalams čia rodoma tik dalis – nebekuriama 50k+ eilučių DOM’e.</small>
-      </div>
-
-      <div class="bar">
-        <input id="filter" type="text" placeholder="Filtras (pvz. 3123)" />
-        <button id="btnClearFilter">Valyti filtrą</button>
-        <button id="btnShowOnlyBad">Rodyti tik raudonus/oranžinius</button>
-        <button id="btnShowAll">Rodyti visus</button>
-      </div>
-
-      <small class="muted">Pastaba: filtras taikomas tik dabartiniam puslapiui.</small>
-
-      <table>
-        <thead>
-          <tr>
-            <th style="width:120px;">ID</th>
-            <th style="width:90px;">Status</th>
-            <th style="width:90px;">Įdėtas</th>
-            <th style="width:120px;">Miestas</th>
-            <th style="width:140px;">Rajonas</th>
-            <th>Pastabos</th>
-          </tr>
-        </thead>
-        <tbody id="allBody"></tbody>
-      </table>
-    </div>
-  </div>
-
-  <h3 style="margin: 14px 0 6px 0;">🧪 Debug (įklijuok HTML atsakymą ir pasitikrink parserį)</h3>
-  <div class="card">
-    <div class="bar">
-      <input id="debugUrl" type="text" placeholder="(nebūtina) final_url pvz. https://www.aruodas.lt/..." style="width:420px;" />
-      <button id="btnDebugParse">Parse DEBUG</button>
-    </div>
-    <textarea id="debugHtml" placeholder="Čia įklijuok visą HTML (kurį gavai su curl ar kitu metodu)"></textarea>
-    <div id="debugOut" class="note" style="margin-top:8px;"></div>
-  </div>
-
-<script>
-// Dinaminis range (keičiamas po page load)
-let START = __START__;
-let END   = __END__;
-let STEP  = __STEP__;
-let showOnlyBad = false;
-
-// Auto režimo būsena
-let autoRunning = false;
-let autoStopRequested = false;
-let autoNextNum = START;
-
-// State krovimo apsauga
-let stateLoading = false;
-let statePromise = null;
-
-// Patikrintų ID rinkinys (kad auto praleistų jau tikrintus)
-const checkedIds = new Set();
-
-// Lokalus rezultato cache (tik tai, ką UI jau parsisiuntė iš serverio)
-const resultsMap = new Map(); // id -> data
-
-// ===== Greičio skaičiavimas (checks per minute) =====
-// Skaičiuojam tik realius fetch į aruodas.lt: data.from_cache === false
-const speedWindow = []; // timestamps (ms)
-function recordSpeed(data){
-  if(data && data.from_cache === false){
-    const now = Date.now();
-    speedWindow.push(now);
-    while(speedWindow.length && speedWindow[0] < now - 60000){
-      speedWindow.shift();
-    }
-  }
-}
-function updateSpeedUi(){
-  const now = Date.now();
-  while(speedWindow.length && speedWindow[0] < now - 60000){
-    speedWindow.shift();
-  }
-  const el = document.getElementById("speedVal");
-  if(el) el.textContent = String(speedWindow.length);
-}
-setInterval(updateSpeedUi, 1000);
-
-// Auto batch dydis (IDs per API call)
-const AUTO_BATCH_OPTIONS = [1,5,10,20,50,100,200,250,500,1000];
-let AUTO_BATCH_SIZE = parseInt(localStorage.getItem("autoBatchSize") || "50", 10);
-if(!Number.isFinite(AUTO_BATCH_SIZE) || AUTO_BATCH_SIZE <= 0) AUTO_BATCH_SIZE = 50;
-if(!AUTO_BATCH_OPTIONS.includes(AUTO_BATCH_SIZE)) AUTO_BATCH_SIZE = 50;
-
-// „Visi ID“ puslapiavimas
-const PAGE_SIZE_OPTIONS = [100,250,500,1000];
-let PAGE_SIZE = parseInt(localStorage.getItem("pageSize") || "500", 10);
-if(!Number.isFinite(PAGE_SIZE) || PAGE_SIZE <= 0) PAGE_SIZE = 500;
-if(!PAGE_SIZE_OPTIONS.includes(PAGE_SIZE)) PAGE_SIZE = 500;
-
-let currentPage = 0;
-let pageLoadToken = 0;
-
-function totalCount(){
-  return Math.floor((END-START)/STEP)+1;
-}
-function totalPages(){
-  return Math.max(1, Math.ceil(totalCount()/PAGE_SIZE));
-}
-function checkedCount(){
-  return checkedIds.size;
-}
-
-function numFromId(id) { const m=/^1-(\d+)$/.exec(id); return m?parseInt(m[1],10):NaN; }
-function makeId(n){ return "1-"+String(n); }
-
-function randomInRange(){
-  const count = totalCount();
-  const k = Math.floor(Math.random()*count);
-  return START + k*STEP;
-}
-
-function statusToClass(s){
-  if(s==="FOUND") return "found";
-  if(s==="NOT_FOUND") return "notfound";
-  if(s==="CHALLENGE") return "challenge";
-  if(s==="ERROR") return "error";
-  return "unknown";
-}
-function statusLabel(s){
-  if(s==="FOUND") return "FOUND";
-  if(s==="NOT_FOUND") return "NĖRA";
-  if(s==="CHALLENGE") return "CHALLENGE";
-  if(s==="ERROR") return "ERROR";
-  return "—";
-}
-function safeText(x){ return (x===null||x===undefined)?"":String(x); }
-
-function updatePagePill(extraText=""){
-  const pill = document.getElementById("pagePill");
-  if(!pill) return;
-  const tp = totalPages();
-  const cur = Math.min(tp, Math.max(1, currentPage+1));
-  pill.textContent = `${cur}/${tp} (ps=${PAGE_SIZE})${extraText ? " – " + extraText : ""}`;
-}
-
-function updateRangeUi(){
-  const rs = document.getElementById("rangeStart");
-  const re = document.getElementById("rangeEnd");
-  if(rs) rs.value = String(START);
-  if(re) re.value = String(END);
-
-  const ps = document.getElementById("pillStart");
-  const pe = document.getElementById("pillEnd");
-  if(ps) ps.textContent = "1-" + String(START);
-  if(pe) pe.textContent = "1-" + String(END);
-
-  const cnt = totalCount();
-  const cv = document.getElementById("countVal");
-  if(cv) cv.textContent = String(cnt);
-
-  const idInput = document.getElementById("idInput");
-  if(idInput){
-    const cur = idInput.value.trim();
-    const n = numFromId(cur);
-    if(!cur || !Number.isFinite(n) || n < START || n > END){
-      idInput.value = makeId(START);
-    }
-  }
-
-  const jump = document.getElementById("jumpTo");
-  if(jump){
-    const cur = jump.value.trim();
-    const n = numFromId(cur);
-    if(!cur || !Number.isFinite(n) || n < START || n > END){
-      jump.value = makeId(START);
-    }
-  }
-
-  autoNextNum = START;
-  currentPage = 0;
-  updatePagePill();
-}
-
-function buildAllRow(id){
-  const tr=document.createElement("tr");
-  tr.dataset.id=id;
-  tr.dataset.num=String(numFromId(id));
-  tr.className="unknown";
-  tr.innerHTML=`
-    <td class="nowrap mono">
-      <a href="https://www.aruodas.lt/${id}/" target="_blank" rel="noopener">${id}</a>
-      <div><button data-action="check" data-id="${id}">Tikrinti</button></div>
-    </td>
-    <td class="status">—</td>
-    <td class="mono"></td>
-    <td></td><td></td>
-    <td class="note"></td>`;
-  return tr;
-}
-
-function buildFoundRow(id,data){
-  const tr=document.createElement("tr");
-  tr.dataset.id=id;
-  tr.dataset.num=String(numFromId(id));
-  tr.dataset.date=data.inserted_date||"";
-  tr.className="found";
-
-  const pill = (data.status && data.status !== "FOUND")
-    ? `<span class="pill mono">${statusLabel(data.status)}</span> `
-    : "";
-
-  tr.innerHTML=`
-    <td class="nowrap mono">
-      <a href="https://www.aruodas.lt/${id}/" target="_blank" rel="noopener">${id}</a>
-      <div><a class="mono" href="/raw?id=${encodeURIComponent(id)}" target="_blank" rel="noopener">raw</a></div>
-    </td>
-    <td class="mono">${safeText(data.inserted_date||"")}</td>
-    <td>${safeText(data.city||"")}</td>
-    <td>${safeText(data.district||"")}</td>
-    <td class="note">${pill}${data.sugiharos_snippet_html||""}</td>`;
-  return tr;
-}
-
-function updateAllRow(tr,data){
-  tr.className=statusToClass(data.status);
-  const tds=tr.querySelectorAll("td");
-  tds[1].textContent=statusLabel(data.status);
-  tds[2].textContent=data.inserted_date||"";
-  tds[3].textContent=data.city||"";
-  tds[4].textContent=data.district||"";
-
-  if(data.status==="ERROR" && data.error){
-    tds[5].textContent = data.error;
-  } else {
-    tds[5].innerHTML = data.sugiharos_snippet_html||"";
-  }
-
-  const idCell=tds[0];
-  if(!idCell.querySelector('a[href^="/raw"]') && (data.status && data.status!=="—")){
-    const div=document.createElement("div");
-    div.innerHTML=`<a class="mono" href="/raw?id=${encodeURIComponent(data.id||tr.dataset.id)}" target="_blank" rel="noopener">raw</a>`;
-    idCell.appendChild(div);
-  }
-}
-
-function sortFoundTable(){
-  const body=document.getElementById("foundBody");
-  const rows=Array.from(body.querySelectorAll("tr"));
-  rows.sort((a,b)=>{
-    const da=a.dataset.date||"", db=b.dataset.date||"";
-    if(da!==db) return db.localeCompare(da);
-    return (parseInt(b.dataset.num,10)-parseInt(a.dataset.num,10));
-  });
-  for(const r of rows) body.appendChild(r);
-}
-
-function applyFilter(){
-  const q=document.getElementById("filter").value.trim();
-  const rows=document.querySelectorAll("#allBody tr");
-  for(const tr of rows){
-    const id=tr.dataset.id, cls=tr.className;
-    const isBad=(cls==="notfound"||cls==="challenge"||cls==="error");
-    const passQ=!q||id.includes(q)||tr.dataset.num.includes(q);
-    const passBad=!showOnlyBad||isBad;
-    tr.style.display=(passQ&&passBad)?"":"none";
-  }
-}
-
-function updateAutoPill(extraText=""){
-  const pill = document.getElementById("autoPill");
-  if(!pill) return;
-  const base = autoRunning ? "Auto: ON" : "Auto: OFF";
-  const prog = `${checkedCount()}/${totalCount()}`;
-  const bs = `batch=${AUTO_BATCH_SIZE}`;
-  pill.textContent = `${base} (${prog}, ${bs})${extraText ? " – " + extraText : ""}`;
-}
-
-function chunkArray(arr, size){
-  const out=[];
-  for(let i=0;i<arr.length;i+=size){
-    out.push(arr.slice(i,i+size));
-  }
-  return out;
-}
-
-function pageIds(pageIndex){
-  const total = totalCount();
-  const startIndex = pageIndex * PAGE_SIZE;
-  const out = [];
-
-  for(let i=0;i<PAGE_SIZE;i++){
-    const idx = startIndex + i;
-    if(idx >= total) break;
-    const n = START + idx*STEP;
-    out.push(makeId(n));
-  }
-  return out;
-}
-
-function renderAllPage(){
-  const body=document.getElementById("allBody");
-  body.innerHTML = "";
-  const ids = pageIds(currentPage);
-  const frag=document.createDocumentFragment();
-
-  for(const id of ids){
-    const tr = buildAllRow(id);
-    const cached = resultsMap.get(id);
-    if(cached) updateAllRow(tr, cached);
-    frag.appendChild(tr);
-  }
-  body.appendChild(frag);
-
-  updatePagePill();
-  applyFilter();
-}
-
-async function fetchCacheBatch(ids){
-  let resp, data;
-  try{
-    resp = await fetch("/api/cache_batch", {
-      method:"POST",
-      headers:{"Content-Type":"application/json"},
-      body: JSON.stringify({ ids })
-    });
-    data = await resp.json();
-  } catch(err){
-    return [];
-  }
-
-  if(!resp || !resp.ok || !data || data.error){
-    return [];
-  }
-  return data.items || [];
-}
-
-async function loadCacheForVisiblePage(){
-  const token = ++pageLoadToken;
-  const ids = pageIds(currentPage);
-
-  // tik tie, kurie jau patikrinti (kad nerizikuotume fetch'int į tikslą)
-  const need = ids.filter(id => checkedIds.has(id) && !resultsMap.has(id));
-  if(!need.length){
-    updatePagePill();
-    return;
-  }
-
-  updatePagePill("kraunama…");
-
-  const chunks = chunkArray(need, 500);
-
-  for(const chunk of chunks){
-    if(token !== pageLoadToken) return;
-    const items = await fetchCacheBatch(chunk);
-    for(const item of items){
-      applyResultToUi(item, false);
-    }
-  }
-
-  sortFoundTable();
-  applyFilter();
-  updateAutoPill();
-  updatePagePill();
-}
-
-function setPage(p){
-  const tp = totalPages();
-  currentPage = Math.max(0, Math.min(tp-1, p));
-  renderAllPage();
-  loadCacheForVisiblePage();
-}
-
-function jumpToId(idLike){
-  const s = (idLike||"").trim();
-  if(!s) return;
-
-  let n = NaN;
-  const m = /^1-(\d+)$/.exec(s);
-  if(m) n = parseInt(m[1],10);
-  else if(/^\d+$/.test(s)) n = parseInt(s,10);
-
-  if(!Number.isFinite(n)){
-    alert("Netinkamas ID / skaičius. Pvz: 1-3000000");
-    return;
-  }
-  if(n < START || n > END){
-    alert("ID ne intervale.");
-    return;
-  }
-
-  const idx = Math.floor((n - START) / STEP);
-  const page = Math.floor(idx / PAGE_SIZE);
-  setPage(page);
-
-  const jump = document.getElementById("jumpTo");
-  if(jump) jump.value = makeId(n);
-
-  setTimeout(()=>{
-    const id = makeId(n);
-    const row = document.querySelector(`#allBody tr[data-id="${CSS.escape(id)}"]`);
-    if(row){
-      row.style.outline = "2px solid #0b63d1";
-      setTimeout(()=>{ row.style.outline = ""; }, 1200);
-    }
-  }, 50);
-}
-
-function applyResultToUi(data, doSort=true){
-  recordSpeed(data);
-  updateSpeedUi();
-
-  const idNorm=data.id;
-  checkedIds.add(idNorm);
-  resultsMap.set(idNorm, data);
-
-  const putToFound = (data.status === "FOUND") || (data.sugiharos_found === true);
-
-  if(putToFound){
-    const existing=document.querySelector(`#foundBody tr[data-id="${CSS.escape(idNorm)}"]`);
-    if(existing) existing.remove();
-    document.getElementById("foundBody").appendChild(buildFoundRow(idNorm,data));
-    if(doSort) sortFoundTable();
-  }
-
-  const allRow=document.querySelector(`#allBody tr[data-id="${CSS.escape(idNorm)}"]`);
-  if(allRow){
-    updateAllRow(allRow, data);
-  }
-}
-
-async function checkId(id, force=false, silent=false){
-  let resp, data;
-  try{
-    resp = await fetch(`/api/check?id=${encodeURIComponent(id)}&force=${force?"1":"0"}`);
-    data = await resp.json();
-  } catch(err){
-    data = {
-      id: id,
-      checked_at: new Date().toISOString(),
-      status: "ERROR",
-      error: String(err),
-      http_status: null,
-      inserted_date: null,
-      city: null,
-      district: null,
-      final_url: null,
-      sugiharos_found: false,
-      sugiharos_snippet_html: null,
-      from_cache: false
-    };
-  }
-
-  if(!resp || !resp.ok || data.error){
-    data = data || {};
-    if(!data.id) data.id = id;
-    if(!data.status) data.status = "ERROR";
-    if(!data.error) data.error = data.error || "Klaida tikrinant ID";
-    if(data.from_cache === undefined) data.from_cache = false;
-    applyResultToUi(data, true);
-    applyFilter();
-    updateAutoPill();
-    if(!silent){
-      alert(data.error || "Klaida tikrinant ID");
-    }
-    return data;
-  }
-
-  applyResultToUi(data, true);
-  applyFilter();
-  updateAutoPill();
-  return data;
-}
-
-async function checkBatch(ids, force=false, silent=false, stopOnError=false){
-  let resp, data;
-  try{
-    resp = await fetch("/api/check_batch", {
-      method:"POST",
-      headers:{"Content-Type":"application/json"},
-      body: JSON.stringify({
-        ids: ids,
-        force: force ? 1 : 0,
-        stop_on_error: stopOnError ? 1 : 0
-      })
-    });
-    data = await resp.json();
-  } catch(err){
-    const msg = String(err);
-    if(!silent) alert(msg);
-    return [{
-      id: (ids && ids[0]) ? ids[0] : "1-0",
-      checked_at: new Date().toISOString(),
-      status: "ERROR",
-      error: msg,
-      http_status: null,
-      inserted_date: null,
-      city: null,
-      district: null,
-      final_url: null,
-      sugiharos_found: false,
-      sugiharos_snippet_html: null,
-      from_cache: false
-    }];
-  }
-
-  if(!resp || !resp.ok || !data || data.error){
-    const msg = (data && data.error) ? data.error : "Klaida tikrinant batch";
-    if(!silent) alert(msg);
-    return [{
-      id: (ids && ids[0]) ? ids[0] : "1-0",
-      checked_at: new Date().toISOString(),
-      status: "ERROR",
-      error: msg,
-      http_status: null,
-      inserted_date: null,
-      city: null,
-      district: null,
-      final_url: null,
-      sugiharos_found: false,
-      sugiharos_snippet_html: null,
-      from_cache: false
-    }];
-  }
-
-  return data.items || [];
-}
-
-function updateRateUi(minInterval){
-  const el=document.getElementById("rateVal");
-  if(el) el.textContent = String(minInterval);
-
-  const btns = document.querySelectorAll("button.rate-btn");
-  btns.forEach(b => {
-    const r = parseFloat(b.dataset.rate);
-    b.classList.toggle("active", Math.abs(r - parseFloat(minInterval)) < 1e-9);
-  });
-}
-
-async function setRate(minInterval){
-  const resp = await fetch("/api/config", {
-    method:"POST",
-    headers:{"Content-Type":"application/json"},
-    body: JSON.stringify({min_interval: minInterval})
-  });
-  const data = await resp.json();
-  if(!resp.ok || data.error){
-    alert(data.error || "Nepavyko pakeisti rate limit");
-    return;
-  }
-  updateRateUi(data.min_interval);
-}
-
-async function setRangeOnServer(startVal, endVal){
-  const resp = await fetch("/api/range", {
-    method:"POST",
-    headers:{"Content-Type":"application/json"},
-    body: JSON.stringify({start: startVal, end: endVal})
-  });
-  const data = await resp.json();
-  if(!resp.ok || data.error){
-    alert(data.error || "Nepavyko nustatyti intervalo");
-    return false;
-  }
-  return true;
-}
-
-function setControlsDisabled(disabled, disableAuto=false){
-  const autoBtn = document.getElementById("btnAutoToggle");
-  if(autoBtn){
-    autoBtn.disabled = disableAuto ? disabled : false;
-  }
-
-  const ids = ["btnCheck","btnRandom","btnForce","btnGenerate"];
-  ids.forEach(id=>{
-    const el = document.getElementById(id);
-    if(el) el.disabled = disabled;
-  });
-
-  document.querySelectorAll("button.rate-btn").forEach(b => b.disabled = disabled);
-  document.querySelectorAll("button[data-action='check']").forEach(b => b.disabled = disabled);
-
-  [
-    "filter","btnClearFilter","btnShowOnlyBad","btnShowAll",
-    "idInput","rangeStart","rangeEnd","batchSize",
-    "btnPrevPage","btnNextPage","pageSize","jumpTo","btnJump"
-  ].forEach(id=>{
-    const el = document.getElementById(id);
-    if(el) el.disabled = disabled;
-  });
-}
-
-function setAutoButtonUi(){
-  const btn = document.getElementById("btnAutoToggle");
-  if(!btn) return;
-  btn.classList.toggle("running", autoRunning);
-  btn.textContent = autoRunning ? "⏸ Auto (STOP)" : "▶ Auto (OFF)";
-}
-
-function findNextUncheckedBatch(fromNum, limit){
-  const total = totalCount();
-  let n = fromNum;
-  const out = [];
-
-  for(let i=0;i<total && out.length<limit;i++){
-    if(n > END) n = START; // wrap – jei kažką praleidai, vis tiek viską patikrins
-    const id = makeId(n);
-    if(!checkedIds.has(id)){
-      out.push({id, n});
-    }
-    n += STEP;
-  }
-
-  return out.length ? out : null;
-}
-
-async function runAuto(){
-  if(autoRunning) return;
-
-  if(stateLoading && statePromise){
-    await statePromise;
-  }
-
-  autoRunning = true;
-  autoStopRequested = false;
-
-  setControlsDisabled(true, false);
-  setAutoButtonUi();
-  updateAutoPill("start");
-
-  let n = autoNextNum;
-
-  while(autoRunning && !autoStopRequested){
-    const batch = findNextUncheckedBatch(n, AUTO_BATCH_SIZE);
-    if(!batch){
-      updateAutoPill("baigta (viskas patikrinta)");
-      break;
-    }
-
-    const ids = batch.map(x => x.id);
-    updateAutoPill(`tikrinama batch: ${ids[0]} … (${ids.length})`);
-
-    const items = await checkBatch(ids, false, true, true);
-
-    for(const item of items){
-      applyResultToUi(item, false);
-    }
-    sortFoundTable();
-    applyFilter();
-    updateAutoPill();
-
-    const bad = items.find(it => (it && (it.status === "ERROR" || it.error)));
-    if(bad){
-      const bid = bad.id || (ids[0] || "");
-      updateAutoPill(`SUSTABDYTA: ERROR ties ${bid}`);
-      break;
-    }
-
-    const processed = items.length;
-    if(processed <= 0){
-      updateAutoPill("SUSTABDYTA: tuščias batch atsakymas");
-      break;
-    }
-    const last = batch[Math.min(processed, batch.length) - 1];
-    n = last.n + STEP;
-    autoNextNum = n;
-
-    await new Promise(r => setTimeout(r, 30));
-  }
-
-  autoRunning = false;
-  autoStopRequested = false;
-
-  setControlsDisabled(false, true);
-  setAutoButtonUi();
-  updateAutoPill();
-}
-
-function stopAuto(){
-  if(!autoRunning) return;
-  autoStopRequested = true;
-  updateAutoPill("stabdoma…");
-}
-
-async function reloadEverything(){
-  if(stateLoading && statePromise) return statePromise;
-
-  stateLoading = true;
-  setControlsDisabled(true, !autoRunning);
-  setAutoButtonUi();
-  updateAutoPill("kraunama…");
-  updatePagePill("kraunama…");
-
-  statePromise = (async()=>{
-    try{
-      checkedIds.clear();
-      resultsMap.clear();
-      speedWindow.length = 0;
-      updateSpeedUi();
-
-      document.getElementById("foundBody").innerHTML = "";
-      document.getElementById("allBody").innerHTML = "";
-
-      const resp = await fetch("/api/state?items=found&include_ids=1");
-      const state = await resp.json();
-
-      const cfg = state.config || {};
-      if(cfg.min_interval !== undefined && cfg.min_interval !== null){
-        updateRateUi(cfg.min_interval);
-      }
-
-      const rng = state.range || {};
-      if(rng.start !== undefined && rng.end !== undefined && rng.step !== undefined){
-        START = parseInt(rng.start,10);
-        END   = parseInt(rng.end,10);
-        STEP  = parseInt(rng.step,10);
-      }
-
-      const ids = state.checked_ids || [];
-      for(const id of ids){
-        checkedIds.add(id);
-      }
-
-      updateRangeUi();
-
-      const items = state.items || [];
-      for(const item of items){
-        applyResultToUi(item, false);
-      }
-      sortFoundTable();
-
-      renderAllPage();
-      await loadCacheForVisiblePage();
-
-      applyFilter();
-      updateAutoPill();
-    } finally {
-      stateLoading = false;
-
-      if(autoRunning){
-        setControlsDisabled(true, false);
-      } else {
-        setControlsDisabled(false, true);
-      }
-
-      setAutoButtonUi();
-      updateAutoPill();
-      updatePagePill();
-    }
-  })();
-
-  return statePromise;
-}
-
-document.addEventListener("click",async(e)=>{
-  const btn=e.target.closest("button[data-action='check']");
-  if(btn) await checkId(btn.dataset.id,false,false);
-
-  const rbtn = e.target.closest("button.rate-btn");
-  if(rbtn){
-    const val = parseFloat(rbtn.dataset.rate);
-    await setRate(val);
-  }
-});
-
-document.getElementById("btnCheck").addEventListener("click",async()=>{
-  await checkId(document.getElementById("idInput").value.trim(),false,false);
-});
-document.getElementById("btnForce").addEventListener("click",async()=>{
-  await checkId(document.getElementById("idInput").value.trim(),true,false);
-});
-document.getElementById("btnRandom").addEventListener("click",async()=>{
-  const id=makeId(randomInRange());
-  document.getElementById("idInput").value=id;
-  await checkId(id,false,false);
-});
-
-document.getElementById("btnAutoToggle").addEventListener("click", async()=>{
-  if(autoRunning){
-    stopAuto();
-    return;
-  }
-  await runAuto();
-});
-
-const batchSel = document.getElementById("batchSize");
-if(batchSel){
-  batchSel.value = String(AUTO_BATCH_SIZE);
-  batchSel.addEventListener("change", ()=>{
-    const v = parseInt(batchSel.value, 10);
-    if(Number.isFinite(v) && v > 0){
-      AUTO_BATCH_SIZE = v;
-      localStorage.setItem("autoBatchSize", String(v));
-      updateAutoPill();
-    }
-  });
-}
-
-const pageSel = document.getElementById("pageSize");
-if(pageSel){
-  pageSel.value = String(PAGE_SIZE);
-  pageSel.addEventListener("change", ()=>{
-    const v = parseInt(pageSel.value, 10);
-    if(Number.isFinite(v) && v > 0){
-      const firstIdx = currentPage * PAGE_SIZE;
-      PAGE_SIZE = v;
-      localStorage.setItem("pageSize", String(v));
-      const newPage = Math.floor(firstIdx / PAGE_SIZE);
-      setPage(newPage);
-    }
-  });
-}
-
-document.getElementById("btnPrevPage").addEventListener("click", ()=>{
-  setPage(currentPage - 1);
-});
-document.getElementById("btnNextPage").addEventListener("click", ()=>{
-  setPage(currentPage + 1);
-});
-document.getElementById("btnJump").addEventListener("click", ()=>{
-  jumpToId(document.getElementById("jumpTo").value.trim());
-});
-document.getElementById("jumpTo").addEventListener("keydown", (e)=>{
-  if(e.key === "Enter"){
-    jumpToId(document.getElementById("jumpTo").value.trim());
-  }
-});
-
-document.getElementById("btnGenerate").addEventListener("click", async()=>{
-  if(autoRunning){
-    alert("Sustabdyk Auto prieš keičiant intervalą.");
-    return;
-  }
-
-  setControlsDisabled(true, true);
-
-  const s = document.getElementById("rangeStart").value;
-  const e = document.getElementById("rangeEnd").value;
-
-  document.getElementById("filter").value = "";
-  showOnlyBad = false;
-
-  const ok = await setRangeOnServer(s, e);
-  if(!ok){
-    setControlsDisabled(false, true);
-    return;
-  }
-
-  await reloadEverything();
-});
-
-document.getElementById("filter").addEventListener("input",applyFilter);
-document.getElementById("btnClearFilter").addEventListener("click",()=>{
-  document.getElementById("filter").value="";
-  showOnlyBad=false;
-  applyFilter();
-});
-document.getElementById("btnShowOnlyBad").addEventListener("click",()=>{
-  showOnlyBad=true;
-  applyFilter();
-});
-document.getElementById("btnShowAll").addEventListener("click",()=>{
-  showOnlyBad=false;
-  applyFilter();
-});
-
-document.getElementById("btnDebugParse").addEventListener("click", async()=>{
-  const html=document.getElementById("debugHtml").value;
-  const final_url=document.getElementById("debugUrl").value.trim();
-  const out=document.getElementById("debugOut");
-  out.textContent="Skaičiuoju…";
-  const resp=await fetch("/api/debug/parse",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({html,final_url})});
-  const data=await resp.json();
-  out.innerHTML=`
-    <div><b>Status:</b> <span class="mono">${safeText(data.status)}</span></div>
-    <div><b>Įdėtas:</b> <span class="mono">${safeText(data.inserted_date||"")}</span></div>
-    <div><b>Miestas:</b> ${safeText(data.city||"")}</div>
-    <div><b>Rajonas:</b> ${safeText(data.district||"")}</div>
-    <div><b>Sugiharos:</b> ${data.sugiharos_found?"TAIP":"NE"}</div>
-    <div style="margin-top:6px;"><b>Snippet:</b><div class="note">${data.sugiharos_snippet_html||""}</div></div>`;
-});
-
-// init
-applyFilter();
-updateAutoPill();
-setAutoButtonUi();
-updatePagePill();
-updateSpeedUi();
-
-statePromise = reloadEverything();
-</script>
-</body>
-</html>
-"""
-
-@app.get("/")
-def index():
-    html_page = (
-        INDEX_HTML
-        .replace("__START__", str(START_NUM))
-        .replace("__END__", str(END_NUM))
-        .replace("__STEP__", str(STEP))
-        .replace("__UA__", html.escape(USER_AGENT))
-        .replace("__MIN__", str(MIN_INTERVAL_SECONDS))
-        .replace("__CONC__", str(TARGET_CONCURRENCY))
-    )
-    return Response(html_page, mimetype="text/html; charset=utf-8")
-
-
-@app.get("/api/state")
-def api_state():
-    items_mode = (request.args.get("items") or "all").strip().lower()
-    if items_mode not in ("all", "found", "bad", "none"):
-        items_mode = "all"
-
-    include_ids = (request.args.get("include_ids", "1") != "0")
-
-    try:
-        offset = int(request.args.get("offset", "0"))
-    except Exception:
-        offset = 0
-    try:
-        limit = int(request.args.get("limit", "0"))
-    except Exception:
-        limit = 0
-    if offset < 0:
-        offset = 0
-    if limit < 0:
-        limit = 0
-
-    with CACHE_LOCK:
-        stats = get_cached_stats_for_current_range_locked()
-
-        items = get_cached_items_for_current_range_locked(items_mode)
-        if offset:
-            items = items[offset:]
-        if limit:
-            items = items[:limit]
-
-        cfg = {
-            "min_interval": MIN_INTERVAL_SECONDS,
-            "allowed_rates": ALLOWED_RATE_LIMITS,
-            "state_file": str(STATE_FILE),
-            "max_range_items": MAX_RANGE_ITEMS,
-            "max_batch_ids": MAX_BATCH_IDS,
-            "max_cache_batch_ids": MAX_CACHE_BATCH_IDS,
-            "target_concurrency": TARGET_CONCURRENCY,
-            "jitter_seconds": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
-            "raw_cache_max_items": RAW_CACHE_MAX_ITEMS,
-            "raw_cache_max_bytes": RAW_CACHE_MAX_BYTES,
-            "state_save_min_interval_seconds": STATE_SAVE_MIN_INTERVAL_SECONDS,
-            "state_save_every_n": STATE_SAVE_EVERY_N,
-        }
-        rng = {
-            "start": START_NUM,
-            "end": END_NUM,
-            "step": STEP,
-            "count": range_count(START_NUM, END_NUM, STEP),
-        }
-
-        payload = {"config": cfg, "range": rng, "stats": stats, "items": items}
-        if include_ids:
-            payload["checked_ids"] = get_cached_ids_for_current_range_locked()
-
-    return jsonify(payload)
-
-
-@app.post("/api/cache_batch")
-def api_cache_batch():
-    """Gražina tik CACHE įrašus (be fetch į tikslą)."""
-    payload = request.get_json(silent=True) or {}
-    ids = payload.get("ids", None)
-
-    if not isinstance(ids, list) or not ids:
-        return jsonify({"error": "ids turi būti sąrašas (pvz. {ids:[\"1-3000000\", ...]})."}), 400
-    if len(ids) > MAX_CACHE_BATCH_IDS:
-        return jsonify({"error": f"Per didelis cache batch: {len(ids)}. Max: {MAX_CACHE_BATCH_IDS}."}), 400
-
-    norm_ids: list[str] = []
-    try:
-        for x in ids:
-            id_str = normalize_id(str(x))
-            norm_ids.append(id_str)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
-
-    with CACHE_LOCK:
-        out = []
-        for id_str in norm_ids:
-            entry = CACHE.get(id_str)
-            if isinstance(entry, dict):
-                d = dict(entry)
-                d["from_cache"] = True
-                out.append(d)
-
-    return jsonify({"items": out, "count": len(out)})
-
-
-@app.get("/api/config")
-def api_config_get():
-    return jsonify({
-        "min_interval": MIN_INTERVAL_SECONDS,
-        "allowed_rates": ALLOWED_RATE_LIMITS,
-        "jitter_seconds": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
-        "target_concurrency": TARGET_CONCURRENCY,
-    })
-
-
-@app.post("/api/config")
-def api_config_set():
-    global MIN_INTERVAL_SECONDS
-    payload = request.get_json(silent=True) or {}
-    val = payload.get("min_interval", None)
-    try:
-        f = float(val)
-    except Exception:
-        return jsonify({"error": "min_interval turi būti skaičius (0.02 / 0.05 / 0.1 / 0.2 / 0.5 / 1 / 2)."}), 400
-
-    if not is_allowed_rate(f):
-        return jsonify({"error": f"Leidžiamos reikšmės: {ALLOWED_RATE_LIMITS}"}), 400
-
-    MIN_INTERVAL_SECONDS = snap_rate(f)
-    recompute_jitter()
-
-    with CACHE_LOCK:
-        mark_state_dirty_locked(force=True)
-
-    return jsonify({
-        "min_interval": MIN_INTERVAL_SECONDS,
-        "jitter_seconds": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
-        "target_concurrency": TARGET_CONCURRENCY,
-    })
-
-
-@app.get("/api/range")
-def api_range_get():
-    return jsonify({
-        "range": {
-            "start": START_NUM,
-            "end": END_NUM,
-            "step": STEP,
-            "count": range_count(START_NUM, END_NUM, STEP),
-        }
-    })
-
-
-@app.post("/api/range")
-def api_range_set():
-    global START_NUM, END_NUM, STEP
-
-    payload = request.get_json(silent=True) or {}
-
-    try:
-        start = parse_range_value(payload.get("start", None))
-        end = parse_range_value(payload.get("end", None))
-        step_raw = payload.get("step", STEP)
-        step = int(step_raw)
-        start, end, step = normalize_range(start, end, step)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
-
-    START_NUM, END_NUM, STEP = start, end, step
-
-    with CACHE_LOCK:
-        mark_state_dirty_locked(force=True)
-
-    return jsonify({
-        "range": {
-            "start": START_NUM,
-            "end": END_NUM,
-            "step": STEP,
-            "count": range_count(START_NUM, END_NUM, STEP),
-        }
-    })
-
-
-@app.get("/api/check")
-def api_check():
-    id_like = request.args.get("id", "")
-    force = request.args.get("force", "0") == "1"
-
-    try:
-        id_str = normalize_id(id_like)
-        n = id_num(id_str)
-        if not in_range(n):
-            return jsonify({"error": "ID ne intervale", "id": id_str}), 400
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
-
-    with CACHE_LOCK:
-        if not force and id_str in CACHE:
-            d = dict(CACHE[id_str])
-            d["from_cache"] = True
-            return jsonify(d)
-
-    try:
-        out, raw_html = fetch_and_parse(id_str)
-        with CACHE_LOCK:
-            CACHE[id_str] = out
-            _raw_cache_put_locked(id_str, raw_html)
-            mark_state_dirty_locked(force=False)
-
-        d = dict(out)
-        d["from_cache"] = False
-        return jsonify(d)
-    except Exception as e:
-        err = {
-            "id": id_str,
-            "checked_at": now_iso(),
-            "status": "ERROR",
-            "error": str(e),
-            "http_status": None,
-            "inserted_date": None,
-            "city": None,
-            "district": None,
-            "final_url": None,
-            "sugiharos_found": False,
-            "sugiharos_snippet_html": None,
-        }
-        with CACHE_LOCK:
-            CACHE[id_str] = err
-            mark_state_dirty_locked(force=False)
-
-        d = dict(err)
-        d["from_cache"] = False
-        return jsonify(d), 200
-
-
-@app.post("/api/check_batch")
-def api_check_batch():
-    payload = request.get_json(silent=True) or {}
-    ids = payload.get("ids", None)
-    force = str(payload.get("force", "0")).lower() in ("1", "true", "yes", "y")
-    stop_on_error = str(payload.get("stop_on_error", "0")).lower() in ("1", "true", "yes", "y")
-
-    if not isinstance(ids, list) or not ids:
-        return jsonify({"error": "ids turi būti sąrašas (pvz. {ids:[\"1-3000000\", ...]})."}), 400
-
-    if len(ids) > MAX_BATCH_IDS:
-        return jsonify({"error": f"Per didelis batch: {len(ids)}. Max: {MAX_BATCH_IDS}."}), 400
-
-    norm_ids: list[str] = []
-    try:
-        for x in ids:
-            id_str = normalize_id(str(x))
-            n = id_num(id_str)
-            if not in_range(n):
-                raise ValueError(f"ID ne intervale: {id_str}")
-            norm_ids.append(id_str)
-    except Exception as e:
-        return jsonify({"error": str(e)}), 400
-
-    results: list[dict] = []
-    dirty = False
-    stopped_early = False
-
-    # pipeline su iki TARGET_CONCURRENCY lygiagrečių fetch'ų
-    futures: dict[int, object] = {}
-    next_to_submit = 0
-
-    def submit_until_full():
-        nonlocal next_to_submit
-        while next_to_submit < len(norm_ids) and len(futures) < TARGET_CONCURRENCY:
-            id_str2 = norm_ids[next_to_submit]
-
-            if not force:
-                with CACHE_LOCK:
-                    cached2 = CACHE.get(id_str2)
-                if cached2 is not None:
-                    next_to_submit += 1
-                    continue
-
-            futures[next_to_submit] = EXECUTOR.submit(fetch_and_parse, id_str2)
-            next_to_submit += 1
-
-    submit_until_full()
-
-    for i, id_str in enumerate(norm_ids):
-        if not force:
-            with CACHE_LOCK:
-                cached = CACHE.get(id_str)
-            if cached is not None:
-                d = dict(cached)
-                d["from_cache"] = True
-                results.append(d)
-                submit_until_full()
-                continue
-
-        fut = futures.pop(i, None)
-        if fut is None:
-            fut = EXECUTOR.submit(fetch_and_parse, id_str)
-
-        try:
-            out, raw_html = fut.result()
-            with CACHE_LOCK:
-                CACHE[id_str] = out
-                _raw_cache_put_locked(id_str, raw_html)
-            dirty = True
-
-            d = dict(out)
-            d["from_cache"] = False
-            results.append(d)
-
-        except Exception as e:
-            err = {
-                "id": id_str,
-                "checked_at": now_iso(),
-                "status": "ERROR",
-                "error": str(e),
-                "http_status": None,
-                "inserted_date": None,
-                "city": None,
-                "district": None,
-                "final_url": None,
-                "sugiharos_found": False,
-                "sugiharos_snippet_html": None,
-            }
-            with CACHE_LOCK:
-                CACHE[id_str] = err
-            dirty = True
-
-            d = dict(err)
-            d["from_cache"] = False
-            results.append(d)
-
-            if stop_on_error:
-                stopped_early = True
-                for f in futures.values():
-                    try:
-                        f.cancel()
-                    except Exception:
-                        pass
-                futures.clear()
-                break
-
-        submit_until_full()
-
-    if dirty:
-        with CACHE_LOCK:
-            mark_state_dirty_locked(force=False)
-
-    return jsonify({
-        "items": results,
-        "count": len(results),
-        "stopped_early": bool(stopped_early),
-    })
-
-
-@app.get("/raw")
-def raw():
-    id_like = request.args.get("id", "")
-    try:
-        id_str = normalize_id(id_like)
-    except Exception as e:
-        return Response(str(e), mimetype="text/plain; charset=utf-8"), 400
-
-    with CACHE_LOCK:
-        raw_html = RAW_CACHE.get(id_str)
-
-    if raw_html is None:
-        return Response(
-            "Nėra raw HTML (pirma paspausk 'Tikrinti'. Po serverio restarto raw neišsaugomas.)",
-            mimetype="text/plain; charset=utf-8"
-        ), 404
-
-    return Response(raw_html, mimetype="text/plain; charset=utf-8")
-
-
-@app.post("/api/debug/parse")
-def api_debug_parse():
-    payload = request.get_json(silent=True) or {}
-    html_text = payload.get("html", "") or ""
-    final_url = payload.get("final_url", "") or ""
-    parsed = parse_html(html_text, final_url=final_url, http_status=None)
-    return jsonify(parsed)
-
-
-if __name__ == "__main__":
-    host = os.getenv("HOST", "127.0.0.1")
-    port = int(os.getenv("PORT", "5000"))
-    app.run(host=host, port=port, debug=False)
-
-
+# -*- coding: utf-8 -*-
+"""
+Šis įrankis skirtas tik testavimui / asmeniniams eksperimentams.
+NENAUDOKITE PRODUKCINĖJE APLINKOJE.
+
+Prieš naudodami įsivertinkite:
+- ar turite teisę / leidimą tikrinti trečiųjų šalių puslapius tokiu būdu,
+- ar nepažeidžiate taisyklių,
+- ar neapkraunate serverių.
+
+OPTIMIZACIJOS (2026):
+- „Visi ID“ lentelė rodoma puslapiais (nebekuriama 50k+ DOM eilučių).
+- Batch dydžiai UI papildyti (100..1000) + serverio MAX_BATCH_IDS default=1000.
+- RAW_CACHE apribotas (LRU) – kad serveris nepradėtų valgyti RAM; saugomas zlib suspaustas, su baitų biudžetu;
+  raw HTML dar ir diske (segmentų archyvas, vienodi body'ai – vieną kartą), tad /raw veikia po restarto.
+- Persistencijos (state) išsaugojimas į diską „throttle“ (nebepersistinama po kiekvieno ID).
+- Pridėtas /api/cache_batch: UI puslapio statusus užkrauna iš cache be fetch į tikslą.
+- PRIDĖTA: greičio rodymas (kiek realių fetch'ų per minutę) UI.
+- PRIDĖTA: iki 3 lygiagrečių užklausų į tikslinę svetainę (ThreadPoolExecutor + semaphore).
+- PRIDĖTA: serverio job'as (/api/job/*) – visas intervalas tikrinamas fone, be naršyklės.
+- Persistencija: append-only journal (vienas įrašas per rezultatą) + foninė kompaktacija į snapshot'ą.
+- Pasirinktinai (STATE_BACKEND=sqlite): rezultatai SQLite (WAL) DB su indeksais, RAM'e tik karštas rinkinys.
+- FOUND puslapių parse'as be pilno BeautifulSoup medžio (PARSE_MODE=fast), soup – tik atsarginis.
+- Dideli puslapiai parse'inami procesų pool'e (PARSE_WORKERS), kad GIL'as nestabdytų fetch / Flask thread'ų.
+- Streaming fetch (FETCH_STREAM): NOT_FOUND / CHALLENGE atpažįstami iš pirmų KB, likusi dalis nesiunčiama.
+- force pertikrinimai sąlyginiai (ETag / Last-Modified / turinio hash'as): nepasikeitęs puslapis neparse'inamas.
+- /api/reparse: pakeitus parse taisykles (PARSER_VERSION) archyvuoti puslapiai perparse'inami
+  procesų pool'e, be užklausų į tikslą.
+- Probe režimas (FETCH_PROBE=1): ne Vilniaus skelbimai klasifikuojami iš redirect'o Location, be puslapio.
+- Keli gunicorn worker'iai (WEB_CONCURRENCY > 1): rezultatai / config / range bendroje SQLite DB,
+  rate limiter'is bendras visiems procesams (flock + mmap failas), job'ą vykdo vienas worker'is.
+- Kelios instancijos (job shard=true): intervalas dalinamas blokais per nuomos (lease) koordinatorių
+  (/api/shard/*, SHARD_COORDINATOR); nukritusios instancijos blokas perimamas nuo paskutinio heartbeat'o.
+- /api/frontier: didžiausias gyvas ID randamas galop'u + binarine paieška (kelios dešimtys užklausų),
+  sekamas fone; nauji ID iki ribos tikrinami iš eilės, NOT_FOUND šalia ribos – pertikrinami su backoff'u.
+- Job'as ir Auto tikrina pirma tankiausius ID blokus (JOB_ORDER=density, prioritetų eilė pagal FOUND
+  dalį bloke, atnaujinama po kiekvieno rezultato); padengimas vis tiek pilnas.
+- CACHE RAM'e kompaktiškas (CACHE_LAYOUT=compact): status baitas + masyvai 64K ID puslapiais, ~30 B/ID vietoj ~500 B.
+
+ŠI VERSIJA:
+- TIKRINA VISUS ID IŠ EILĖS (tiek lyginius, tiek nelyginius) -> STEP=1.
+"""
+
+import re
+import random
+import time
+import threading
+import html
+import json
+import os
+import atexit
+import base64
+import codecs
+import hashlib
+import heapq
+import mmap
+import struct
+import zlib
+import sqlite3
+import multiprocessing
+import socket
+from array import array
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import Flask, request, jsonify, Response
+import requests
+from bs4 import BeautifulSoup
+
+try:
+    import fcntl  # flock: bendras rate limiter'is / job'o lyderis keliems worker'iams (Linux)
+except ImportError:
+    fcntl = None
+
+# =========================
+# Konfigūracija (DEFAULT)
+# =========================
+# ProcessPoolExecutor (spawn) vaikai importuoja šį modulį: juose neužkraunam state,
+# neatidarom DB/archyvo ir nepaleidžiam thread'ų – jiems reikia tik parse_html().
+IS_POOL_CHILD = multiprocessing.parent_process() is not None
+
+DEFAULT_START_NUM = 3000000
+DEFAULT_END_NUM = 3000033
+DEFAULT_STEP = 1  # VISI -> STEP=1
+
+START_NUM = DEFAULT_START_NUM
+END_NUM = DEFAULT_END_NUM
+STEP = DEFAULT_STEP
+
+# Apsauga nuo per didelio intervalo (UI gali pasirinkti bet ką)
+MAX_RANGE_ITEMS = int(os.getenv("MAX_RANGE_ITEMS", "500000"))
+
+# Maksimalus batch dydis (kiek ID galima paduoti į /api/check_batch vienu kartu)
+MAX_BATCH_IDS = int(os.getenv("MAX_BATCH_IDS", "1000"))
+
+# Cache batch (be fetch į tikslą)
+MAX_CACHE_BATCH_IDS = int(os.getenv("MAX_CACHE_BATCH_IDS", str(max(2000, MAX_BATCH_IDS))))
+STATUS_MAP_MAX_IDS = int(os.getenv("STATUS_MAP_MAX_IDS", "5000000"))  # /api/status_map: 1 B per ID
+
+# Tikslinės svetainės lygiagretumas (kiek max vienu metu fetch'inti į aruodas.lt)
+TARGET_CONCURRENCY = int(os.getenv("TARGET_CONCURRENCY", "10"))
+if TARGET_CONCURRENCY < 1:
+    TARGET_CONCURRENCY = 1
+if TARGET_CONCURRENCY > 10:
+    TARGET_CONCURRENCY = 10
+
+# Keičiamas rate limit (per UI mygtukus arba bet kokia reikšmė iš MIN_INTERVAL_BOUNDS)
+MIN_INTERVAL_SECONDS = 2.0  # default
+MIN_INTERVAL_BOUNDS = (0.01, 60.0)  # sekundėmis
+
+# Kiek užklausų galima išleisti iš karto po prastovos (token bucket talpa). 1 = griežti tarpai.
+RATE_LIMIT_BURST = max(1, int(os.getenv("RATE_LIMIT_BURST", "1")))
+
+# Jitter: proporcingas + lubos
+JITTER_FRAC = (0.02, 0.15)         # 2%..15% nuo MIN_INTERVAL_SECONDS
+JITTER_CAP_SECONDS = (0.02, 0.15)  # absoliučios lubos sekundėmis
+
+JITTER_SECONDS = (
+    min(JITTER_CAP_SECONDS[0], MIN_INTERVAL_SECONDS * JITTER_FRAC[0]),
+    min(JITTER_CAP_SECONDS[1], MIN_INTERVAL_SECONDS * JITTER_FRAC[1]),
+)
+
+ALLOWED_RATE_LIMITS = [0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0]  # UI mygtukų preset'ai
+
+# Adaptyvus greitis (AIMD): greitinam kol atsakymai švarūs, staigiai lėtinam gavus
+# CHALLENGE / 429 / 5xx / timeout. Įjungiama per UI arba ADAPTIVE_RATE=1.
+ADAPTIVE_RATE = os.getenv("ADAPTIVE_RATE", "0") == "1"
+ADAPTIVE_INTERVAL_BOUNDS = (
+    float(os.getenv("ADAPTIVE_MIN_INTERVAL", "0.05")),  # greičiausias leidžiamas
+    float(os.getenv("ADAPTIVE_MAX_INTERVAL", "30")),    # lėčiausias
+)
+ADAPTIVE_WINDOW = int(os.getenv("ADAPTIVE_WINDOW", "20"))           # švarių atsakymų -> +1 žingsnis
+ADAPTIVE_INCREASE = float(os.getenv("ADAPTIVE_INCREASE", "0.25"))   # +užklausų/s per žingsnį
+ADAPTIVE_DECREASE = float(os.getenv("ADAPTIVE_DECREASE", "0.5"))    # rate *= ... gavus blogą signalą
+
+# Circuit breaker: tiek blogų atsakymų iš eilės -> OPEN (pauzė), po to HALF_OPEN bandymai.
+CB_FAILURE_THRESHOLD = int(os.getenv("CB_FAILURE_THRESHOLD", "5"))
+CB_COOLDOWN_SECONDS = (
+    float(os.getenv("CB_COOLDOWN_MIN", "30")),
+    float(os.getenv("CB_COOLDOWN_MAX", "600")),
+)
+CB_PROBE_SUCCESSES = int(os.getenv("CB_PROBE_SUCCESSES", "3"))
+
+# Tikslinė svetainė (benchmark'ui galima nukreipti į lokalų stub serverį)
+TARGET_BASE_URL = (os.getenv("TARGET_BASE_URL") or "https://www.aruodas.lt").rstrip("/")
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/121.0.0.0 Safari/537.36"
+)
+
+# Persistencijos failas:
+DEFAULT_STATE_FILE = Path(__file__).with_name("aruodas_state.json")
+STATE_FILE_ENV = (os.getenv("STATE_FILE") or "").strip()
+STATE_DIR_ENV = (os.getenv("STATE_DIR") or "").strip()
+
+if STATE_FILE_ENV:
+    STATE_FILE = Path(STATE_FILE_ENV)
+elif STATE_DIR_ENV:
+    STATE_FILE = Path(STATE_DIR_ENV) / "aruodas_state.json"
+else:
+    STATE_FILE = DEFAULT_STATE_FILE
+
+# Append-only journal: po vieną kompaktišką įrašą kiekvienam rezultatui.
+# Snapshot'as (STATE_FILE) perrašomas tik fone per kompaktaciją.
+JOURNAL_FILE = STATE_FILE.with_suffix(".journal")
+JOURNAL_OLD_FILE = STATE_FILE.with_suffix(".journal.old")
+
+# Keli gunicorn worker'iai (WEB_CONCURRENCY > 1 arba SHARED_STATE=1): rezultatai, config ir range –
+# bendroje SQLite DB, rate limiter'is – bendras failas po flock'u, job'ą vykdo vienas worker'is (lyderis).
+WEB_WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+SHARED_STATE = (os.getenv("SHARED_STATE") or ("1" if WEB_WORKERS > 1 else "0")) == "1" and not IS_POOL_CHILD
+if SHARED_STATE and fcntl is None:
+    raise RuntimeError("SHARED_STATE / WEB_CONCURRENCY > 1 reikalauja fcntl (Linux).")
+RATE_LIMIT_FILE = Path(os.getenv("RATE_LIMIT_FILE") or STATE_FILE.with_suffix(".ratelimit"))
+SHARED_SYNC_SECONDS = float(os.getenv("SHARED_SYNC_SECONDS", "0.5"))  # kiti worker'iai pakeitimus pamato per tiek
+SHARED_CMD_TIMEOUT_SECONDS = float(os.getenv("SHARED_CMD_TIMEOUT_SECONDS", "5"))
+
+# Meta dalys (be CACHE), saugomos journal'e / snapshot'e / SQLite meta('state').
+STATE_META_PARTS = ("config", "range", "job", "frontier")
+
+# Persistencijos optimizacija: fsync + meta (config/range/job) ne po kiekvieno ID.
+STATE_SAVE_MIN_INTERVAL_SECONDS = float(os.getenv("STATE_SAVE_MIN_INTERVAL_SECONDS", "5"))
+STATE_SAVE_EVERY_N = int(os.getenv("STATE_SAVE_EVERY_N", "50"))
+_last_state_save_mono = 0.0
+_dirty_since_save = 0
+
+# Kompaktacija: kai journal'e bent tiek įrašų, kiek CACHE (ir >= MIN), arba kas INTERVAL.
+JOURNAL_COMPACT_MIN_RECORDS = int(os.getenv("JOURNAL_COMPACT_MIN_RECORDS", "20000"))
+STATE_COMPACT_INTERVAL_SECONDS = float(os.getenv("STATE_COMPACT_INTERVAL_SECONDS", "600"))
+_journal_fh = None
+_journal_records = 0
+_last_compaction_mono = 0.0
+
+# Persister thread'as: group commit (N įrašų arba MS), fsync politika: always / interval / never.
+PERSIST_GROUP_COMMIT_N = max(1, int(os.getenv("PERSIST_GROUP_COMMIT_N", "64")))
+PERSIST_GROUP_COMMIT_SECONDS = float(os.getenv("PERSIST_GROUP_COMMIT_MS", "200")) / 1000.0
+PERSIST_FSYNC = (os.getenv("PERSIST_FSYNC") or "interval").strip().lower()
+if PERSIST_FSYNC not in ("always", "interval", "never"):
+    PERSIST_FSYNC = "interval"
+PERSIST_FSYNC_INTERVAL_SECONDS = float(os.getenv("PERSIST_FSYNC_INTERVAL_SECONDS", str(STATE_SAVE_MIN_INTERVAL_SECONDS)))
+# Neįrašyta grupė grąžinama į eilės priekį ir kartojama po backoff'o (min, max; dvigubinama).
+PERSIST_RETRY_SECONDS = (
+    float(os.getenv("PERSIST_RETRY_MIN", "0.5")),
+    float(os.getenv("PERSIST_RETRY_MAX", "30")),
+)
+
+_persist_cond = threading.Condition()
+_persist_pending: list = []
+_persist_oldest_mono = 0.0
+_persist_urgent = False
+_persist_flush_requested = 0  # persist_flush() užklausų numeris
+_persist_flush_done = 0       # iki kurio numerio įrašyta + fsync
+PERSIST_METRICS = {
+    "commits": 0,
+    "records_written": 0,
+    "bytes_written": 0,
+    "last_batch_records": 0,
+    "last_commit_ms": 0.0,
+    "max_commit_ms": 0.0,
+    "last_lag_ms": 0.0,
+    "max_lag_ms": 0.0,
+    "fsyncs": 0,
+    "last_fsync_ms": 0.0,
+    "compactions": 0,
+    "last_compaction_ms": 0.0,
+    "last_snapshot_copy_ms": 0.0,
+    "last_compaction_at": None,
+    "errors": 0,
+    "retries": 0,
+    "last_error": None,
+    "last_error_at": None,
+    "journal_skipped": 0,  # sugadintos journal'o eilutės vidury failo (praleistos replay metu)
+}
+
+# =========================
+# HTTP / concurrency
+# =========================
+class RateLimiter:
+    """Token bucket (GCRA): kiekvienam fetch'ui paskiria būsimą siuntimo laiką (slot).
+
+    Lock'as laikomas tik slot'ui apskaičiuoti – laukiama per Condition.wait (be lock'o),
+    todėl lygiagretūs worker'iai nebestovi eilėje vienas už kito sleep'ų, o vidutinis
+    tempas lygiai 1/interval (jitter tik pavėlina konkretų siuntimą, slot'ų nestumia).
+    Pakeitus intervalą, dar nesulaukti slot'ai perskaičiuojami nauju tempu.
+    """
+
+    def __init__(self, interval: float, burst: int = 1):
+        self._cond = threading.Condition()
+        self._interval = float(interval)
+        self._burst = max(1, int(burst))
+        self._tat = 0.0  # "theoretical arrival time" (monotonic)
+        self._last_sent = 0.0
+        self._gen = 0
+        self._slots: deque = deque()  # paskutinės minutės išsiuntimai (statistikai)
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def set_interval(self, interval: float):
+        interval = float(interval)
+        with self._cond:
+            if abs(interval - self._interval) < 1e-9:
+                return
+            self._interval = interval
+            self._tat = max(time.monotonic(), self._last_sent + interval)
+            self._gen += 1
+            self._cond.notify_all()
+
+    def _reserve_locked(self, now: float) -> float:
+        tau = (self._burst - 1) * self._interval
+        tat = max(self._tat, now)
+        slot = max(now, tat - tau)
+        self._tat = tat + self._interval
+        return slot
+
+    def acquire(self, jitter: tuple[float, float] = (0.0, 0.0)):
+        with self._cond:
+            gen = self._gen
+            slot = self._reserve_locked(time.monotonic())
+            waited = False
+            while True:
+                now = time.monotonic()
+                if now >= slot:
+                    break
+                waited = True
+                self._cond.wait(slot - now)
+                if self._gen != gen:
+                    gen = self._gen
+                    slot = self._reserve_locked(time.monotonic())
+
+            self._last_sent = max(self._last_sent, slot)
+            self._slots.append(now)
+            while self._slots and self._slots[0] < now - 60.0:
+                self._slots.popleft()
+
+        if waited and jitter[1] > 0:
+            time.sleep(random.uniform(*jitter))
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            last_min = sum(1 for t in self._slots if t >= now - 60.0)
+            return {
+                "interval": self._interval,
+                "rate_per_sec": (1.0 / self._interval) if self._interval > 0 else None,
+                "burst": self._burst,
+                "queued_ahead_seconds": max(0.0, self._tat - now),
+                "sent_last_minute": last_min,
+            }
+
+
+class FileLock:
+    """fcntl.flock ant failo – tarp procesų (gunicorn worker'ių).
+
+    flock'as priklauso atidarytam failui, ne thread'ui, todėl to paties proceso
+    thread'us papildomai serializuoja threading.Lock.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._tlock = threading.Lock()
+        self.held = False
+
+    def acquire(self, blocking: bool = True, shared: bool = False) -> bool:
+        if not self._tlock.acquire(blocking):
+            return False
+        try:
+            fcntl.flock(self.fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            self._tlock.release()
+            return False
+        self.held = True
+        return True
+
+    def release(self):
+        self.held = False
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self._tlock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SharedRateLimiter:
+    """RateLimiter'io GCRA keliems procesams: būsena (tat, intervalas, minutės skaitliukai)
+    mmap'intame faile, slot'as rezervuojamas po flock'u – visi worker'iai kartu ne greičiau nei 1/interval.
+
+    Laikas – time.time() (bendras procesams ir išlieka per restart'ą, skirtingai nei monotonic).
+    Kito proceso set_interval laukiantys pastebi per POLL_SECONDS (Condition tarp procesų nėra).
+    """
+
+    MAGIC = b"RL01"
+    _HDR = struct.Struct("<4sIddd")  # magic, gen, interval, tat, last_sent
+    _SLOT = struct.Struct("<II")     # sekundė, išsiųsta per ją
+    SLOTS = 60
+    POLL_SECONDS = 0.25
+
+    def __init__(self, path: Path, interval: float, burst: int = 1):
+        self.path = Path(path)
+        self._burst = max(1, int(burst))
+        self._flock = FileLock(self.path)
+        size = self._HDR.size + self.SLOTS * self._SLOT.size
+        with self._flock:
+            if os.fstat(self._flock.fd).st_size < size:
+                os.ftruncate(self._flock.fd, size)
+            self._mm = mmap.mmap(self._flock.fd, size)
+            magic, _, _, tat, _ = self._HDR.unpack_from(self._mm, 0)
+            if magic != self.MAGIC or tat > time.time() + 3600:  # sugadintas / laikrodis atšoko
+                self._mm[:] = bytes(size)
+                self._HDR.pack_into(self._mm, 0, self.MAGIC, 0, float(interval), 0.0, 0.0)
+
+    def _read(self) -> tuple[int, float, float, float]:
+        return self._HDR.unpack_from(self._mm, 0)[1:]
+
+    def _write(self, gen: int, interval: float, tat: float, last_sent: float):
+        self._HDR.pack_into(self._mm, 0, self.MAGIC, gen, interval, tat, last_sent)
+
+    @property
+    def interval(self) -> float:
+        return self._read()[1]
+
+    def set_interval(self, interval: float):
+        interval = float(interval)
+        with self._flock:
+            gen, old, _, last_sent = self._read()
+            if abs(interval - old) < 1e-9:
+                return
+            self._write(gen + 1, interval, max(time.time(), last_sent + interval), last_sent)
+
+    def _reserve(self) -> tuple[int, float]:
+        with self._flock:
+            gen, interval, tat, last_sent = self._read()
+            now = time.time()
+            tat = max(tat, now)
+            slot = max(now, tat - (self._burst - 1) * interval)
+            self._write(gen, interval, tat + interval, last_sent)
+        return gen, slot
+
+    def acquire(self, jitter: tuple[float, float] = (0.0, 0.0)):
+        gen, slot = self._reserve()
+        waited = False
+        while True:
+            now = time.time()
+            if now >= slot:
+                break
+            waited = True
+            time.sleep(min(slot - now, self.POLL_SECONDS))
+            if self._read()[0] != gen:
+                gen, slot = self._reserve()
+
+        sec = int(now)
+        with self._flock:
+            g, interval, tat, last_sent = self._read()
+            self._write(g, interval, tat, max(last_sent, slot))
+            off = self._HDR.size + (sec % self.SLOTS) * self._SLOT.size
+            s, cnt = self._SLOT.unpack_from(self._mm, off)
+            self._SLOT.pack_into(self._mm, off, sec, cnt + 1 if s == sec else 1)
+
+        if waited and jitter[1] > 0:
+            time.sleep(random.uniform(*jitter))
+
+    def stats(self) -> dict:
+        with self._flock:
+            _, interval, tat, _ = self._read()
+            slots = [self._SLOT.unpack_from(self._mm, self._HDR.size + i * self._SLOT.size) for i in range(self.SLOTS)]
+        now = time.time()
+        return {
+            "interval": interval,
+            "rate_per_sec": (1.0 / interval) if interval > 0 else None,
+            "burst": self._burst,
+            "queued_ahead_seconds": max(0.0, tat - now),
+            "sent_last_minute": sum(cnt for s, cnt in slots if s > now - self.SLOTS),
+            "shared": str(self.path),
+        }
+
+
+if SHARED_STATE:
+    RATE_LIMITER = SharedRateLimiter(RATE_LIMIT_FILE, MIN_INTERVAL_SECONDS, burst=RATE_LIMIT_BURST)
+else:
+    RATE_LIMITER = RateLimiter(MIN_INTERVAL_SECONDS, burst=RATE_LIMIT_BURST)
+
+
+class AdaptiveSemaphore:
+    """Semaforas su keičiamu limitu (adaptyviam lygiagretumui)."""
+
+    def __init__(self, limit: int):
+        self._cond = threading.Condition()
+        self._limit = max(1, int(limit))
+        self._in_use = 0
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def set_limit(self, limit: int):
+        with self._cond:
+            self._limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_use >= self._limit:
+                self._cond.wait()
+            self._in_use += 1
+
+    def release(self):
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class AdaptiveController:
+    """AIMD greičio/lygiagretumo valdiklis + circuit breaker.
+
+    - švarus langas (ADAPTIVE_WINDOW atsakymų be problemų): rate += ADAPTIVE_INCREASE, conc += 1;
+    - CHALLENGE / 429 / 5xx / timeout: rate *= ADAPTIVE_DECREASE, conc //= 2 (ne dažniau nei kartą per "kartą");
+    - CB_FAILURE_THRESHOLD blogų iš eilės: OPEN (fetch'ai laukia cooldown),
+      tada HALF_OPEN: po vieną bandymą; CB_PROBE_SUCCESSES sėkmių -> CLOSED, nesėkmė -> OPEN su 2x cooldown.
+
+    before_request() grąžina žetoną (breaker'io karta, ar tai bandymas), kurį fetch'as perduoda
+    on_result(): kiekvienas būsenos perjungimas didina kartą, todėl vėluojantys atsakymai iš senesnės
+    kartos tik skaičiuojami counters, bet būsenos nekeičia (ir neatlaisvina HALF_OPEN bandymo vietos).
+    """
+
+    BAD_KINDS = ("challenge", "throttled", "server_error", "timeout")
+
+    def __init__(self, limiter: RateLimiter, sem: AdaptiveSemaphore, max_concurrency: int):
+        self._cond = threading.Condition()
+        self._limiter = limiter
+        self._sem = sem
+        self._max_conc = max(1, int(max_concurrency))
+        self.enabled = False
+        self.state = "CLOSED"
+        self._rate = 1.0 / MIN_INTERVAL_SECONDS
+        self._conc = self._max_conc
+        self._clean = 0
+        self._window_started = time.monotonic()
+        self._consecutive_bad = 0
+        self._last_decrease = 0.0
+        self._cooldown = CB_COOLDOWN_SECONDS[0]
+        self._open_until = 0.0
+        self._probe_ok = 0
+        self._probe_in_flight = False
+        self._gen = 0
+        self.counters = dict.fromkeys(("ok", "error", *self.BAD_KINDS, "stale"), 0)
+        self.last_reason = None
+
+    def set_enabled(self, enabled: bool, base_interval: float):
+        with self._cond:
+            self.enabled = bool(enabled)
+            self.state = "CLOSED"
+            self._gen += 1
+            self._consecutive_bad = 0
+            self._clean = 0
+            self._window_started = time.monotonic()
+            self._cooldown = CB_COOLDOWN_SECONDS[0]
+            self._probe_in_flight = False
+            self._conc = self._max_conc
+            self.last_reason = "įjungta" if self.enabled else None
+            self._cond.notify_all()
+        self.set_base_interval(base_interval)
+
+    def set_base_interval(self, interval: float):
+        """Rankinis min_interval: išjungus – tiesiog limitas, įjungus – naujas starto taškas."""
+        with self._cond:
+            self._rate = 1.0 / float(interval)
+            if self.enabled:
+                self._apply_locked()
+                return
+        self._limiter.set_interval(interval)
+        self._sem.set_limit(self._max_conc)
+
+    def _apply_locked(self):
+        lo, hi = ADAPTIVE_INTERVAL_BOUNDS
+        interval = min(hi, max(lo, 1.0 / self._rate))
+        self._rate = 1.0 / interval
+        self._limiter.set_interval(interval)
+        self._sem.set_limit(1 if self.state == "HALF_OPEN" else self._conc)
+
+    def _trip_locked(self, now: float, reason: str, escalate: bool):
+        if escalate:
+            self._cooldown = min(CB_COOLDOWN_SECONDS[1], self._cooldown * 2)
+        self.state = "OPEN"
+        self._gen += 1
+        self._open_until = now + self._cooldown
+        self._rate *= ADAPTIVE_DECREASE
+        self._conc = 1
+        self._consecutive_bad = 0
+        self._probe_in_flight = False
+        self.last_reason = reason
+        self._cond.notify_all()
+
+    def before_request(self) -> tuple[int, bool]:
+        """Blokuoja, kol circuit OPEN; HALF_OPEN – leidžia tik vieną bandymą vienu metu.
+
+        Grąžina žetoną (karta, bandymas) – jį reikia perduoti on_result().
+        """
+        with self._cond:
+            while self.enabled:
+                if self.state == "OPEN":
+                    left = self._open_until - time.monotonic()
+                    if left > 0:
+                        self._cond.wait(left)
+                        continue
+                    self.state = "HALF_OPEN"
+                    self._gen += 1
+                    self._probe_ok = 0
+                    self.last_reason = "cooldown baigėsi – bandymai"
+                    self._apply_locked()
+                if self.state == "HALF_OPEN":
+                    if self._probe_in_flight:
+                        self._cond.wait(1.0)
+                        continue
+                    self._probe_in_flight = True
+                    return self._gen, True
+                return self._gen, False
+            return self._gen, False
+
+    def on_result(self, kind: str, token: tuple[int, bool]):
+        now = time.monotonic()
+        with self._cond:
+            self.counters[kind] = self.counters.get(kind, 0) + 1
+            if not self.enabled:
+                return
+            gen, probe = token
+            if gen != self._gen:
+                # išsiųsta prieš paskutinį perjungimą (pvz. prieš OPEN) – būsenai nebeaktualu
+                self.counters["stale"] += 1
+                return
+            bad = kind in self.BAD_KINDS
+
+            if self.state == "HALF_OPEN":
+                if not probe:
+                    return
+                self._probe_in_flight = False
+                if bad:
+                    self._trip_locked(now, f"bandymas nepavyko ({kind})", escalate=True)
+                elif kind == "ok":
+                    self._probe_ok += 1
+                    if self._probe_ok >= CB_PROBE_SUCCESSES:
+                        self.state = "CLOSED"
+                        self._gen += 1
+                        self._cooldown = CB_COOLDOWN_SECONDS[0]
+                        self._clean = 0
+                        self._window_started = now
+                        self.last_reason = "bandymai sėkmingi"
+                self._apply_locked()
+                self._cond.notify_all()
+                return
+
+            if bad:
+                self._consecutive_bad += 1
+                self._clean = 0
+                self._window_started = now
+                if self._consecutive_bad >= CB_FAILURE_THRESHOLD:
+                    self._trip_locked(now, f"{self._consecutive_bad} blogi iš eilės ({kind})", escalate=False)
+                else:
+                    # mažinam ne dažniau nei kartą per vieną "kartą" (užklausos, jau išsiųstos senu greičiu)
+                    hold = max(1.0, self._conc / self._rate)
+                    if now - self._last_decrease >= hold:
+                        self._rate *= ADAPTIVE_DECREASE
+                        self._conc = max(1, self._conc // 2)
+                        self._last_decrease = now
+                        self.last_reason = f"lėtinam ({kind})"
+            elif kind == "ok":
+                self._consecutive_bad = 0
+                self._clean += 1
+                if self._clean >= ADAPTIVE_WINDOW:
+                    elapsed = now - self._window_started
+                    achieved = (self._clean / elapsed) if elapsed > 0 else self._rate
+                    # greitinam tik jei tikrai išnaudojam dabartinį greitį (kitaip rate "išsipučia")
+                    if achieved >= 0.8 * self._rate:
+                        self._rate += ADAPTIVE_INCREASE
+                        self.last_reason = "greitinam"
+                    if self._conc < self._max_conc:
+                        self._conc += 1
+                    self._clean = 0
+                    self._window_started = now
+            self._apply_locked()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                "enabled": self.enabled,
+                "state": self.state,
+                "rate_per_sec": round(self._rate, 4),
+                "interval": round(1.0 / self._rate, 4),
+                "interval_bounds": list(ADAPTIVE_INTERVAL_BOUNDS),
+                "concurrency_limit": self._sem.limit,
+                "in_flight": self._sem.in_use,
+                "consecutive_bad": self._consecutive_bad,
+                "cooldown_seconds": self._cooldown,
+                "open_for_seconds": max(0.0, self._open_until - now) if self.state == "OPEN" else 0.0,
+                "counters": dict(self.counters),
+                "last_reason": self.last_reason,
+            }
+
+
+TARGET_SEM = AdaptiveSemaphore(TARGET_CONCURRENCY)
+CONTROLLER = AdaptiveController(RATE_LIMITER, TARGET_SEM, TARGET_CONCURRENCY)
+if ADAPTIVE_RATE:
+    CONTROLLER.set_enabled(True, MIN_INTERVAL_SECONDS)
+EXECUTOR = ThreadPoolExecutor(max_workers=TARGET_CONCURRENCY)
+
+_thread_local = threading.local()
+
+_SESSION_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "lt-LT,lt;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "DNT": "1",
+    "Upgrade-Insecure-Requests": "1",
+}
+
+
+def get_session() -> requests.Session:
+    # requests.Session nėra idealu share'inti tarp thread'ų -> thread-local
+    s = getattr(_thread_local, "session", None)
+    if s is None:
+        s = requests.Session()
+        s.headers.update(_SESSION_HEADERS)
+        _thread_local.session = s
+    return s
+
+
+# =========================
+# Rezultatų saugykla (CACHE)
+# =========================
+# journal – visi rezultatai RAM'e (dict) + append-only journal/snapshot diske;
+# sqlite  – rezultatai SQLite (WAL) faile, RAM'e tik ribotas "karštas" rinkinys.
+STATE_BACKEND = (os.getenv("STATE_BACKEND") or "journal").strip().lower()
+if STATE_BACKEND not in ("journal", "sqlite"):
+    STATE_BACKEND = "journal"
+if SHARED_STATE:
+    STATE_BACKEND = "sqlite"  # journal'as + RAM CACHE – vieno proceso
+STATE_DB_FILE = Path(os.getenv("STATE_DB_FILE") or STATE_FILE.with_suffix(".sqlite3"))
+SQLITE_HOT_ITEMS = int(os.getenv("SQLITE_HOT_ITEMS", "2000"))
+# journal backend'o RAM išdėstymas: compact (masyvai pagal ID numerį) arba dict (kaip anksčiau)
+CACHE_LAYOUT = (os.getenv("CACHE_LAYOUT") or "compact").strip().lower()
+if CACHE_LAYOUT not in ("compact", "dict"):
+    CACHE_LAYOUT = "compact"
+
+
+def _empty_stats() -> dict:
+    return {
+        "checked": 0,
+        "found": 0,
+        "not_found": 0,
+        "challenge": 0,
+        "error": 0,
+        "bad_total": 0,
+    }
+
+
+STATS_KEYS = ("checked", "found", "not_found", "challenge", "error")
+
+
+def _stats_vec(entry: dict) -> tuple:
+    """Įrašo indėlis į STATS_KEYS skaitiklius."""
+    st = (entry or {}).get("status")
+    sug = (entry or {}).get("sugiharos_found") is True
+    return (
+        1,
+        1 if st == "FOUND" or sug else 0,
+        1 if st == "NOT_FOUND" else 0,
+        1 if st == "CHALLENGE" else 0,
+        1 if st == "ERROR" else 0,
+    )
+
+
+def _stats_add(stats: dict, entry: dict, sign: int = 1):
+    for k, v in zip(STATS_KEYS, _stats_vec(entry)):
+        stats[k] += sign * v
+
+
+# /api/status_map kodai: vienas baitas per ID (0 – netikrintas), +8 jei sugiharos_found
+STATUS_MAP_CODES = {"FOUND": 1, "NOT_FOUND": 2, "CHALLENGE": 3, "ERROR": 4}
+STATUS_MAP_OTHER = 5
+STATUS_MAP_SUG = 0x08
+
+
+def _status_code(entry: dict) -> int:
+    st = (entry or {}).get("status")
+    code = STATUS_MAP_CODES.get(st, STATUS_MAP_OTHER)
+    return code | (STATUS_MAP_SUG if (entry or {}).get("sugiharos_found") is True else 0)
+
+
+def _finish_stats(stats: dict) -> dict:
+    stats["bad_total"] = stats["not_found"] + stats["challenge"] + stats["error"]
+    return stats
+
+
+def _entry_matches_mode(entry: dict, mode: str) -> bool:
+    """items filtras: all / found / bad / none."""
+    if mode == "none" or not isinstance(entry, dict):
+        return False
+    st = entry.get("status")
+    if mode == "found":
+        return st == "FOUND" or entry.get("sugiharos_found") is True
+    if mode == "bad":
+        return st in ("ERROR", "CHALLENGE", "NOT_FOUND")
+    return True
+
+
+class RangeStats:
+    """Per-status suvestinės Fenwick medžiuose virš ID blokų (BLOCK numerių bloke).
+
+    add() – O(log m), query(lo, hi) – O(log m) pilniems blokams + store'o
+    edge(lo, hi) skaičiavimas tik dviem kraštiniams (daliniams) blokams.
+    Masyvai auga dvigubinant (tada medžiai perstatomi). CALL ONLY UNDER CACHE_LOCK.
+    """
+
+    BLOCK = 1024
+    CATS = STATS_KEYS
+
+    def __init__(self):
+        self._base = 0   # pirmo bloko numeris
+        self._cap = 0
+        self._blk = [array("q") for _ in self.CATS]   # kiekvieno bloko skaičiai
+        self._tree = [array("q") for _ in self.CATS]  # Fenwick (1-indexed)
+
+    def _rebuild(self, base: int, cap: int):
+        old_base, old_cap = self._base, self._cap
+        shift = old_base - base
+        for c in range(len(self.CATS)):
+            blk = array("q", bytes(8 * cap))
+            if old_cap:
+                blk[shift:shift + old_cap] = self._blk[c]
+            tree = array("q", bytes(8 * (cap + 1)))
+            tree[1:] = blk
+            for i in range(1, cap + 1):
+                j = i + (i & -i)
+                if j <= cap:
+                    tree[j] += tree[i]
+            self._blk[c] = blk
+            self._tree[c] = tree
+        self._base, self._cap = base, cap
+
+    def _ensure(self, b: int):
+        if self._cap and self._base <= b < self._base + self._cap:
+            return
+        if not self._cap:
+            self._rebuild(max(0, b - 32), 64)
+            return
+        lo = min(self._base, b)
+        hi = max(self._base + self._cap, b + 1)
+        cap = max(2 * self._cap, hi - lo)
+        if b < self._base:
+            base = max(0, hi - cap)
+            self._rebuild(base, hi - base)
+        else:
+            self._rebuild(lo, cap)
+
+    def add(self, n: int, vec: tuple, sign: int = 1):
+        b = n // self.BLOCK
+        self._ensure(b)
+        k = b - self._base
+        cap = self._cap
+        for c, v in enumerate(vec):
+            if not v:
+                continue
+            d = sign * v
+            self._blk[c][k] += d
+            tree = self._tree[c]
+            i = k + 1
+            while i <= cap:
+                tree[i] += d
+                i += i & -i
+
+    def move(self, n: int, old_vec, new_vec):
+        if old_vec is not None:
+            self.add(n, old_vec, -1)
+        if new_vec is not None:
+            self.add(n, new_vec, +1)
+
+    def _prefix(self, c: int, k: int) -> int:
+        """Blokų [0, k) suma (k – santykinis)."""
+        tree = self._tree[c]
+        s = 0
+        while k > 0:
+            s += tree[k]
+            k -= k & -k
+        return s
+
+    def _blocks_sum(self, b_lo: int, b_hi: int) -> list:
+        """Pilnų blokų b_lo..b_hi (absoliutūs, imtinai) sumos."""
+        lo = max(b_lo - self._base, 0)
+        hi = min(b_hi - self._base + 1, self._cap)
+        if hi <= lo:
+            return [0] * len(self.CATS)
+        return [self._prefix(c, hi) - self._prefix(c, lo) for c in range(len(self.CATS))]
+
+    def query(self, lo: int, hi: int, edge) -> dict:
+        """Statistika intervalui lo..hi; edge(lo, hi) -> dict – tikslus skaičiavimas mažam intervalui."""
+        if hi < lo:
+            return _finish_stats(_empty_stats())
+        B = self.BLOCK
+        b_lo, b_hi = lo // B, hi // B
+        if b_hi - b_lo < 2:
+            return edge(lo, hi)
+        sums = self._blocks_sum(b_lo + 1, b_hi - 1)
+        stats = dict(zip(self.CATS, sums))
+        for part in (edge(lo, (b_lo + 1) * B - 1), edge(b_hi * B, hi)):
+            for k in self.CATS:
+                stats[k] += part[k]
+        return _finish_stats(stats)
+
+
+class SortedIntIndex:
+    """Surūšiuotas int rinkinys blokais (bisect): add ~O(√n), intervalas O(log n + k).
+
+    Blokai – paprasti list'ai iki 2*BLOCK elementų; _maxes – kiekvieno bloko
+    didžiausia reikšmė (bisect'ui). CALL ONLY UNDER CACHE_LOCK.
+    """
+
+    BLOCK = 1024
+
+    def __init__(self, values=()):
+        vals = sorted(set(values))
+        self._blocks = [vals[i:i + self.BLOCK] for i in range(0, len(vals), self.BLOCK)]
+        self._maxes = [b[-1] for b in self._blocks]
+        self._len = len(vals)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __contains__(self, n) -> bool:
+        k = bisect_left(self._maxes, n)
+        if k == len(self._maxes):
+            return False
+        b = self._blocks[k]
+        i = bisect_left(b, n)
+        return i < len(b) and b[i] == n
+
+    def add(self, n: int) -> bool:
+        """Įdeda n; grąžina True, jei jo dar nebuvo."""
+        if not self._blocks:
+            self._blocks.append([n])
+            self._maxes.append(n)
+            self._len = 1
+            return True
+        k = bisect_left(self._maxes, n)
+        if k == len(self._maxes):
+            k -= 1
+        b = self._blocks[k]
+        i = bisect_left(b, n)
+        if i < len(b) and b[i] == n:
+            return False
+        b.insert(i, n)
+        self._maxes[k] = b[-1]
+        self._len += 1
+        if len(b) > 2 * self.BLOCK:
+            half = self.BLOCK
+            self._blocks[k:k + 1] = [b[:half], b[half:]]
+            self._maxes[k:k + 1] = [b[half - 1], b[-1]]
+        return True
+
+    def irange(self, lo: int, hi: int, skip: int = 0):
+        """Reikšmės lo..hi didėjančia tvarka; skip – kiek pirmųjų praleisti (puslapiavimui)."""
+        blocks = self._blocks
+        k = bisect_left(self._maxes, lo)
+        if k == len(blocks):
+            return
+        i = bisect_left(blocks[k], lo)
+        while skip and k < len(blocks):
+            avail = len(blocks[k]) - i
+            if skip < avail:
+                i += skip
+                skip = 0
+            else:
+                skip -= avail
+                k += 1
+                i = 0
+        while k < len(blocks):
+            b = blocks[k]
+            for j in range(i, len(b)):
+                v = b[j]
+                if v > hi:
+                    return
+                yield v
+            k += 1
+            i = 0
+
+
+def _safe_id_num(id_str) -> int | None:
+    try:
+        return id_num(id_str)
+    except Exception:
+        return None
+
+
+class MemoryResultStore(dict):
+    """Visi rezultatai RAM'e kaip dict'ai: id -> entry (CACHE_LAYOUT=dict).
+
+    Šalia – SortedIntIndex pagal ID numerį, kad intervalo užklausos nevaikščiotų
+    per visą istoriją, ir RangeStats (Fenwick) statistikai.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._index = SortedIntIndex()
+        self._stats = RangeStats()
+        self.version = 0  # didėja su kiekvienu įrašu (ETag'ams)
+        for id_str, entry in self.items():
+            n = _safe_id_num(id_str)
+            if n is not None:
+                self._index.add(n)
+                self._stats.add(n, _stats_vec(entry))
+
+    def __setitem__(self, id_str: str, entry: dict):
+        self.version += 1
+        n = _safe_id_num(id_str)
+        if n is not None:
+            old = dict.get(self, id_str)
+            if old is None:
+                self._index.add(n)
+            self._stats.move(n, None if old is None else _stats_vec(old), _stats_vec(entry))
+        super().__setitem__(id_str, entry)
+
+    def iter_range(self, start: int, end: int, mode: str = "all", offset: int = 0):
+        if mode == "none":
+            return
+        if mode != "all":
+            matching = ((k, e) for k, e in self.iter_range(start, end) if _entry_matches_mode(e, mode))
+            yield from islice(matching, offset, None)
+            return
+        get = dict.get
+        for n in self._index.irange(start, end, skip=offset):
+            id_str = f"1-{n}"
+            entry = get(self, id_str)
+            if entry is not None:
+                yield id_str, entry
+
+    def ids_in_range(self, start: int, end: int, limit: int = 0) -> list[str]:
+        nums = self._index.irange(start, end)
+        return [f"1-{n}" for n in (islice(nums, limit) if limit else nums)]
+
+    def status_codes(self, start: int, end: int) -> bytearray:
+        """/api/status_map: baitas per ID start..end (0 – netikrintas)."""
+        out = bytearray(max(0, end - start + 1))
+        get = dict.get
+        for n in self._index.irange(start, end):
+            out[n - start] = _status_code(get(self, f"1-{n}"))
+        return out
+
+    def _stats_scan(self, start: int, end: int) -> dict:
+        stats = _empty_stats()
+        for _, entry in self.iter_range(start, end):
+            _stats_add(stats, entry)
+        return _finish_stats(stats)
+
+    def stats_range(self, start: int, end: int) -> dict:
+        return self._stats.query(start, end, self._stats_scan)
+
+
+class _ResultRecord:
+    """Retai pasitaikantys laukai (FOUND / ERROR) arba visas nestandartinės formos įrašas (raw)."""
+
+    __slots__ = ("inserted_date", "final_url", "snippet", "error", "raw", "validators")
+
+    def __init__(self, inserted_date=None, final_url=None, snippet=None, error=None, raw=None, validators=None):
+        self.inserted_date = inserted_date
+        self.final_url = final_url
+        self.snippet = snippet
+        self.error = error
+        self.raw = raw
+        self.validators = validators  # (etag, last_modified, hash) – tik FOUND
+
+
+class _InternTable:
+    """Pasikartojančių eilučių lentelė: 0 = None, kiti – indeksas (+1) į values."""
+
+    __slots__ = ("values", "index", "limit")
+
+    def __init__(self, limit: int = 65535):
+        self.values: list[str] = []
+        self.index: dict[str, int] = {}
+        self.limit = limit
+
+    def code(self, s) -> int | None:
+        """Kodas eilutei arba None, jei lentelė pilna."""
+        if s is None:
+            return 0
+        c = self.index.get(s)
+        if c is None:
+            if len(self.values) >= self.limit:
+                return None
+            self.values.append(s)
+            c = len(self.values)
+            self.index[s] = c
+        return c
+
+    def value(self, c: int):
+        return self.values[c - 1] if c else None
+
+
+class _CompactPage:
+    """Vienas CompactResultStore puslapis: lygiagretūs masyvai PAGE_IDS iš eilės einantiems ID."""
+
+    __slots__ = ("st", "ts", "tz", "http", "city", "dist", "url", "pv", "rec")
+
+    def __init__(self, size: int):
+        self.st = bytearray(size)
+        self.ts = array("I", bytes(4 * size))   # checked_at epoch sekundės
+        self.tz = array("b", bytes(size))       # checked_at UTC offset (ketvirčiais valandos)
+        self.http = array("H", bytes(2 * size))
+        self.city = array("H", bytes(2 * size))
+        self.dist = array("H", bytes(2 * size))
+        self.url = array("H", bytes(2 * size))
+        self.pv = array("B", bytes(size))       # parser_version (0 = nėra rakto)
+        self.rec: dict[int, _ResultRecord] = {}
+
+    def arrays(self):
+        return (self.ts, self.tz, self.http, self.city, self.dist, self.url, self.pv)
+
+    def copy(self) -> "_CompactPage":
+        c = _CompactPage.__new__(_CompactPage)
+        c.st = bytearray(self.st)
+        c.ts, c.tz, c.http, c.city, c.dist, c.url, c.pv = (array(a.typecode, a) for a in self.arrays())
+        c.rec = dict(self.rec)
+        return c
+
+    def nbytes(self) -> int:
+        return len(self.st) + sum(len(a) * a.itemsize for a in self.arrays())
+
+
+class CompactResultStore:
+    """Kompaktiškas rezultatų saugojimas RAM'e: 64K ID puslapiai su lygiagrečiais masyvais.
+
+    Puslapis (_CompactPage, ~1 MB) sukuriamas tik įdėjus pirmą jo ID, todėl atmintis
+    priklauso nuo to, kiek puslapių paliesta, o ne nuo min..max ID tarpo.
+
+    Vienam ID: status baitas (kodas + sugiharos/record bitai), checked_at (epoch s + TZ),
+    http_status, interned city/district/final_url, parser_version – ~15 B vietoj ~1 KB dict'o.
+    FOUND/ERROR papildomi laukai – __slots__ įraše; nestandartinės formos įrašai
+    saugomi visi (raw), todėl get() grąžina lygiai tą patį JSON, kas buvo įdėta.
+    CALL ONLY UNDER CACHE_LOCK (kaip ir dict'as).
+    """
+
+    KEYS = frozenset((
+        "id", "checked_at", "http_status", "status", "inserted_date", "city", "district",
+        "final_url", "sugiharos_found", "sugiharos_snippet_html",
+    ))
+    KEYS_ERROR = KEYS | {"error"}
+    KEYS_OPTIONAL = frozenset(("validators", "parser_version"))  # validators – tik FOUND
+    STATUS_CODES = STATUS_MAP_CODES  # status baitas sutampa su /api/status_map kodu (be F_REC)
+    STATUS_NAMES = {v: k for k, v in STATUS_CODES.items()}
+    ST_OTHER = STATUS_MAP_OTHER  # kitas status – tik raw įraše
+    ST_MASK = 0x07
+    F_SUG = STATUS_MAP_SUG  # sugiharos_found
+    F_REC = 0x10      # yra _ResultRecord
+    URL_SELF = 1      # final_url == https://www.aruodas.lt/{id}/
+    URL_BASE = 2      # interned final_url kodai nuo čia
+    PAGE_BITS = 16
+    PAGE_IDS = 1 << PAGE_BITS
+
+    def __init__(self):
+        self._pages: dict[int, _CompactPage] = {}  # id_num >> PAGE_BITS -> puslapis
+        self._cities = _InternTable()
+        self._districts = _InternTable()
+        self._urls = _InternTable(65535 - self.URL_BASE)
+        self._count = 0
+        self._stats = RangeStats()
+        self.version = 0  # didėja su kiekvienu įrašu (ETag'ams)
+
+    # ----- vidus -----
+    def _page(self, n: int, grow: bool = False) -> tuple[_CompactPage | None, int]:
+        """(puslapis, indeksas jame); puslapis None, jei jo nėra (ir grow=False)."""
+        p = n >> self.PAGE_BITS
+        pg = self._pages.get(p)
+        if pg is None and grow:
+            pg = self._pages[p] = _CompactPage(self.PAGE_IDS)
+        return pg, n & (self.PAGE_IDS - 1)
+
+    def _span(self, start: int | None = None, end: int | None = None):
+        """Esami puslapiai, kertantys [start, end], didėjančia tvarka: (pirmas ID, puslapis, lo, hi)."""
+        size = self.PAGE_IDS
+        if start is None:
+            keys = sorted(self._pages)
+            start, end = -(1 << 62), 1 << 62
+        elif end < start:
+            return
+        else:
+            first, last = start >> self.PAGE_BITS, end >> self.PAGE_BITS
+            if last - first < len(self._pages):
+                keys = [p for p in range(first, last + 1) if p in self._pages]
+            else:
+                keys = sorted(p for p in self._pages if first <= p <= last)
+        for p in keys:
+            n0 = p << self.PAGE_BITS
+            yield n0, self._pages[p], max(0, start - n0), min(size, end - n0 + 1)
+
+    @staticmethod
+    def _pack_ts(s):
+        """checked_at -> (epoch, tz ketvirčiai) arba None, jei nepavyksta atkurti identiškai."""
+        if not isinstance(s, str):
+            return None
+        try:
+            dt = datetime.fromisoformat(s)
+            off = dt.utcoffset()
+            if off is None:
+                return None
+            q, rem = divmod(int(off.total_seconds()), 900)
+            epoch = int(dt.timestamp())
+            if rem or not -127 <= q <= 127 or not 0 <= epoch < 2 ** 32:
+                return None
+            packed = (epoch, q)
+            return packed if CompactResultStore._unpack_ts(*packed) == s else None
+        except Exception:
+            return None
+
+    _TZ_CACHE: dict = {}
+
+    @staticmethod
+    def _unpack_ts(epoch: int, q: int) -> str:
+        tz = CompactResultStore._TZ_CACHE.get(q)
+        if tz is None:
+            tz = CompactResultStore._TZ_CACHE[q] = timezone(timedelta(seconds=q * 900))
+        return datetime.fromtimestamp(epoch, tz).isoformat(timespec="seconds")
+
+    def _encode(self, id_str: str, entry: dict):
+        """(status baitas, ts, tz, http, city, dist, url, pv, record) arba None – tada saugom raw."""
+        keys = entry.keys()
+        status = entry.get("status")
+        code = self.STATUS_CODES.get(status)
+        if code is None or entry.get("id") != id_str:
+            return None
+        validators = None
+        pv = 0
+        base = self.KEYS_ERROR if status == "ERROR" else self.KEYS
+        if keys != base:
+            extra = keys - base
+            if len(keys) - len(extra) != len(base) or not extra <= self.KEYS_OPTIONAL:
+                return None
+            if "validators" in extra:
+                v = entry.get("validators")
+                if status != "FOUND" or not isinstance(v, dict) or v.keys() != set(VALIDATOR_KEYS):
+                    return None
+                validators = tuple(v[k] for k in VALIDATOR_KEYS)
+                if not all(x is None or isinstance(x, str) for x in validators):
+                    return None
+            if "parser_version" in extra:
+                pv = entry.get("parser_version")
+                if type(pv) is not int or not 0 < pv < 256:
+                    return None
+        sug = entry.get("sugiharos_found")
+        if not isinstance(sug, bool):
+            return None
+        ts = self._pack_ts(entry.get("checked_at"))
+        http = entry.get("http_status")
+        if ts is None or not (http is None or type(http) is int and 0 < http < 65536):
+            return None
+        city, dist = entry.get("city"), entry.get("district")
+        if not (city is None or isinstance(city, str)) or not (dist is None or isinstance(dist, str)):
+            return None
+        c_city = self._cities.code(city)
+        c_dist = self._districts.code(dist)
+        if c_city is None or c_dist is None:
+            return None
+
+        b = code | (self.F_SUG if sug else 0)
+        url = entry.get("final_url")
+        inserted = entry.get("inserted_date")
+        snippet = entry.get("sugiharos_snippet_html")
+        rec = None
+        c_url = 0
+        if code == 1 or status == "ERROR" or inserted is not None or snippet is not None:
+            # FOUND (unikalus final_url, data, snippet) ir ERROR (klaidos tekstas) – į įrašą
+            rec = _ResultRecord(inserted, url, snippet, entry.get("error"), validators=validators)
+        elif url is not None:
+            if not isinstance(url, str):
+                return None
+            if url == f"https://www.aruodas.lt/{id_str}/":
+                c_url = self.URL_SELF
+            else:
+                c = self._urls.code(url)
+                if c is None:
+                    rec = _ResultRecord(final_url=url)
+                else:
+                    c_url = c + self.URL_BASE - 1
+        if rec is not None:
+            b |= self.F_REC
+        return b, ts[0], ts[1], http or 0, c_city, c_dist, c_url, pv, rec
+
+    def _decode(self, pg: _CompactPage, i: int, n: int) -> dict:
+        b = pg.st[i]
+        rec = pg.rec.get(i) if b & self.F_REC else None
+        if rec is not None and rec.raw is not None:
+            return dict(rec.raw)
+
+        id_str = f"1-{n}"
+        c_url = pg.url[i]
+        if rec is not None:
+            url = rec.final_url
+        elif c_url == self.URL_SELF:
+            url = f"https://www.aruodas.lt/{id_str}/"
+        elif c_url:
+            url = self._urls.value(c_url - self.URL_BASE + 1)
+        else:
+            url = None
+        status = self.STATUS_NAMES[b & self.ST_MASK]
+
+        out = {
+            "id": id_str,
+            "checked_at": self._unpack_ts(pg.ts[i], pg.tz[i]),
+            "http_status": pg.http[i] or None,
+            "status": status,
+        }
+        if status == "ERROR":
+            out["error"] = rec.error
+        out.update({
+            "inserted_date": rec.inserted_date if rec is not None else None,
+            "city": self._cities.value(pg.city[i]),
+            "district": self._districts.value(pg.dist[i]),
+            "final_url": url,
+            "sugiharos_found": bool(b & self.F_SUG),
+            "sugiharos_snippet_html": rec.snippet if rec is not None else None,
+        })
+        if pg.pv[i]:
+            out["parser_version"] = pg.pv[i]
+        if rec is not None and rec.validators is not None:
+            out["validators"] = dict(zip(VALIDATOR_KEYS, rec.validators))
+        return out
+
+    # ----- dict sąsaja -----
+    def __setitem__(self, id_str: str, entry: dict):
+        n = id_num(id_str)
+        pg, i = self._page(n, grow=True)
+        enc = self._encode(id_str, entry) if isinstance(entry, dict) else None
+        if enc is None:
+            code = self.STATUS_CODES.get((entry or {}).get("status"), self.ST_OTHER) if isinstance(entry, dict) else self.ST_OTHER
+            sug = isinstance(entry, dict) and entry.get("sugiharos_found") is True
+            enc = (code | (self.F_SUG if sug else 0) | self.F_REC, 0, 0, 0, 0, 0, 0, 0, _ResultRecord(raw=entry))
+
+        b, ts, tz, http, c_city, c_dist, c_url, pv, rec = enc
+        old = pg.st[i]
+        self.version += 1
+        if not old:
+            self._count += 1
+        if old != b:
+            vecs = self._BYTE_VECS
+            self._stats.move(n, vecs[old] if old else None, vecs[b])
+        pg.st[i] = b
+        pg.ts[i] = ts
+        pg.tz[i] = tz
+        pg.http[i] = http
+        pg.city[i] = c_city
+        pg.dist[i] = c_dist
+        pg.url[i] = c_url
+        pg.pv[i] = pv
+        if rec is not None:
+            pg.rec[i] = rec
+        else:
+            pg.rec.pop(i, None)
+
+    def get(self, id_str: str, default=None):
+        try:
+            n = id_num(id_str)
+        except Exception:
+            return default
+        pg, i = self._page(n)
+        if pg is None or not pg.st[i]:
+            return default
+        return self._decode(pg, i, n)
+
+    def __getitem__(self, id_str: str) -> dict:
+        out = self.get(id_str)
+        if out is None:
+            raise KeyError(id_str)
+        return out
+
+    def __contains__(self, id_str) -> bool:
+        try:
+            pg, i = self._page(id_num(id_str))
+        except Exception:
+            return False
+        return pg is not None and pg.st[i] != 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self):
+        for n, pg, i in self._scan():
+            yield f"1-{n}", self._decode(pg, i, n)
+
+    def copy(self) -> "CompactResultStore":
+        """Momentinė kopija (puslapių memcpy) – kompaktacijai; intern lentelės tik papildomos, todėl bendros."""
+        c = CompactResultStore.__new__(CompactResultStore)
+        c._pages = {p: pg.copy() for p, pg in self._pages.items()}
+        c._cities, c._districts, c._urls = self._cities, self._districts, self._urls
+        c._count = self._count
+        c._stats = None  # kopija tik skaitymui (snapshot'ui)
+        c.version = self.version
+        return c
+
+    # ----- intervalo užklausos -----
+    @classmethod
+    def _mode_table(cls, mode: str) -> bytes:
+        """bytes.translate lentelė: status baitas -> 1, jei tinka mode filtrui."""
+        out = bytearray(256)
+        for b in range(1, 256):
+            code = b & cls.ST_MASK
+            if mode == "found":
+                ok = code == 1 or bool(b & cls.F_SUG)
+            elif mode == "bad":
+                ok = 2 <= code <= 4
+            else:
+                ok = True
+            out[b] = 1 if ok else 0
+        return bytes(out)
+
+    def _scan(self, start: int | None = None, end: int | None = None, mode: str = "all", skip: int = 0):
+        """(id_num, puslapis, indeksas) intervale (find() per translate'intą kaukę – be Python ciklo per tuščius).
+
+        Be start/end – visi įrašai. skip – kiek pirmų tinkamų praleisti: sveiki puslapiai
+        praleidžiami per count().
+        """
+        table = self._MODE_TABLES[mode]
+        for n0, pg, lo, hi in self._span(start, end):
+            mask = pg.st[lo:hi].translate(table)
+            if skip:
+                c = mask.count(1)
+                if c <= skip:
+                    skip -= c
+                    continue
+            pos = mask.find(1)
+            while pos >= 0:
+                if skip:
+                    skip -= 1
+                else:
+                    yield n0 + lo + pos, pg, lo + pos
+                pos = mask.find(1, pos + 1)
+
+    def iter_range(self, start: int, end: int, mode: str = "all", offset: int = 0):
+        if mode == "none":
+            return
+        for n, pg, i in self._scan(start, end, mode if mode in self._MODE_TABLES else "all", skip=offset):
+            yield f"1-{n}", self._decode(pg, i, n)
+
+    def ids_in_range(self, start: int, end: int, limit: int = 0) -> list[str]:
+        slots = self._scan(start, end)
+        return [f"1-{n}" for n, _, _ in (islice(slots, limit) if limit else slots)]
+
+    def status_codes(self, start: int, end: int) -> bytearray:
+        """/api/status_map: status baitai be F_REC (memcpy + translate kiekvienam puslapiui)."""
+        out = bytearray(max(0, end - start + 1))
+        for n0, pg, lo, hi in self._span(start, end):
+            at = n0 + lo - start
+            out[at:at + hi - lo] = pg.st[lo:hi].translate(self._STATUS_MAP_TABLE)
+        return out
+
+    def stats_range(self, start: int, end: int) -> dict:
+        if self._stats is None:
+            return self._stats_scan(start, end)
+        return self._stats.query(start, end, self._stats_scan)
+
+    def _stats_scan(self, start: int, end: int) -> dict:
+        views = [pg.st[lo:hi] for _, pg, lo, hi in self._span(start, end)]
+        stats = _empty_stats()
+        if not views:
+            return _finish_stats(stats)
+        for b in range(1, 32):
+            cnt = sum(v.count(b) for v in views)
+            if not cnt:
+                continue
+            code = b & self.ST_MASK
+            stats["checked"] += cnt
+            if code == 1 or b & self.F_SUG:
+                stats["found"] += cnt
+            if code == 2:
+                stats["not_found"] += cnt
+            elif code == 3:
+                stats["challenge"] += cnt
+            elif code == 4:
+                stats["error"] += cnt
+        stats["bad_total"] = stats["not_found"] + stats["challenge"] + stats["error"]
+        return stats
+
+    def memory_bytes(self) -> int:
+        """Apytikslis puslapių masyvų dydis (be records / intern lentelių)."""
+        return sum(pg.nbytes() for pg in self._pages.values())
+
+
+CompactResultStore._MODE_TABLES = {m: CompactResultStore._mode_table(m) for m in ("all", "found", "bad")}
+CompactResultStore._STATUS_MAP_TABLE = bytes(b & ~CompactResultStore.F_REC for b in range(256))
+CompactResultStore._BYTE_VECS = [
+    (
+        1,
+        1 if b & CompactResultStore.ST_MASK == 1 or b & CompactResultStore.F_SUG else 0,
+        1 if b & CompactResultStore.ST_MASK == 2 else 0,
+        1 if b & CompactResultStore.ST_MASK == 3 else 0,
+        1 if b & CompactResultStore.ST_MASK == 4 else 0,
+    )
+    for b in range(256)
+]
+
+
+class SqliteResultStore:
+    """Rezultatai SQLite (WAL) faile su indeksais pagal id numerį, status, datą, miestą/rajoną, sugiharos.
+
+    RAM'e laikoma tik: dar neįrašyti į DB (pending, kol persister'is juos commit'ina)
+    ir ribotas LRU "karštas" rinkinys (SQLITE_HOT_ITEMS). Skaitymai – per thread-local
+    read-only jungtis, rašo tik persister thread'as (commit_records).
+    Sąsaja kaip dict'o (get / in / []= / len) + intervalo užklausos.
+
+    shared=True (keli worker'iai rašo į tą pačią DB): kitų procesų commit'ai pastebimi per
+    PRAGMA data_version (sync(), kviečia shared_sync pagal laikmatį) – tada išvalomas karštas
+    rinkinys ir didinama version; statistika skaičiuojama SQL'u (RangeStats RAM'e pasentų).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS results (
+            num INTEGER PRIMARY KEY,          -- ID numeris (1-NNNNNNN -> NNNNNNN)
+            status TEXT,
+            inserted_date TEXT,
+            city TEXT,
+            district TEXT,
+            sugiharos_found INTEGER NOT NULL DEFAULT 0,
+            checked_at TEXT,
+            data TEXT NOT NULL                -- visas įrašas (JSON)
+        );
+        CREATE INDEX IF NOT EXISTS idx_results_status ON results(status, num);
+        CREATE INDEX IF NOT EXISTS idx_results_inserted_date ON results(inserted_date);
+        CREATE INDEX IF NOT EXISTS idx_results_city_district ON results(city, district);
+        CREATE INDEX IF NOT EXISTS idx_results_sugiharos ON results(sugiharos_found, num);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    MODE_SQL = {
+        "all": "",
+        "found": " AND (status = 'FOUND' OR sugiharos_found = 1)",
+        "bad": " AND status IN ('ERROR', 'CHALLENGE', 'NOT_FOUND')",
+    }
+
+    def __init__(self, path: Path, hot_items: int = 2000, shared: bool = False):
+        self.path = Path(path)
+        self.hot_items = max(0, int(hot_items))
+        self.shared = bool(shared)
+        self._lock = threading.Lock()
+        self._hot: OrderedDict = OrderedDict()  # num -> entry
+        self._pending: dict = {}                # num -> entry (dar ne DB)
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._stats = None  # RangeStats – statomas tingiai (po legacy importo)
+        self.version = 0  # didėja su kiekvienu įrašu (ETag'ams)
+        self._data_version = None
+        self._sync = None  # atskira jungtis data_version'ui (ne rašančioji – jos lock'ą persister'is laiko per BEGIN)
+        self._sync_lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._writer_lock:
+            w = self._writer_conn()
+            w.executescript(self.SCHEMA)
+
+    # ----- jungtys -----
+    def _writer_conn(self):
+        if self._writer is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=10000")  # kiti worker'iai gali laikyti rašymo lock'ą
+            conn.execute("PRAGMA journal_mode=WAL")
+            sync = {"always": "FULL", "interval": "NORMAL", "never": "OFF"}.get(PERSIST_FSYNC, "NORMAL")
+            conn.execute(f"PRAGMA synchronous={sync}")
+            self._writer = conn
+        return self._writer
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _num(id_str: str) -> int:
+        return id_num(id_str)
+
+    def sync(self):
+        """shared: ar kas nors commit'ino nuo praeito karto? Kviečiama pagal laikmatį (shared_sync).
+
+        data_version skaitomas atskira jungtimi, todėl jis keičiasi ir po šio proceso persister'io
+        commit'ų – karštas rinkinys tada išvalomas be reikalo, bet get / in niekada nelaukia
+        _writer_lock'o (BEGIN IMMEDIATE gali laukti iki busy_timeout).
+        """
+        if not self.shared:
+            return
+        with self._sync_lock:
+            if self._sync is None:
+                self._sync = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+                self._sync.execute("PRAGMA query_only=ON")
+            dv = self._sync.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            if dv != self._data_version:
+                self._data_version = dv
+                self._hot.clear()
+                self.version += 1
+
+    # ----- dict sąsaja -----
+    def get(self, id_str: str, default=None):
+        try:
+            n = self._num(id_str)
+        except Exception:
+            return default
+        with self._lock:
+            entry = self._pending.get(n)
+            if entry is None:
+                entry = self._hot.get(n)
+                if entry is not None:
+                    self._hot.move_to_end(n)
+            if entry is not None:
+                return entry
+
+        row = self._conn().execute("SELECT data FROM results WHERE num = ?", (n,)).fetchone()
+        if row is None:
+            return default
+        entry = json.loads(row[0])
+        self._hot_put(n, entry)
+        return entry
+
+    def __contains__(self, id_str) -> bool:
+        try:
+            n = self._num(id_str)
+        except Exception:
+            return False
+        with self._lock:
+            if n in self._pending or n in self._hot:
+                return True
+        return self._conn().execute("SELECT 1 FROM results WHERE num = ?", (n,)).fetchone() is not None
+
+    def __setitem__(self, id_str: str, entry: dict):
+        n = self._num(id_str)
+        self.version += 1
+        if self._stats is not None:
+            old = self.get(id_str)
+            self._stats.move(n, None if old is None else _stats_vec(old), _stats_vec(entry))
+        with self._lock:
+            self._pending[n] = entry
+        self._hot_put(n, entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            pending = list(self._pending)
+        total = self._conn().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if pending:
+            total += len(pending) - self._count_existing(self._conn(), pending)
+        return total
+
+    def _hot_put(self, n: int, entry: dict):
+        if self.hot_items <= 0:
+            return
+        with self._lock:
+            self._hot[n] = entry
+            self._hot.move_to_end(n)
+            while len(self._hot) > self.hot_items:
+                self._hot.popitem(last=False)
+
+    @staticmethod
+    def _chunks(seq: list, size: int = 500):
+        for i in range(0, len(seq), size):
+            yield seq[i:i + size]
+
+    def _count_existing(self, conn, nums: list) -> int:
+        cnt = 0
+        for chunk in self._chunks(nums):
+            q = f"SELECT COUNT(*) FROM results WHERE num IN ({','.join('?' * len(chunk))})"
+            cnt += conn.execute(q, chunk).fetchone()[0]
+        return cnt
+
+    def _pending_in_range(self, start: int, end: int) -> dict:
+        with self._lock:
+            return {n: e for n, e in self._pending.items() if start <= n <= end}
+
+    # ----- intervalo užklausos -----
+    def iter_range(self, start: int, end: int, mode: str = "all", offset: int = 0):
+        """(id, entry) didėjančia numerio tvarka; pending įrašai perdengia DB eilutes."""
+        if offset:
+            yield from islice(self.iter_range(start, end, mode), offset, None)
+            return
+        if mode == "none":
+            return
+        pending = self._pending_in_range(start, end)
+        extra = sorted((n, e) for n, e in pending.items() if _entry_matches_mode(e, mode))
+        i = 0
+
+        sql = "SELECT num, data FROM results WHERE num BETWEEN ? AND ?" + self.MODE_SQL.get(mode, "") + " ORDER BY num"
+        for n, data in self._conn().execute(sql, (start, end)):
+            while i < len(extra) and extra[i][0] < n:
+                yield f"1-{extra[i][0]}", extra[i][1]
+                i += 1
+            if n in pending:
+                continue
+            yield f"1-{n}", json.loads(data)
+        while i < len(extra):
+            yield f"1-{extra[i][0]}", extra[i][1]
+            i += 1
+
+    def ids_in_range(self, start: int, end: int, limit: int = 0) -> list[str]:
+        sql = "SELECT num FROM results WHERE num BETWEEN ? AND ? ORDER BY num" + (f" LIMIT {int(limit)}" if limit else "")
+        nums = {n for (n,) in self._conn().execute(sql, (start, end))}
+        nums.update(self._pending_in_range(start, end))
+        nums = sorted(nums)
+        return [f"1-{n}" for n in (nums[:limit] if limit else nums)]
+
+    def status_codes(self, start: int, end: int) -> bytearray:
+        """/api/status_map: baitas per ID start..end (0 – netikrintas); pending perdengia DB."""
+        out = bytearray(max(0, end - start + 1))
+        sql = "SELECT num, status, sugiharos_found FROM results WHERE num BETWEEN ? AND ?"
+        for n, st, sug in self._conn().execute(sql, (start, end)):
+            out[n - start] = _status_code({"status": st, "sugiharos_found": bool(sug)})
+        for n, entry in self._pending_in_range(start, end).items():
+            out[n - start] = _status_code(entry)
+        return out
+
+    def _build_stats(self) -> "RangeStats":
+        """Vienas praėjimas per (num, status, sugiharos) + pending perdengimas."""
+        rs = RangeStats()
+        with self._lock:
+            pending = dict(self._pending)
+        for n, st, sug in self._conn().execute("SELECT num, status, sugiharos_found FROM results"):
+            if n not in pending:
+                rs.add(n, _stats_vec({"status": st, "sugiharos_found": bool(sug)}))
+        for n, entry in pending.items():
+            rs.add(n, _stats_vec(entry))
+        return rs
+
+    def stats_range(self, start: int, end: int) -> dict:
+        if self.shared:
+            return self._stats_scan(start, end)
+        if self._stats is None:
+            self._stats = self._build_stats()
+        return self._stats.query(start, end, self._stats_scan)
+
+    def _stats_scan(self, start: int, end: int) -> dict:
+        pending = self._pending_in_range(start, end)
+        conn = self._conn()
+        conn.execute("BEGIN")  # vienas WAL snapshot'as abiem užklausoms
+        try:
+            row = conn.execute(
+                """
+                SELECT COUNT(*),
+                       COALESCE(SUM(status = 'FOUND' OR sugiharos_found = 1), 0),
+                       COALESCE(SUM(status = 'NOT_FOUND'), 0),
+                       COALESCE(SUM(status = 'CHALLENGE'), 0),
+                       COALESCE(SUM(status = 'ERROR'), 0)
+                FROM results WHERE num BETWEEN ? AND ?
+                """,
+                (start, end),
+            ).fetchone()
+            old = {}
+            for chunk in self._chunks(sorted(pending)):
+                q = f"SELECT num, status, sugiharos_found FROM results WHERE num IN ({','.join('?' * len(chunk))})"
+                for n, st, sug in conn.execute(q, chunk):
+                    old[n] = {"status": st, "sugiharos_found": bool(sug)}
+        finally:
+            conn.execute("COMMIT")
+
+        stats = _empty_stats()
+        stats.update({"checked": row[0], "found": row[1], "not_found": row[2], "challenge": row[3], "error": row[4]})
+        for n, entry in pending.items():
+            if n in old:
+                _stats_add(stats, old[n], -1)
+            _stats_add(stats, entry, +1)
+        stats["bad_total"] = stats["not_found"] + stats["challenge"] + stats["error"]
+        return stats
+
+    # ----- rašymas (persister thread'as) -----
+    def commit_records(self, records: list) -> int:
+        """Viena transakcija grupei journal-formato įrašų ({"t":"r"|"m", ...}). Grąžina kiekį."""
+        rows = []
+        meta = None
+        for rec in records:
+            if rec.get("t") == "r":
+                e = rec["e"]
+                rows.append((
+                    id_num(e["id"]),
+                    e.get("status"),
+                    e.get("inserted_date"),
+                    e.get("city"),
+                    e.get("district"),
+                    1 if e.get("sugiharos_found") is True else 0,
+                    e.get("checked_at"),
+                    json.dumps(e, ensure_ascii=False, separators=(",", ":")),
+                ))
+            elif rec.get("t") == "m":
+                # SHARED_STATE: worker'is rašo tik savo dalis – sujungiam su DB'e esančiomis
+                meta = {**(meta or {}), **{k: rec[k] for k in STATE_META_PARTS if k in rec}}
+
+        with self._writer_lock:
+            w = self._writer_conn()
+            w.execute("BEGIN IMMEDIATE")
+            try:
+                if rows:
+                    w.executemany(
+                        "INSERT OR REPLACE INTO results"
+                        " (num, status, inserted_date, city, district, sugiharos_found, checked_at, data)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        rows,
+                    )
+                if meta is not None:
+                    if len(meta) < len(STATE_META_PARTS):
+                        row = w.execute("SELECT value FROM meta WHERE key = 'state'").fetchone()
+                        meta = {**(json.loads(row[0]) if row else {}), **meta}
+                    w.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES ('state', ?)",
+                        (json.dumps(meta, ensure_ascii=False, separators=(",", ":")),),
+                    )
+                w.execute("COMMIT")
+            except Exception:
+                w.execute("ROLLBACK")
+                raise
+
+        # įrašyti – jau skaitomi iš DB (jei tarp kitko nebuvo pakeisti nauju įrašu)
+        with self._lock:
+            for rec in records:
+                if rec.get("t") == "r":
+                    n = id_num(rec["e"]["id"])
+                    if self._pending.get(n) is rec["e"]:
+                        del self._pending[n]
+        return len(records)
+
+    def load_meta(self, key: str = "state") -> dict | None:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_meta(self, key: str, fn) -> dict | None:
+        """Atominis meta[key] read-modify-write (tarp procesų): fn(senas | None) -> naujas | None (nekeisti)."""
+        with self._writer_lock:
+            w = self._writer_conn()
+            w.execute("BEGIN IMMEDIATE")
+            try:
+                row = w.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+                new = fn(json.loads(row[0]) if row else None)
+                if new is not None:
+                    w.execute(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        (key, json.dumps(new, ensure_ascii=False, separators=(",", ":"))),
+                    )
+                w.execute("COMMIT")
+            except Exception:
+                w.execute("ROLLBACK")
+                raise
+        return new
+
+    def is_empty(self) -> bool:
+        conn = self._conn()
+        no_rows = conn.execute("SELECT 1 FROM results LIMIT 1").fetchone() is None
+        no_meta = conn.execute("SELECT 1 FROM meta LIMIT 1").fetchone() is None
+        return no_rows and no_meta
+
+
+# Cache (rezultatai be raw_html): id -> parsed result
+if IS_POOL_CHILD:
+    CACHE = MemoryResultStore()
+elif STATE_BACKEND == "sqlite":
+    CACHE = SqliteResultStore(STATE_DB_FILE, hot_items=SQLITE_HOT_ITEMS, shared=SHARED_STATE)
+elif CACHE_LAYOUT == "compact":
+    CACHE = CompactResultStore()
+else:
+    CACHE = MemoryResultStore()
+
+# RAW_CACHE: LRU su baitų biudžetu (tik tiems, kuriuos tikrinai; NEPERSISTINAM)
+RAW_CACHE_MAX_ITEMS = int(os.getenv("RAW_CACHE_MAX_ITEMS", "5000"))
+RAW_CACHE_MAX_BYTES = int(os.getenv("RAW_CACHE_MAX_BYTES", "500000"))  # vieno puslapio riba (simboliais)
+RAW_CACHE_BUDGET_BYTES = int(os.getenv("RAW_CACHE_BUDGET_BYTES", str(32 * 1024 * 1024)))  # visų suspaustų suma
+RAW_CACHE_ZLIB_LEVEL = int(os.getenv("RAW_CACHE_ZLIB_LEVEL", "1"))  # 1: ~0.6 ms / 230 KB, santykis beveik kaip 6
+
+
+class RawCache:
+    """id -> zlib suspaustas UTF-8 HTML; LRU iškeldinimas pagal bendrą baitų biudžetą.
+
+    str CPython'e lietuviškam tekstui užima 2–4 B/simboliui, suspaustas UTF-8 – ~10x mažiau.
+    Suspaudžiama už lock'o (kviečiančiame thread'e), išskleidžiama tik per get() (/raw).
+    Turi savo lock'ą – CACHE_LOCK nereikalingas.
+    """
+
+    ENTRY_OVERHEAD = 160  # bytes objektas + raktas + OrderedDict mazgas (apytiksliai)
+
+    def __init__(self, budget_bytes: int, max_items: int, max_chars: int, level: int = 1):
+        self.budget_bytes = int(budget_bytes)
+        self.max_items = int(max_items)
+        self.max_chars = int(max_chars)
+        self.level = int(level)
+        self._lock = threading.Lock()
+        self._items: OrderedDict[str, tuple[bytes, int]] = OrderedDict()  # id -> (blob, raw UTF-8 ilgis)
+        self._bytes = 0
+        self._raw_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._puts = 0
+
+    def _cost(self, blob: bytes) -> int:
+        return len(blob) + self.ENTRY_OVERHEAD
+
+    def encode(self, raw_html: str) -> tuple[bytes, bytes]:
+        """(UTF-8 duomenys, zlib blob'as) – tas pats blob'as tinka ir RAW_ARCHIVE."""
+        data = raw_html[:self.max_chars].encode("utf-8", "surrogatepass")
+        return data, zlib.compress(data, self.level)
+
+    def put(self, id_str: str, raw_html: str | None):
+        """None – body negautas (304), paliekam ankstesnę kopiją."""
+        if raw_html is None or self.max_items <= 0 or self.budget_bytes <= 0:
+            return
+        data, blob = self.encode(raw_html)
+        self.put_blob(id_str, blob, len(data))
+
+    def put_blob(self, id_str: str, blob: bytes, raw_len: int):
+        if self.max_items <= 0 or self.budget_bytes <= 0:
+            return
+        cost = self._cost(blob)
+        if cost > self.budget_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(id_str, None)
+            if old is not None:
+                self._bytes -= self._cost(old[0])
+                self._raw_bytes -= old[1]
+            self._items[id_str] = (blob, raw_len)
+            self._bytes += cost
+            self._raw_bytes += raw_len
+            self._puts += 1
+            while self._items and (self._bytes > self.budget_bytes or len(self._items) > self.max_items):
+                _, (b, n) = self._items.popitem(last=False)
+                self._bytes -= self._cost(b)
+                self._raw_bytes -= n
+                self._evictions += 1
+
+    def get(self, id_str: str) -> str | None:
+        with self._lock:
+            item = self._items.get(id_str)
+            if item is None:
+                self._misses += 1
+                return None
+            self._items.move_to_end(id_str)
+            self._hits += 1
+        return zlib.decompress(item[0]).decode("utf-8", "surrogatepass")
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self._bytes,
+                "raw_bytes": self._raw_bytes,
+                "ratio": round(self._raw_bytes / max(1, self._bytes), 2),
+                "budget_bytes": self.budget_bytes,
+                "max_items": self.max_items,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "puts": self._puts,
+            }
+
+
+RAW_CACHE = RawCache(RAW_CACHE_BUDGET_BYTES, RAW_CACHE_MAX_ITEMS, RAW_CACHE_MAX_BYTES, RAW_CACHE_ZLIB_LEVEL)
+
+# Raw HTML archyvas diske (išlieka po restarto): append-only segmentai su zlib body'ais,
+# id -> (segmentas, offset, ilgis) indeksas masyvuose, skaitymas per mmap.
+# Vienodi body'ai (pvz. visi 404 puslapiai) saugomi vieną kartą. RAW_ARCHIVE_MAX_BYTES=0 – išjungta.
+RAW_ARCHIVE_DIR = Path(os.getenv("RAW_ARCHIVE_DIR") or STATE_FILE.with_suffix(".raw"))
+RAW_ARCHIVE_MAX_BYTES = int(os.getenv("RAW_ARCHIVE_MAX_BYTES", str(256 * 1024 * 1024)))
+RAW_ARCHIVE_SEGMENT_BYTES = int(os.getenv("RAW_ARCHIVE_SEGMENT_BYTES", str(16 * 1024 * 1024)))
+
+
+class RawArchive:
+    """Segmentų failai seg-NNNNNN.bin: [magic, blob ilgis, blake2b(UTF-8)] + zlib blob'as.
+
+    index.bin – append-only (id num, segmentas, offset, ilgis) įrašai (segmentas 0 – ID išmestas);
+    startuojant perskaitomas, o dedupe lentelė (hash -> vieta) atkuriama iš segmentų antraščių.
+    Viršijus RAW_ARCHIVE_MAX_BYTES trinamas seniausias segmentas (jo ID raw prarandamas);
+    dažnas body'as, esantis seniausiame segmente, perrašomas į aktyvų, o trinant segmentą
+    į jį rodę ID perkeliami į naujausią to paties hash'o kopiją (ir po restarto – hash'ai
+    yra segmentų antraštėse), todėl bendras 404 body'as neišnyksta. Trynimas liečia tik to
+    segmento ID (_seg_ids), perkėlimai / išmetimai prirašomi prie index.bin.
+
+    Archyvas – best-effort: put() disko klaidos (pvz. ENOSPC) nekelia išimčių – failai nukerpami
+    iki paskutinio žinomo dydžio, klaida – last_error / stats()["errors"], fetch'as tęsiasi.
+
+    shared=True (keli worker'iai): rašymas po išskirtiniu, skaitymas po bendru flock'u, o prieš tai
+    pasiviejama kitų procesų prirašyta index.bin / segmentų uodega; perrašytas index.bin
+    (kito proceso kompaktacija / segmento trynimas) – perkraunama viskas.
+    """
+
+    MAGIC = b"RAW1"
+    _REC = struct.Struct("<4sI16s")
+    _IDX = struct.Struct("<IHHII")  # id num, segmentas, rezervuota, offset, ilgis
+
+    def __init__(self, root: Path, max_bytes: int, segment_bytes: int, shared: bool = False):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.segment_bytes = max(1 << 16, int(segment_bytes))
+        self.enabled = self.max_bytes > 0
+        self._lock = threading.Lock()
+        self._flock = None
+        self._base = None
+        self._seg = array("H")  # 0 = nėra
+        self._off = array("I")
+        self._len = array("I")
+        self._ids = 0
+        self._by_hash: dict[bytes, tuple[int, int, int]] = {}  # hash -> naujausia kopija
+        self._seg_hashes: dict[int, dict[int, bytes]] = {}  # segmentas -> {offset: hash}
+        self._seg_ids: dict[int, array] = {}  # segmentas -> ID, kada nors į jį rodę (gali kartotis)
+        self._segments: dict[int, int] = {}  # segmentas -> dydis (didėjančia tvarka)
+        self._maps: dict[int, mmap.mmap] = {}
+        self._active = 0
+        self._fh = None
+        self._idx_fh = None
+        self._idx_records = 0
+        self._idx_ino = None
+        self._stats = {"puts": 0, "dedup_hits": 0, "bytes_written": 0, "reads": 0, "misses": 0, "dropped_segments": 0,
+                       "remapped": 0, "errors": 0}
+        self.last_error = None  # kodėl išjungtas / paskutinė rašymo klaida (matosi /api/state config.raw_archive)
+        if self.enabled:
+            try:
+                if shared:
+                    self.root.mkdir(parents=True, exist_ok=True)
+                    self._flock = FileLock(self.root / "lock")
+                with self._locked():
+                    self._open()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.enabled = False
+
+    # ----- vidus -----
+    def _seg_path(self, seg: int) -> Path:
+        return self.root / f"seg-{seg:06d}.bin"
+
+    def _slot(self, n: int, grow: bool = False) -> int | None:
+        if self._base is None:
+            if not grow:
+                return None
+            self._base = n
+        i = n - self._base
+        if i < 0:
+            if not grow:
+                return None
+            pad = -i
+            for a in (self._seg, self._off, self._len):
+                a[0:0] = array(a.typecode, bytes(pad * a.itemsize))
+            self._base = n
+            return 0
+        if i >= len(self._seg):
+            if not grow:
+                return None
+            extra = max(i + 1 - len(self._seg), min(len(self._seg) // 4, 65536))
+            for a in (self._seg, self._off, self._len):
+                a.frombytes(bytes(extra * a.itemsize))
+        return i
+
+    def _scan_segment(self, seg: int, pos: int = 0) -> int:
+        """Atkuria dedupe lentelę iš segmento antraščių (nuo pos); nukerpa neužbaigtą uodegą. Grąžina dydį."""
+        path = self._seg_path(seg)
+        size = path.stat().st_size
+        hashes = self._seg_hashes.setdefault(seg, {})
+        with open(path, "rb") as f:
+            while pos + self._REC.size <= size:
+                f.seek(pos)
+                magic, ln, digest = self._REC.unpack(f.read(self._REC.size))
+                if magic != self.MAGIC or pos + self._REC.size + ln > size:
+                    break
+                self._by_hash[digest] = (seg, pos + self._REC.size, ln)
+                hashes[pos + self._REC.size] = digest
+                pos += self._REC.size + ln
+        if pos < size:
+            with open(path, "r+b") as f:
+                f.truncate(pos)
+        return pos
+
+    def _open(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        segs = sorted(int(p.stem[4:]) for p in self.root.glob("seg-*.bin") if p.stem[4:].isdigit())
+        for seg in segs:
+            self._segments[seg] = self._scan_segment(seg)
+
+        idx_path = self.root / "index.bin"
+        if idx_path.exists():
+            raw = idx_path.read_bytes()
+            usable = len(raw) - len(raw) % self._IDX.size
+            for n, seg, _, off, ln in self._IDX.iter_unpack(memoryview(raw)[:usable]):
+                size = self._segments.get(seg)
+                if size is None or off + ln > size:
+                    self._clear_locked(n)
+                    continue
+                self._set_locked(n, seg, off, ln)
+            self._idx_records = usable // self._IDX.size
+            if usable != len(raw):
+                with open(idx_path, "r+b") as f:
+                    f.truncate(usable)
+
+        self._active = segs[-1] if segs else 1
+        self._segments.setdefault(self._active, 0)
+        self._fh = open(self._seg_path(self._active), "ab")
+        self._idx_fh = open(idx_path, "ab")
+        self._idx_ino = os.fstat(self._idx_fh.fileno()).st_ino
+
+    @contextmanager
+    def _locked(self, shared: bool = False):
+        """self._lock + (shared režime) flock; prieš tai pasiviejama kitų procesų pakeitimų."""
+        with self._lock:
+            if self._flock is None:
+                yield
+                return
+            self._flock.acquire(shared=shared)
+            try:
+                if self._fh is not None:
+                    self._refresh_locked()
+                yield
+            finally:
+                self._flock.release()
+
+    def _refresh_locked(self):
+        idx_path = self.root / "index.bin"
+        try:
+            st = idx_path.stat()
+        except FileNotFoundError:
+            st = None
+        if st is None or st.st_ino != self._idx_ino:
+            for mm in self._maps.values():
+                mm.close()
+            self._fh.close()
+            self._idx_fh.close()
+            self._base = None
+            for a in (self._seg, self._off, self._len):
+                del a[:]
+            self._ids = 0
+            self._by_hash.clear()
+            self._seg_hashes.clear()
+            self._seg_ids.clear()
+            self._segments.clear()
+            self._maps.clear()
+            self._open()
+            return
+
+        on_disk = sorted(int(p.stem[4:]) for p in self.root.glob("seg-*.bin") if p.stem[4:].isdigit())
+        for seg in on_disk:
+            size = self._seg_path(seg).stat().st_size
+            known = self._segments.get(seg)
+            if known is None or size > known:
+                self._segments[seg] = self._scan_segment(seg, known or 0)
+
+        pos = self._idx_records * self._IDX.size
+        if st.st_size > pos:
+            with open(idx_path, "rb") as f:
+                f.seek(pos)
+                raw = f.read(st.st_size - pos)
+            usable = len(raw) - len(raw) % self._IDX.size
+            for n, seg, _, off, ln in self._IDX.iter_unpack(memoryview(raw)[:usable]):
+                if seg and off + ln <= self._segments.get(seg, 0):
+                    self._set_locked(n, seg, off, ln)
+                else:
+                    self._clear_locked(n)
+            self._idx_records += usable // self._IDX.size
+
+        # kito proceso ištrinti segmentai (jų ID perkėlimai jau atėjo su index.bin uodega)
+        for seg in set(self._segments) - set(on_disk):
+            self._forget_segment_locked(seg)
+        newest = next(reversed(self._segments))
+        if newest != self._active:
+            self._fh.close()
+            self._active = newest
+            self._fh = open(self._seg_path(newest), "ab")
+
+    def _set_locked(self, n: int, seg: int, off: int, ln: int):
+        i = self._slot(n, grow=True)
+        if self._seg[i] == 0:
+            self._ids += 1
+        if self._seg[i] != seg:
+            ids = self._seg_ids.get(seg)
+            if ids is None:
+                ids = self._seg_ids[seg] = array("I")
+            ids.append(n)
+        self._seg[i] = seg
+        self._off[i] = off
+        self._len[i] = ln
+
+    def _clear_locked(self, n: int):
+        i = self._slot(n)
+        if i is not None and self._seg[i]:
+            self._seg[i] = 0
+            self._ids -= 1
+
+    def _forget_segment_locked(self, seg: int):
+        """Pamiršta segmentą atmintyje: dydį, mmap'ą, jo hash'us dedupe lentelėje ir ID sąrašą."""
+        self._segments.pop(seg, None)
+        mm = self._maps.pop(seg, None)
+        if mm is not None:
+            mm.close()
+        for digest in self._seg_hashes.pop(seg, {}).values():
+            loc = self._by_hash.get(digest)
+            if loc is not None and loc[0] == seg:
+                del self._by_hash[digest]
+        self._seg_ids.pop(seg, None)
+
+    def _append_locked(self, digest: bytes, blob: bytes) -> tuple[int, int, int]:
+        size = self._segments[self._active]
+        if size and size + self._REC.size + len(blob) > self.segment_bytes:
+            self._fh.close()
+            self._active += 1
+            self._segments[self._active] = size = 0
+            self._fh = open(self._seg_path(self._active), "ab")
+        self._fh.write(self._REC.pack(self.MAGIC, len(blob), digest))
+        self._fh.write(blob)
+        self._fh.flush()
+        loc = (self._active, size + self._REC.size, len(blob))
+        self._seg_hashes.setdefault(self._active, {})[loc[1]] = digest
+        self._segments[self._active] = size + self._REC.size + len(blob)
+        self._stats["bytes_written"] += self._REC.size + len(blob)
+        return loc
+
+    def _rewrite_index_locked(self):
+        idx_path = self.root / "index.bin"
+        tmp = idx_path.with_suffix(".tmp")
+        pack = self._IDX.pack
+        count = 0
+        seg_ids: dict[int, array] = {}
+        with open(tmp, "wb") as f:
+            buf = []
+            for i, seg in enumerate(self._seg):
+                if seg:
+                    buf.append(pack(self._base + i, seg, 0, self._off[i], self._len[i]))
+                    ids = seg_ids.get(seg)
+                    if ids is None:
+                        ids = seg_ids[seg] = array("I")
+                    ids.append(self._base + i)
+                    count += 1
+                    if len(buf) >= 4096:
+                        f.write(b"".join(buf))
+                        buf.clear()
+            f.write(b"".join(buf))
+        self._idx_fh.close()
+        os.replace(tmp, idx_path)
+        self._idx_fh = open(idx_path, "ab")
+        self._idx_ino = os.fstat(self._idx_fh.fileno()).st_ino
+        self._idx_records = count
+        self._seg_ids = seg_ids
+
+    def _drop_segment_locked(self, seg: int):
+        """Trina seniausią segmentą: jo ID -> naujausia to paties body kopija (pagal hash'ą) arba išmetami.
+
+        Perkėlimai ir išmetimai pirma prirašomi prie index.bin, tik tada trinamas failas
+        (crash tarpe – segmentas tiesiog bus trinamas dar kartą).
+        """
+        hashes = self._seg_hashes.get(seg, {})
+        pack = self._IDX.pack
+        changes = []
+        seen = set()
+        for n in self._seg_ids.get(seg, ()):
+            i = self._slot(n)
+            if i is None or self._seg[i] != seg or n in seen:
+                continue  # jau perrašytas kitur (arba pasikartojantis sąrašo įrašas)
+            seen.add(n)
+            loc = self._by_hash.get(hashes.get(self._off[i]))
+            changes.append((n, i, loc if loc is not None and loc[0] != seg else None))
+        if changes:
+            # pirma index.bin (nepavykus – atmintis dar nepakeista), tik tada masyvai
+            self._idx_fh.write(b"".join(
+                pack(n, loc[0], 0, loc[1], loc[2]) if loc else pack(n, 0, 0, 0, 0) for n, _, loc in changes
+            ))
+            self._idx_fh.flush()
+            self._idx_records += len(changes)
+        for n, i, loc in changes:
+            if loc is not None:
+                self._seg[i], self._off[i], self._len[i] = loc
+                self._seg_ids.setdefault(loc[0], array("I")).append(n)
+                self._stats["remapped"] += 1
+            else:
+                self._seg[i] = 0
+                self._ids -= 1
+        self._forget_segment_locked(seg)
+        try:
+            self._seg_path(seg).unlink()
+        except FileNotFoundError:
+            pass
+        self._stats["dropped_segments"] += 1
+
+    def _enforce_cap_locked(self):
+        while len(self._segments) > 1 and sum(self._segments.values()) > self.max_bytes:
+            self._drop_segment_locked(next(iter(self._segments)))
+        if self._idx_records > max(65536, 4 * self._ids):
+            self._rewrite_index_locked()
+
+    def _map_locked(self, seg: int, end: int) -> mmap.mmap:
+        mm = self._maps.get(seg)
+        if mm is None or len(mm) < end:
+            if mm is not None:
+                mm.close()
+            with open(self._seg_path(seg), "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[seg] = mm
+        return mm
+
+    # ----- sąsaja -----
+    def put(self, id_str: str, data: bytes, blob: bytes):
+        """data – UTF-8 body (dedupe hash'ui), blob – jo zlib forma (iš RawCache.encode)."""
+        if not self.enabled:
+            return
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        n = id_num(id_str)
+        try:
+            with self._locked():
+                try:
+                    self._put_locked(n, digest, blob)
+                except OSError:
+                    self._repair_locked()
+                    raise
+        except OSError as e:
+            self._stats["errors"] += 1
+            if self.enabled:
+                self.last_error = f"{now_iso()} {type(e).__name__}: {e}"
+
+    def _put_locked(self, n: int, digest: bytes, blob: bytes):
+        loc = self._by_hash.get(digest)
+        if loc is not None and len(self._segments) > 1 and loc[0] == next(iter(self._segments)):
+            loc = None  # seniausias segmentas greit bus ištrintas – perrašom į aktyvų
+        if loc is None:
+            loc = self._append_locked(digest, blob)
+            self._by_hash[digest] = loc
+        else:
+            self._stats["dedup_hits"] += 1
+        self._idx_fh.write(self._IDX.pack(n, loc[0], 0, loc[1], loc[2]))
+        self._idx_fh.flush()
+        self._idx_records += 1
+        self._set_locked(n, *loc)
+        self._stats["puts"] += 1
+        self._enforce_cap_locked()
+
+    def _repair_locked(self):
+        """Po nepavykusio rašymo: aktyvus segmentas ir index.bin nukerpami iki žinomo dydžio ir atidaromi
+        iš naujo (buferyje likę baitai išmetami) – kitaip naujų įrašų offset'ai nesutaptų su failu."""
+        try:
+            for fh in (self._fh, self._idx_fh):
+                try:
+                    fh.close()
+                except OSError:
+                    pass
+            os.truncate(self._seg_path(self._active), self._segments.get(self._active, 0))
+            os.truncate(self.root / "index.bin", self._idx_records * self._IDX.size)
+            self._fh = open(self._seg_path(self._active), "ab")
+            self._idx_fh = open(self.root / "index.bin", "ab")
+        except OSError as e:
+            self.enabled = False  # failų būsena nebežinoma – geriau nerašyti visai
+            self.last_error = f"{now_iso()} išjungtas: {type(e).__name__}: {e}"
+
+    def get_blob(self, id_str: str) -> bytes | None:
+        """Suspaustas body (zlib) – pvz. perduoti į kitą procesą be išskleidimo."""
+        if not self.enabled:
+            return None
+        n = id_num(id_str)
+        with self._locked(shared=True):
+            i = self._slot(n)
+            seg = self._seg[i] if i is not None else 0
+            if not seg or seg not in self._segments:
+                self._stats["misses"] += 1
+                return None
+            off, ln = self._off[i], self._len[i]
+            blob = self._map_locked(seg, off + ln)[off:off + ln]
+            self._stats["reads"] += 1
+        return blob
+
+    def get(self, id_str: str) -> str | None:
+        blob = self.get_blob(id_str)
+        return None if blob is None else zlib.decompress(blob).decode("utf-8", "surrogatepass")
+
+    def stats(self) -> dict:
+        with self._locked(shared=True):
+            return {
+                "enabled": self.enabled,
+                "last_error": self.last_error,
+                "shared": self._flock is not None,
+                "dir": str(self.root),
+                "ids": self._ids,
+                "unique_bodies": len(self._by_hash),
+                "segments": len(self._segments),
+                "bytes": sum(self._segments.values()),
+                "max_bytes": self.max_bytes,
+                "index_records": self._idx_records,
+                **self._stats,
+            }
+
+
+RAW_ARCHIVE = RawArchive(
+    RAW_ARCHIVE_DIR, 0 if IS_POOL_CHILD else RAW_ARCHIVE_MAX_BYTES, RAW_ARCHIVE_SEGMENT_BYTES, shared=SHARED_STATE
+)
+
+
+def store_raw(id_str: str, raw_html: str | None):
+    """Raw HTML į RAW_CACHE (RAM) ir RAW_ARCHIVE (diskas); suspaudžiama vieną kartą, be CACHE_LOCK."""
+    if raw_html is None:
+        return  # 304 – paliekam ankstesnę kopiją
+    data, blob = RAW_CACHE.encode(raw_html)
+    RAW_CACHE.put_blob(id_str, blob, len(data))
+    RAW_ARCHIVE.put(id_str, data, blob)
+
+
+CACHE_LOCK = threading.Lock()
+
+NOT_FOUND_MARKERS = [
+    "Šiame puslapyje nėra informacijos, kurios jūs ieškote",
+    "Siame puslapyje nera informacijos, kurios jus ieskote",
+    "block-404",
+]
+
+CHALLENGE_MARKERS = [
+    "Just a moment",
+    "Enable JavaScript and cookies to continue",
+    "cdn-cgi/challenge-platform",
+    "_cf_chl_opt",
+]
+
+# =========================
+# Pagalbinės funkcijos
+# =========================
+def now_iso() -> str:
+    return datetime.now(timezone.utc).astimezone().isoformat(timespec="seconds")
+
+
+def range_count(start: int, end: int, step: int) -> int:
+    if start > end:
+        return 0
+    return ((end - start) // step) + 1
+
+
+def normalize_range(start: int, end: int, step: int) -> tuple[int, int, int]:
+    """Normalizuoja intervalą:
+    - STEP palaikomas tik 1 (visi).
+    - riboja max įrašų skaičių.
+    """
+    if step != 1:
+        raise ValueError("Šiuo metu palaikomas tik STEP=1 (visi ID).")
+
+    if start > end:
+        raise ValueError("start negali būti didesnis už end.")
+
+    cnt = range_count(start, end, step)
+    if cnt > MAX_RANGE_ITEMS:
+        raise ValueError(f"Per didelis intervalas: {cnt} įrašų. Max: {MAX_RANGE_ITEMS}.")
+
+    return start, end, step
+
+
+def in_range(n: int) -> bool:
+    return START_NUM <= n <= END_NUM
+
+
+def id_num(id_str: str) -> int:
+    return int(id_str.split("-", 1)[1])
+
+
+def normalize_id(id_like: str) -> str:
+    s = (id_like or "").strip()
+    if not s:
+        raise ValueError("Trūksta ID")
+    # priimam: "1-2890001", "1-2890001/", "https://www.aruodas.lt/1-2890001/"
+    s = s.replace("https://", "").replace("http://", "")
+    s = s.replace("www.aruodas.lt/", "")
+    s = s.strip("/")
+    if not re.fullmatch(r"1-\d+", s):
+        raise ValueError("Netinkamas ID formatas. Pvz: 1-3000000")
+    return s
+
+
+def parse_range_value(v) -> int:
+    """Priimam start/end kaip:
+    - int
+    - '3000000'
+    - '1-3000000'
+    """
+    if v is None:
+        raise ValueError("Trūksta start arba end reikšmės.")
+
+    if isinstance(v, int):
+        return v
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+
+    s = str(v).strip()
+    if not s:
+        raise ValueError("Tuščia start/end reikšmė.")
+
+    if re.fullmatch(r"1-\d+", s):
+        return id_num(s)
+    if re.fullmatch(r"\d+", s):
+        return int(s)
+
+    raise ValueError("Netinkamas start/end formatas. Naudok skaičių (pvz 3000000) arba ID (pvz 1-3000000).")
+
+
+def _safe_float(x, default: float) -> float:
+    try:
+        return float(x)
+    except Exception:
+        return default
+
+
+def recompute_jitter():
+    """Jitter = procentas nuo MIN_INTERVAL, bet su absoliučiom lubom (sekundėmis)."""
+    global JITTER_SECONDS
+
+    mi = float(MIN_INTERVAL_SECONDS)
+
+    jmin = min(float(JITTER_CAP_SECONDS[0]), mi * float(JITTER_FRAC[0]))
+    jmax = min(float(JITTER_CAP_SECONDS[1]), mi * float(JITTER_FRAC[1]))
+
+    if jmin < 0:
+        jmin = 0.0
+    if jmax < jmin:
+        jmax = jmin
+
+    JITTER_SECONDS = (jmin, jmax)
+
+
+def is_allowed_rate(x: float) -> bool:
+    """Tolydus intervalas: bet kokia reikšmė iš MIN_INTERVAL_BOUNDS (ne tik preset'ai)."""
+    try:
+        xf = float(x)
+    except Exception:
+        return False
+    return MIN_INTERVAL_BOUNDS[0] <= xf <= MIN_INTERVAL_BOUNDS[1]
+
+
+def snap_rate(x: float) -> float:
+    """Apvalina iki ms ir apriboja MIN_INTERVAL_BOUNDS."""
+    xf = round(float(x), 3)
+    return min(MIN_INTERVAL_BOUNDS[1], max(MIN_INTERVAL_BOUNDS[0], xf))
+
+
+def set_min_interval(x: float):
+    global MIN_INTERVAL_SECONDS
+    MIN_INTERVAL_SECONDS = snap_rate(x)
+    recompute_jitter()
+    CONTROLLER.set_base_interval(MIN_INTERVAL_SECONDS)
+
+
+def rate_limit():
+    """Globalus rate-limit (bendras visiems thread'ams)."""
+    RATE_LIMITER.acquire(JITTER_SECONDS)
+
+
+# Markeriai sumažintom raidėm – paruošti vieną kartą (ne kiekvienam puslapiui)
+_NOT_FOUND_MARKERS_LOW = tuple(m.lower() for m in NOT_FOUND_MARKERS)
+_CHALLENGE_MARKERS_LOW = tuple(m.lower() for m in CHALLENGE_MARKERS)
+SNIPPET_WORD = "sugiharos"
+
+
+def _status_from_low(low: str, http_status: int | None = None) -> str:
+    if http_status == 404:
+        return "NOT_FOUND"
+    for m in _NOT_FOUND_MARKERS_LOW:
+        if m in low:
+            return "NOT_FOUND"
+    for m in _CHALLENGE_MARKERS_LOW:
+        if m in low:
+            return "CHALLENGE"
+    return "FOUND"
+
+
+def scan_page(html_text: str, http_status: int | None = None) -> tuple[str, int]:
+    """Vienas lower() visam puslapiui: (status, pirmo "sugiharos" indeksas arba -1).
+
+    lower() – brangiausia dalis (~2/3 laiko), todėl daroma vieną kartą ir
+    dalinamasi tarp status'o ir snippet'o; patys ieškojimai – C substring paieška
+    (kombinuotas re.I regex'as ar Python Aho-Corasick čia keliskart lėtesni).
+    """
+    low = (html_text or "").lower()
+    return _status_from_low(low, http_status), low.find(SNIPPET_WORD)
+
+
+def detect_status(html_text: str, http_status: int | None = None) -> str:
+    return _status_from_low((html_text or "").lower(), http_status)
+
+
+def extract_inserted_date(text: str) -> str | None:
+    m = re.search(r"Įdėtas\s*(\d{4}-\d{2}-\d{2})", text, flags=re.IGNORECASE)
+    if m:
+        return m.group(1)
+    m = re.search(r"Idetas\s*(\d{4}-\d{2}-\d{2})", text, flags=re.IGNORECASE)
+    if m:
+        return m.group(1)
+    return None
+
+
+def extract_title_text(soup: BeautifulSoup) -> str:
+    h1 = soup.find("h1")
+    if h1:
+        return " ".join(h1.stripped_strings)
+    og = soup.find("meta", attrs={"property": "og:title"})
+    if og and og.get("content"):
+        return og["content"].strip()
+    if soup.title and soup.title.string:
+        return soup.title.string.strip()
+    return ""
+
+
+def parse_city_district_from_h1(title_text: str) -> tuple[str | None, str | None]:
+    parts = [p.strip() for p in title_text.split(",") if p.strip()]
+    if len(parts) >= 2:
+        return parts[0], parts[1]
+    return None, None
+
+
+def parse_city_district_from_url(final_url: str) -> tuple[str | None, str | None]:
+    if not final_url:
+        return None, None
+    path = urlparse(final_url).path.strip("/")
+    if not path:
+        return None, None
+    slug = path.split("/")[-1].strip("/")
+    low = slug.lower()
+
+    if "vilniuje" in low:
+        tokens = low.split("-")
+        try:
+            i = tokens.index("vilniuje")
+            district = tokens[i + 1] if i + 1 < len(tokens) else None
+        except ValueError:
+            district = None
+        return "Vilnius", district
+
+    return None, None
+
+
+def make_snippet_html(source_text: str, word: str = "sugiharos", radius: int = 80, idx: int | None = None) -> str | None:
+    """idx – jau rastas žodžio indeksas (iš scan_page), kad nereikėtų dar kartą lower()."""
+    if not source_text:
+        return None
+    if idx is None:
+        idx = source_text.lower().find(word.lower())
+    if idx == -1:
+        return None
+
+    start = max(0, idx - radius)
+    end = min(len(source_text), idx + len(word) + radius)
+    snippet = source_text[start:end]
+
+    esc = html.escape(snippet)
+    esc = re.sub(r"(?i)(sugiharos)", r'<span class="hit">\1</span>', esc)
+
+    prefix = "… " if start > 0 else ""
+    suffix = " …" if end < len(source_text) else ""
+    return prefix + esc + suffix
+
+
+# Fast extractor (PARSE_MODE=fast): h1/og:title/title + tekstas regex'ais, be BeautifulSoup medžio.
+# Jei struktūra neaiški (neuždarytas h1/script/komentaras, tag'ai title viduje) – pilnas soup.
+PARSE_MODE = (os.getenv("PARSE_MODE") or "fast").strip().lower()
+if PARSE_MODE not in ("fast", "soup"):
+    PARSE_MODE = "fast"
+PARSE_STATS = {"fast": 0, "soup": 0, "fallback": 0}
+
+_FAST_ATTRS = r"""(?:"[^"]*"|'[^']*'|[^'">])*"""  # tag'o atributai (kabutėse gali būti ">")
+# get_text() neįtraukia komentarų, <script>, <style> – juos išmetam pirmiausia
+_FAST_DROP_RE = re.compile(
+    rf"<!--.*?-->|<script\b{_FAST_ATTRS}>.*?</script\s*>|<style\b{_FAST_ATTRS}>.*?</style\s*>", re.I | re.S
+)
+_FAST_UNCLOSED_RE = re.compile(r"<!--|<script\b|<style\b", re.I)
+# html.parser tag'u laiko tik "<" + raidė / "/" / "!" / "?"; kabutės gali turėti ">"
+_FAST_TAG_RE = re.compile(rf"<[a-zA-Z/!?]{_FAST_ATTRS}>")
+_FAST_H1_RE = re.compile(rf"<h1\b{_FAST_ATTRS}>(.*?)</h1\s*>", re.I | re.S)
+_FAST_H1_OPEN_RE = re.compile(r"<h1\b", re.I)
+_FAST_META_RE = re.compile(rf"<meta\b{_FAST_ATTRS}>", re.I)
+_FAST_ATTR_RE = re.compile(r"""([^\s"'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?""")
+_FAST_TITLE_RE = re.compile(rf"<title\b{_FAST_ATTRS}>(.*?)</title\s*>", re.I | re.S)
+
+
+class _FastParseUnsure(Exception):
+    """Fast extractor'ius negali garantuoti to paties rezultato kaip soup."""
+
+
+def _fast_meta_attrs(tag: str) -> dict:
+    attrs = {}
+    body = tag[5:-1].rstrip("/")  # be "<meta" ir ">"
+    for m in _FAST_ATTR_RE.finditer(body):
+        name = m.group(1).lower()
+        val = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+        attrs[name] = html.unescape(val) if val is not None else ""
+    return attrs
+
+
+def fast_extract_title_and_text(html_text: str) -> tuple[str, str]:
+    """(title_text, text) kaip extract_title_text(soup) ir soup.get_text("\\n", strip=True)
+    regex'ams (Įdėtas / Vilnius) – tekstas nesuspaustas, bet tag'ų ribos išlieka "\\n"."""
+    doc = _FAST_DROP_RE.sub("\n", html_text or "")
+    if _FAST_UNCLOSED_RE.search(doc):
+        raise _FastParseUnsure("unclosed comment/script/style")
+
+    m = _FAST_H1_RE.search(doc)
+    if m:
+        inner = m.group(1)
+        if _FAST_H1_OPEN_RE.search(inner):
+            raise _FastParseUnsure("nested h1")
+        parts = (html.unescape(s).strip() for s in _FAST_TAG_RE.split(inner))
+        title = " ".join(p for p in parts if p)
+    elif _FAST_H1_OPEN_RE.search(doc):
+        raise _FastParseUnsure("unclosed h1")
+    else:
+        title = ""
+        for tag in _FAST_META_RE.findall(doc):
+            attrs = _fast_meta_attrs(tag)
+            if attrs.get("property") == "og:title":
+                title = (attrs.get("content") or "").strip()
+                break
+        if not title:
+            t = _FAST_TITLE_RE.search(doc)
+            if t:
+                if "<" in t.group(1):
+                    raise _FastParseUnsure("markup in title")
+                title = html.unescape(t.group(1)).strip()
+
+    text = "\n".join(html.unescape(s) for s in _FAST_TAG_RE.split(doc))
+    return title, text
+
+
+def soup_extract_title_and_text(html_text: str) -> tuple[str, str]:
+    soup = BeautifulSoup(html_text, "html.parser")
+    return extract_title_text(soup), soup.get_text("\n", strip=True)
+
+
+def extract_title_and_text(html_text: str) -> tuple[str, str]:
+    """FOUND puslapio title + tekstas: fast kelias, soup – tik kaip atsarginis."""
+    if PARSE_MODE == "fast":
+        try:
+            out = fast_extract_title_and_text(html_text)
+            PARSE_STATS["fast"] += 1
+            return out
+        except _FastParseUnsure:
+            PARSE_STATS["fallback"] += 1
+    else:
+        PARSE_STATS["soup"] += 1
+    return soup_extract_title_and_text(html_text)
+
+
+# Didinkite, kai keičiasi parse_html / parse_city_district_* taisyklės: /api/reparse
+# perparse'ins archyvuotus puslapius, kurių parser_version senesnė (be tinklo).
+PARSER_VERSION = 1
+
+
+def parse_html(html_text: str, final_url: str = "", http_status: int | None = None) -> dict:
+    status, sug_idx = scan_page(html_text, http_status=http_status)
+
+    sug_snippet = make_snippet_html(html_text, SNIPPET_WORD, radius=120, idx=sug_idx)
+    sug_found = sug_snippet is not None
+
+    result = {
+        "status": status,  # FOUND / NOT_FOUND / CHALLENGE
+        "inserted_date": None,
+        "city": None,
+        "district": None,
+        "final_url": final_url or None,
+        "sugiharos_found": sug_found,
+        "sugiharos_snippet_html": sug_snippet,
+        "parser_version": PARSER_VERSION,
+    }
+
+    if status != "FOUND":
+        # jei challenge, bent miestą/rajoną pabandom iš URL
+        city2, dist2 = parse_city_district_from_url(final_url)
+        if city2:
+            result["city"] = city2
+        if dist2:
+            result["district"] = dist2
+        return result
+
+    title_text, text = extract_title_and_text(html_text)
+    city, district = parse_city_district_from_h1(title_text)
+
+    inserted = extract_inserted_date(text)
+
+    if not city:
+        if re.search(r"\bvilni(?:us|uje|aus)\b", text, flags=re.IGNORECASE):
+            city = "Vilnius"
+        else:
+            city2, _ = parse_city_district_from_url(final_url)
+            city = city2 or city
+
+    if city and city.strip().lower() == "vilnius":
+        if not district:
+            _, dist2 = parse_city_district_from_url(final_url)
+            district = dist2 or district
+    else:
+        # taisyklė: jei miestas ne Vilnius – miesto/rajono nerodom
+        district = None
+        city = None
+
+    result["inserted_date"] = inserted
+    result["city"] = city
+    result["district"] = district
+    return result
+
+
+def feedback_kind(http_status: int | None, status: str | None) -> str:
+    """Atsakymo klasė adaptyviam valdikliui."""
+    if status == "CHALLENGE":
+        return "challenge"
+    if http_status == 429:
+        return "throttled"
+    if http_status is not None and http_status >= 500:
+        return "server_error"
+    return "ok"
+
+
+# Parse offload: I/O – EXECUTOR thread'uose, dideli puslapiai parse'inami procesų pool'e
+# (parse_html laiko GIL'ą ir stabdo kitus fetch / Flask thread'us). Tarp etapų – ribota eilė:
+# kai pool'as užsikimšęs, fetch thread'as laukia (backpressure), o ne kaupia puslapius RAM'e.
+# Maži puslapiai (NOT_FOUND pradžia ir pan.) parse'inami vietoje – IPC kainuotų daugiau.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "-1"))  # -1: branduolių - 1 (vienas lieka I/O + Flask)
+PARSE_POOL_MIN_CHARS = int(os.getenv("PARSE_POOL_MIN_CHARS", "50000"))
+PARSE_QUEUE_MAX = int(os.getenv("PARSE_QUEUE_MAX", "0"))  # 0: 2 x PARSE_WORKERS
+PARSE_POOL_STATS = {"pool": 0, "inline": 0, "broken": 0, "wait_ms": 0.0}
+
+_parse_pool: ProcessPoolExecutor | None = None
+_parse_pool_lock = threading.Lock()
+_parse_slots = threading.BoundedSemaphore(1)
+
+
+def set_parse_workers(n: int):
+    """Keičia parse pool'o dydį (0 – parse'inti fetch thread'uose). Senas pool'as uždaromas."""
+    global PARSE_WORKERS, _parse_pool, _parse_slots
+    if n < 0:
+        n = max(0, (os.cpu_count() or 1) - 1) // WEB_WORKERS  # branduoliai dalijami web worker'iams
+    with _parse_pool_lock:
+        old, _parse_pool = _parse_pool, None
+        PARSE_WORKERS = n
+        _parse_slots = threading.BoundedSemaphore(PARSE_QUEUE_MAX or 2 * max(1, n))
+    if old is not None:
+        old.shutdown(wait=False, cancel_futures=True)
+
+
+def _parse_pool_get() -> ProcessPoolExecutor:
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _parse_pool
+
+
+def _parse_in_child(html_text: str, final_url: str, http_status: int | None) -> tuple[dict, dict]:
+    """Vaiko procese: (parse_html rezultatas, PARSE_STATS pokytis – kad skaitliukai liktų tėve)."""
+    before = dict(PARSE_STATS)
+    parsed = parse_html(html_text, final_url=final_url, http_status=http_status)
+    return parsed, {k: PARSE_STATS[k] - before[k] for k in PARSE_STATS}
+
+
+def parse_page(html_text: str, final_url: str = "", http_status: int | None = None) -> dict:
+    """parse_html() procesų pool'e (jei įjungtas ir puslapis didelis), kitaip – šiame thread'e."""
+    global _parse_pool
+    if PARSE_WORKERS <= 0 or IS_POOL_CHILD or len(html_text) < PARSE_POOL_MIN_CHARS:
+        PARSE_POOL_STATS["inline"] += 1
+        return parse_html(html_text, final_url=final_url, http_status=http_status)
+
+    t0 = time.perf_counter()
+    slots = _parse_slots
+    with slots:
+        try:
+            fut = _parse_pool_get().submit(_parse_in_child, html_text, final_url, http_status)
+            parsed, delta = fut.result()
+        except BrokenProcessPool:
+            # vaikas nukrito (OOM ir pan.) – naujas pool'as kitam kartui, šį puslapį parse'inam vietoje
+            with _parse_pool_lock:
+                _parse_pool = None
+            PARSE_POOL_STATS["broken"] += 1
+            return parse_html(html_text, final_url=final_url, http_status=http_status)
+    for k, v in delta.items():
+        PARSE_STATS[k] += v
+    PARSE_POOL_STATS["pool"] += 1
+    PARSE_POOL_STATS["wait_ms"] += (time.perf_counter() - t0) * 1000.0
+    return parsed
+
+
+def parse_pool_metrics() -> dict:
+    n = max(1, PARSE_POOL_STATS["pool"])
+    return {
+        "workers": PARSE_WORKERS,
+        "min_chars": PARSE_POOL_MIN_CHARS,
+        "queue_max": PARSE_QUEUE_MAX or 2 * max(1, PARSE_WORKERS),
+        **{k: v for k, v in PARSE_POOL_STATS.items() if k != "wait_ms"},
+        "avg_wait_ms": round(PARSE_POOL_STATS["wait_ms"] / n, 2),
+    }
+
+
+set_parse_workers(PARSE_WORKERS)
+
+
+# Streaming fetch (FETCH_STREAM=1): body skaitomas gabalais, status nustatomas inkrementiškai
+# ir jungtis uždaroma, kai rezultatas nebegali pasikeisti (NOT_FOUND / CHALLENGE).
+# FOUND visada skaitomas iki galo (NOT_FOUND markeris gali būti bet kur).
+FETCH_STREAM = os.getenv("FETCH_STREAM", "1") != "0"
+FETCH_CHUNK_BYTES = int(os.getenv("FETCH_CHUNK_BYTES", "16384"))
+# Jei iki galo liko ne daugiau – perskaitom (uždarius jungtį kitam fetch'ui reiktų naujo TLS handshake)
+FETCH_DRAIN_MAX_BYTES = int(os.getenv("FETCH_DRAIN_MAX_BYTES", "65536"))
+# CHALLENGE laikomas galutiniu tik su šiais HTTP kodais (Cloudflare challenge'ai – 403/503)
+_STREAM_CHALLENGE_HTTP = (403, 429, 503)
+
+FETCH_METRICS_LOCK = threading.Lock()
+FETCH_METRICS: dict[str, dict] = {}  # status -> skaitikliai
+
+
+class _StreamClassifier:
+    """Inkrementinis _status_from_low(): feed() grąžina status, kai jis jau galutinis, kitaip None.
+
+    Tarp gabalų paliekama (ilgiausias markeris - 1) simbolių uodega, kad markeris,
+    perskeltas per gabalų ribą, nebūtų praleistas.
+    """
+
+    _OVERLAP = max(len(m) for m in _NOT_FOUND_MARKERS_LOW + _CHALLENGE_MARKERS_LOW) - 1
+
+    def __init__(self, http_status: int | None):
+        self.http_status = http_status
+        self.challenge = False
+        self._tail = ""
+
+    def feed(self, text: str) -> str | None:
+        if self.http_status == 404:
+            return "NOT_FOUND"
+        low = self._tail + text.lower()
+        for m in _NOT_FOUND_MARKERS_LOW:
+            if m in low:
+                return "NOT_FOUND"
+        if not self.challenge:
+            self.challenge = any(m in low for m in _CHALLENGE_MARKERS_LOW)
+        self._tail = low[-self._OVERLAP:]
+        if self.challenge and self.http_status in _STREAM_CHALLENGE_HTTP:
+            return "CHALLENGE"
+        return None
+
+
+def _read_body(r: requests.Response, t0: float, early_abort: bool = True) -> tuple[str, dict]:
+    """Perskaito stream=True response'ą: (tekstas, info). early_abort – nutraukti, kai status galutinis."""
+    try:
+        try:
+            decoder = codecs.getincrementaldecoder(r.encoding or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        clf = _StreamClassifier(r.status_code) if early_abort else None
+        parts = []
+        status = None
+        chunks = r.iter_content(FETCH_CHUNK_BYTES)
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            parts.append(text)
+            if clf is not None:
+                status = clf.feed(text)
+                if status is not None:
+                    break
+
+        aborted = False
+        saved = 0
+        if status is not None:
+            try:
+                total = int(r.headers.get("Content-Length") or -1)
+            except ValueError:
+                total = -1
+            left = total - r.raw.tell() if total >= 0 else None
+            if left is not None and left <= FETCH_DRAIN_MAX_BYTES:
+                # mažas likutis – perskaitom, kad jungtis grįžtų į pool'ą
+                for chunk in chunks:
+                    parts.append(decoder.decode(chunk))
+            else:
+                aborted = True
+                saved = left or 0
+        if not aborted:
+            parts.append(decoder.decode(b"", final=True))
+
+        info = {
+            "aborted": aborted,
+            "probe_only": False,
+            "bytes_read": int(r.raw.tell() or 0),
+            "bytes_saved": saved,
+            "ms": (time.perf_counter() - t0) * 1000.0,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+        }
+        return "".join(parts), info
+    finally:
+        r.close()  # nutraukus – jungtis uždaroma (ne grąžinama į pool'ą)
+
+
+def _fetch_streaming(session: requests.Session, url: str) -> tuple[requests.Response, str, dict]:
+    """GET su stream=True: (response, perskaitytas tekstas, info) – info["aborted"]=True, jei nutraukta."""
+    t0 = time.perf_counter()
+    r = session.get(url, timeout=25, allow_redirects=True, stream=True)
+    text, info = _read_body(r, t0)
+    return r, text, info
+
+
+# Probe režimas (FETCH_PROBE=1): /{id}/ užklausiamas be redirect'ų sekimo. Jei aruodas nukreipia
+# į skelbimo slug'ą ne Vilniuje – ID klasifikuojamas iš Location (FOUND, be datos), puslapis
+# nesiunčiamas. Vilniaus (ar neaiškūs) slug'ai ir ne-redirect atsakymai – pilnas kelias.
+# HEAD nenaudojamas: 200/404 atsakymui tektų antra užklausa, o GET body skaitomas tuo pačiu response.
+FETCH_PROBE = os.getenv("FETCH_PROBE", "0") == "1"
+PROBE_NEED_DATE = os.getenv("PROBE_NEED_DATE", "0") == "1"  # 1 -> pilnas puslapis visiems skelbimams
+_REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+
+def probe_needs_page(location: str, id_str: str) -> bool:
+    """Ar pagal redirect'o Location reikia pilno puslapio (Vilnius / ne skelbimo slug'as / reikia datos)."""
+    slug = urlparse(location).path.strip("/").split("/")[-1].lower()
+    id_low = id_str.lower()
+    if slug == id_low or not slug.endswith("-" + id_low):
+        return True  # ne skelbimo slug'as (paieška, challenge, ...) – iš URL nieko nežinom
+    if PROBE_NEED_DATE:
+        return True
+    # "vilniuje" – Vilniaus skelbimas; "vilniaus-r" ir pan. irgi tikrinam pilnai (sprendžia parse_html)
+    return "vilni" in slug
+
+
+def _fetch_probe(session: requests.Session, url: str, id_str: str) -> tuple[str, int, str, dict]:
+    """allow_redirects=False: (final_url, http_status, html, info)."""
+    t0 = time.perf_counter()
+    r = session.get(url, timeout=25, allow_redirects=False, stream=True)
+    location = r.headers.get("Location") if r.status_code in _REDIRECT_CODES else None
+    if not location:
+        text, info = _read_body(r, t0, early_abort=FETCH_STREAM)
+        return r.url, r.status_code, text, info
+
+    location = urljoin(url, location)
+    redirect_status = r.status_code
+    _ = r.content  # redirect'o body mažas – perskaitom, kad jungtis liktų pool'e
+    redirect_bytes = int(r.raw.tell() or 0)
+    r.close()
+    if not probe_needs_page(location, id_str):
+        info = {
+            "aborted": False,
+            "probe_only": True,
+            "bytes_read": redirect_bytes,
+            "bytes_saved": 0,
+            "ms": (time.perf_counter() - t0) * 1000.0,
+        }
+        return location, redirect_status, "", info
+
+    r = session.get(location, timeout=25, allow_redirects=True, stream=True)
+    text, info = _read_body(r, t0, early_abort=FETCH_STREAM)
+    info["bytes_read"] += redirect_bytes
+    return r.url, r.status_code, text, info
+
+
+# Priverstinis pertikrinimas (force): FOUND įrašai saugo validators (ETag, Last-Modified,
+# turinio hash'as). Pertikrinant final_url užklausiamas su If-None-Match / If-Modified-Since;
+# 304 arba tas pats hash'as -> naudojamas ankstesnis parse'as (tik atnaujinamas checked_at).
+VALIDATOR_KEYS = ("etag", "last_modified", "hash")
+RECHECK_KINDS = ("not_modified", "hash", "refetched")
+RECHECK_STATS = {k: 0 for k in RECHECK_KINDS}  # saugo FETCH_METRICS_LOCK
+
+
+def content_hash(html_text: str) -> str:
+    return hashlib.blake2b(html_text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def _fetch_conditional(session: requests.Session, url: str, validators: dict) -> tuple[str, int, str | None, dict]:
+    """GET su If-None-Match / If-Modified-Since: (final_url, http_status, html arba None (304), info)."""
+    t0 = time.perf_counter()
+    headers = {}
+    if validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    r = session.get(url, headers=headers, timeout=25, allow_redirects=True, stream=True)
+    if r.status_code != 304:
+        text, info = _read_body(r, t0, early_abort=FETCH_STREAM)
+        return r.url, r.status_code, text, info
+    _ = r.content  # 304 body neturi – perskaitom, kad jungtis liktų pool'e
+    r.close()
+    info = {
+        "aborted": False,
+        "probe_only": False,
+        "bytes_read": int(r.raw.tell() or 0),
+        "bytes_saved": 0,
+        "ms": (time.perf_counter() - t0) * 1000.0,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
+    return r.url, 304, None, info
+
+
+def _fetch_metrics_add(status: str, info: dict, recheck: str | None = None):
+    with FETCH_METRICS_LOCK:
+        m = FETCH_METRICS.get(status)
+        if m is None:
+            m = FETCH_METRICS[status] = {
+                "count": 0, "aborted": 0, "probe_only": 0, "bytes_read": 0, "bytes_saved": 0, "ms": 0.0,
+            }
+        m["count"] += 1
+        m["aborted"] += 1 if info["aborted"] else 0
+        m["probe_only"] += 1 if info.get("probe_only") else 0
+        m["bytes_read"] += info["bytes_read"]
+        m["bytes_saved"] += info["bytes_saved"]
+        m["ms"] += info["ms"]
+        if recheck is not None:
+            RECHECK_STATS[recheck] += 1
+
+
+def fetch_metrics() -> dict:
+    """Per status: fetch'ų skaičius, nutraukti, perskaityta/sutaupyta baitų (wire), vid. baitai ir ms per ID."""
+    with FETCH_METRICS_LOCK:
+        out = {}
+        for status, m in FETCH_METRICS.items():
+            n = max(1, m["count"])
+            out[status] = {
+                **m,
+                "ms": round(m["ms"], 1),
+                "avg_bytes": round(m["bytes_read"] / n),
+                "avg_ms": round(m["ms"] / n, 1),
+            }
+        return {"stream": FETCH_STREAM, "probe": FETCH_PROBE, "by_status": out, "recheck": dict(RECHECK_STATS)}
+
+
+def fetch_page(id_str: str, prior: dict | None = None) -> tuple[dict, str | None, str]:
+    """Fetch + parse vienam ID: (rezultatas, html arba None, kaip gautas).
+
+    Leidžia iki TARGET_CONCURRENCY paralelinių fetch'ų. Su FETCH_STREAM grąžinamas html gali
+    būti tik puslapio pradžia (NOT_FOUND / CHALLENGE), su FETCH_PROBE – tuščias (ID
+    klasifikuotas iš redirect'o). prior – ankstesnis įrašas (force pertikrinimas): jei tai
+    FOUND su validators – sąlyginė užklausa, kaip gauta: "not_modified" (304, html None) /
+    "hash" (tas pats turinys) / "refetched"; be prior – "fetched".
+    """
+    url = f"{TARGET_BASE_URL}/{id_str}/"
+    validators = None
+    if prior is not None and prior.get("status") == "FOUND" and prior.get("final_url"):
+        validators = prior.get("validators") if isinstance(prior.get("validators"), dict) else None
+
+    token = CONTROLLER.before_request()
+    kind = "error"
+    try:
+        with TARGET_SEM:
+            rate_limit()
+            session = get_session()
+            if validators is not None:
+                final_url, http_status, html_text, info = _fetch_conditional(session, prior["final_url"], validators)
+            elif FETCH_PROBE:
+                final_url, http_status, html_text, info = _fetch_probe(session, url, id_str)
+            elif FETCH_STREAM:
+                r, html_text, info = _fetch_streaming(session, url)
+                final_url, http_status = r.url, r.status_code
+            else:
+                t0 = time.perf_counter()
+                r = session.get(url, timeout=25, allow_redirects=True)
+                info = {"aborted": False, "probe_only": False, "bytes_read": len(r.content), "bytes_saved": 0,
+                        "ms": (time.perf_counter() - t0) * 1000.0,
+                        "etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+                final_url, http_status = r.url, r.status_code
+                if not r.encoding:
+                    r.encoding = "utf-8"
+                html_text = r.text
+
+        digest = content_hash(html_text) if html_text and not info["aborted"] else None
+        how = "fetched" if prior is None else "refetched"
+        if validators is not None and (
+            http_status == 304
+            or (digest is not None and digest == validators.get("hash") and http_status == prior.get("http_status")
+                and prior.get("parser_version") == PARSER_VERSION)
+        ):
+            how = "not_modified" if http_status == 304 else "hash"
+            out = dict(prior)
+            out["checked_at"] = now_iso()
+            out["validators"] = {
+                "etag": info.get("etag") or validators.get("etag"),
+                "last_modified": info.get("last_modified") or validators.get("last_modified"),
+                "hash": validators.get("hash"),
+            }
+            http_status = prior.get("http_status")
+        else:
+            parsed = parse_page(html_text or "", final_url=final_url, http_status=http_status)
+            out = {
+                "id": id_str,
+                "checked_at": now_iso(),
+                "http_status": http_status,
+                **parsed,
+            }
+            if parsed["status"] == "FOUND" and digest is not None:
+                out["validators"] = {"etag": info.get("etag"), "last_modified": info.get("last_modified"), "hash": digest}
+
+        _fetch_metrics_add(out["status"], info, how if how != "fetched" else None)
+        kind = feedback_kind(http_status, out["status"])
+    except (requests.Timeout, requests.ConnectionError):
+        kind = "timeout"
+        raise
+    finally:
+        CONTROLLER.on_result(kind, token)
+
+    return out, html_text, how
+
+
+def make_error_result(id_str: str, err) -> dict:
+    """ERROR įrašas (tokia pati forma kaip fetch_page rezultatas)."""
+    return {
+        "id": id_str,
+        "checked_at": now_iso(),
+        "status": "ERROR",
+        "error": str(err),
+        "http_status": None,
+        "inserted_date": None,
+        "city": None,
+        "district": None,
+        "final_url": None,
+        "sugiharos_found": False,
+        "sugiharos_snippet_html": None,
+    }
+
+
+# =========================
+# Įvykiai (SSE /api/events)
+# =========================
+# Kiekvienas prenumeratorius turi ribotą eilę; jei jis nespėja skaityti ir eilė
+# prisipildo – jis atjungiamas (kitiems ir crawl'ui tai neturi įtakos).
+EVENTS_QUEUE_MAX = int(os.getenv("EVENTS_QUEUE_MAX", "1000"))
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "4"))  # kiekvienas laiko vieną gunicorn thread'ą
+EVENTS_TICK_SECONDS = float(os.getenv("EVENTS_TICK_SECONDS", "2"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+
+
+class _Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self):
+        self.queue: deque = deque()
+        self.dropped = False
+
+
+class EventHub:
+    """Fan-out: publish() – O(prenumeratorių), tik deque.append po trumpu lock'u."""
+
+    def __init__(self, queue_max: int, max_subscribers: int):
+        self.queue_max = max(1, int(queue_max))
+        self.max_subscribers = max(0, int(max_subscribers))
+        self._cond = threading.Condition(threading.Lock())
+        self._subs: list[_Subscriber] = []
+        self._seq = 0
+        self.dropped_total = 0
+
+    def subscribe(self) -> _Subscriber | None:
+        with self._cond:
+            if len(self._subs) >= self.max_subscribers:
+                return None
+            sub = _Subscriber()
+            self._subs.append(sub)
+            return sub
+
+    def unsubscribe(self, sub: _Subscriber):
+        with self._cond:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def publish(self, event: str, data):
+        with self._cond:
+            if not self._subs:
+                return
+            self._seq += 1
+            item = (self._seq, event, data)
+            for sub in list(self._subs):
+                if len(sub.queue) >= self.queue_max:
+                    sub.dropped = True  # lėtas vartotojas – atjungiam
+                    self._subs.remove(sub)
+                    self.dropped_total += 1
+                    continue
+                sub.queue.append(item)
+            self._cond.notify_all()
+
+    def wait(self, sub: _Subscriber, timeout: float) -> list:
+        """Laukia įvykių iki timeout; grąžina visus sukauptus (gali būti tuščias)."""
+        with self._cond:
+            if not sub.queue and not sub.dropped:
+                self._cond.wait(timeout)
+            items = list(sub.queue)
+            sub.queue.clear()
+            return items
+
+    def subscriber_count(self) -> int:
+        with self._cond:
+            return len(self._subs)
+
+
+EVENTS = EventHub(EVENTS_QUEUE_MAX, EVENTS_MAX_SUBSCRIBERS)
+
+
+# =========================
+# Persistencija (istorija)
+# =========================
+def _state_meta() -> dict:
+    """config + range + job + frontier (be CACHE) – rašoma į journal'ą ir į snapshot'ą."""
+    return {
+        "config": {
+            "min_interval": MIN_INTERVAL_SECONDS,
+            "adaptive": CONTROLLER.enabled,
+            "jitter": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
+            "allowed_rates": ALLOWED_RATE_LIMITS,
+        },
+        "range": {
+            "start": START_NUM,
+            "end": END_NUM,
+            "step": STEP,
+        },
+        "job": job_snapshot(),
+        "frontier": frontier_snapshot(),
+    }
+
+
+def _apply_state_meta(meta: dict):
+    """Pritaiko tik esančias dalis (shared_sync perduoda tik pasikeitusias)."""
+    global START_NUM, END_NUM, STEP
+
+    meta = meta or {}
+    if "config" in meta:
+        cfg = meta.get("config") or {}
+        min_int = _safe_float(cfg.get("min_interval"), MIN_INTERVAL_SECONDS)
+        if is_allowed_rate(min_int):
+            set_min_interval(min_int)
+        if "adaptive" in cfg:
+            CONTROLLER.set_enabled(cfg.get("adaptive") is True, MIN_INTERVAL_SECONDS)
+
+    if "range" in meta:
+        rng = meta.get("range") or {}
+        try:
+            start = int(rng.get("start", START_NUM))
+            end = int(rng.get("end", END_NUM))
+            step = int(rng.get("step", STEP))
+            start, end, step = normalize_range(start, end, step)
+            START_NUM, END_NUM, STEP = start, end, step
+        except Exception:
+            pass
+
+    if "job" in meta:
+        restore_job_state(meta.get("job"))
+
+    if "frontier" in meta:
+        restore_frontier_state(meta.get("frontier"))
+
+
+def _replay_journal(path: Path, meta: dict, target=None) -> int:
+    """Pritaiko journal'o įrašus CACHE'ui arba target dict'ui (CALL ONLY UNDER CACHE_LOCK).
+
+    Nukirstą paskutinę eilutę (crash rašant) nupjaunam, kad nauji įrašai
+    nebūtų prilipdyti prie sugadintos eilutės. Sugadinta eilutė vidury failo (po jos yra
+    sveikų įrašų) praleidžiama ir skaičiuojama PERSIST_METRICS["journal_skipped"] – failas
+    nekarpomas. Grąžina pritaikytų įrašų kiekį.
+    """
+    if not path.exists():
+        return 0
+
+    if target is None:
+        target = CACHE
+    applied = 0
+    pos = 0
+    good_end = 0  # paskutinio sveiko įrašo pabaiga
+    bad = 0       # sugadintos eilutės po good_end
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                pos += len(line)
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("nukirsta eilutė")
+                    rec = json.loads(line)
+                except Exception:
+                    bad += 1
+                    continue
+                PERSIST_METRICS["journal_skipped"] += bad
+                bad = 0
+                good_end = pos
+                if not isinstance(rec, dict):
+                    continue
+                t = rec.get("t")
+                if t == "r":
+                    e = rec.get("e")
+                    if isinstance(e, dict) and isinstance(e.get("id"), str):
+                        target[e["id"]] = e
+                        applied += 1
+                elif t == "m":
+                    meta.clear()
+                    meta.update({k: rec.get(k) for k in STATE_META_PARTS})
+                    applied += 1
+
+        if good_end < path.stat().st_size:
+            with open(path, "r+b") as f:
+                f.truncate(good_end)
+    except Exception:
+        pass
+    return applied
+
+
+def _load_legacy_into_sqlite() -> dict:
+    """Vienkartinis importas: snapshot'as + journal'ai -> tuščia SQLite DB. Grąžina meta."""
+    data = {}
+    if STATE_FILE.exists():
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+        except Exception:
+            data = {}
+
+    meta = {k: data.get(k) for k in STATE_META_PARTS}
+    legacy = {}
+    cached = data.get("cache") or {}
+    if isinstance(cached, dict):
+        for k, v in cached.items():
+            if isinstance(k, str) and isinstance(v, dict) and "id" in v:
+                legacy[k] = v
+    del data, cached
+
+    with CACHE_LOCK:
+        _replay_journal(JOURNAL_OLD_FILE, meta, legacy)
+        _replay_journal(JOURNAL_FILE, meta, legacy)
+
+    recs = [{"t": "r", "e": e} for e in legacy.values()]
+    if any(meta.values()):
+        recs.append({"t": "m", **meta})
+    for i in range(0, len(recs), 5000):
+        CACHE.commit_records(recs[i:i + 5000])
+    return meta
+
+
+def load_state_from_disk():
+    """Užkrauna CACHE + config (rate limit) + range: snapshot'as + journal'o replay
+    (arba SQLite DB – STATE_BACKEND=sqlite)."""
+    global _last_state_save_mono, _dirty_since_save, _journal_records, _last_compaction_mono
+
+    if STATE_BACKEND == "sqlite":
+        meta = None
+        if CACHE.is_empty():
+            meta = _load_legacy_into_sqlite()
+        if meta is None or not any(meta.values()):
+            meta = CACHE.load_meta() or {}
+        _apply_state_meta(meta)
+        _last_state_save_mono = time.monotonic()
+        _last_compaction_mono = _last_state_save_mono
+        _dirty_since_save = 0
+        return
+
+    data = {}
+    if STATE_FILE.exists():
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+        except Exception:
+            data = {}
+
+    meta = {k: data.get(k) for k in STATE_META_PARTS}
+
+    cached = data.get("cache") or {}
+    with CACHE_LOCK:
+        if isinstance(cached, dict):
+            for k, v in cached.items():
+                if isinstance(k, str) and isinstance(v, dict) and "id" in v:
+                    CACHE[k] = v
+        del data, cached
+
+        # ankstesnė kompaktacija galėjo nepabaigti – senas journal'as eina pirmas
+        replayed_old = _replay_journal(JOURNAL_OLD_FILE, meta)
+        _journal_records = _replay_journal(JOURNAL_FILE, meta)
+
+    _apply_state_meta(meta)
+
+    _last_state_save_mono = time.monotonic()
+    _last_compaction_mono = _last_state_save_mono
+    _dirty_since_save = 0
+
+    if replayed_old:
+        compact_state()
+
+
+def _write_snapshot(payload: dict, cache=None):
+    """Atominis snapshot'o įrašymas (tmp + fsync + os.replace).
+
+    cache rašomas srautu (po įrašą), kad kompaktiško CACHE nereikėtų
+    visą iš karto paversti dict'ais.
+    """
+    tmp = STATE_FILE.with_suffix(".tmp")
+    try:
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            head = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+            if cache is None:
+                f.write(head)
+            else:
+                f.write(head[:-1] + ("," if payload else "") + '"cache":{')
+                buf = []
+                sep = ""
+                for k, v in cache.items():
+                    buf.append(json.dumps(k) + ":" + json.dumps(v, ensure_ascii=False, separators=(",", ":")))
+                    if len(buf) >= 1000:
+                        f.write(sep + ",".join(buf))
+                        sep, buf = ",", []
+                if buf:
+                    f.write(sep + ",".join(buf))
+                f.write("}}")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, STATE_FILE)
+        return True
+    except Exception:
+        try:
+            if tmp.exists():
+                tmp.unlink()
+        except Exception:
+            pass
+        return False
+
+
+def _persist_enqueue(rec: dict, urgent: bool = False):
+    """Įdeda įrašą į persister'io buferį (pigu: list.append po trumpu lock'u)."""
+    global _persist_oldest_mono, _persist_urgent
+    with _persist_cond:
+        if not _persist_pending:
+            _persist_oldest_mono = time.monotonic()
+        _persist_pending.append(rec)
+        if urgent:
+            _persist_urgent = True
+        if urgent or len(_persist_pending) >= PERSIST_GROUP_COMMIT_N:
+            _persist_cond.notify()
+
+
+def cache_put_locked(id_str: str, entry: dict, publish: bool = True):
+    """Įrašo rezultatą į CACHE ir įdeda journal įrašą į persister'io eilę (CALL ONLY UNDER CACHE_LOCK).
+
+    Įrašai CACHE'e niekada nekeičiami vietoje (tik pakeičiami nauju dict'u),
+    todėl kompaktacijai užtenka paviršinės CACHE kopijos.
+    publish=False – masiniams atnaujinimams (reparse), kad SSE klientai nebūtų užtvindyti.
+    """
+    CACHE[id_str] = entry
+    _persist_enqueue({"t": "r", "e": entry})
+    if publish:
+        EVENTS.publish("result", entry)
+
+
+def _journal_write_records(records: list) -> int:
+    """Rašo grupę įrašų į journal'ą (tik persister thread'as). Grąžina baitus.
+
+    Nepavykus – failas grąžinamas į dydį prieš grupę (persister'is ją kartos visą).
+    """
+    global _journal_fh
+    if _journal_fh is None:
+        JOURNAL_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _journal_fh = open(JOURNAL_FILE, "a", encoding="utf-8")
+    data = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records)
+    start = os.fstat(_journal_fh.fileno()).st_size
+    try:
+        _journal_fh.write(data)
+        _journal_fh.flush()
+    except Exception:
+        # pvz. ENOSPC: pusiau įrašytą grupę nupjaunam, kad pakartota neprisilipdytų prie nukirstos eilutės
+        fh, _journal_fh = _journal_fh, None
+        try:
+            fh.close()
+        except Exception:
+            pass
+        try:
+            os.truncate(JOURNAL_FILE, start)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def _journal_fsync():
+    if _journal_fh is None:
+        return
+    t0 = time.perf_counter()
+    os.fsync(_journal_fh.fileno())
+    PERSIST_METRICS["fsyncs"] += 1
+    PERSIST_METRICS["last_fsync_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+
+
+def compact_state() -> bool:
+    """Kompaktacija: journal'as + CACHE -> naujas snapshot'as (tik persister thread'as arba startup).
+
+    Po CACHE_LOCK – tik paviršinė CACHE kopija ir meta. Journal'o rotacija,
+    serializacija ir rašymas – be lock'o. Crash bet kuriuo momentu saugus:
+    load'as replay'ina journal.old ir journal ant seno ar naujo snapshot'o.
+    """
+    global _journal_fh, _journal_records, _last_compaction_mono
+
+    t0 = time.perf_counter()
+    try:
+        if _journal_fh is not None:
+            _journal_fh.flush()
+            os.fsync(_journal_fh.fileno())
+            _journal_fh.close()
+            _journal_fh = None
+        if JOURNAL_FILE.exists():
+            if JOURNAL_OLD_FILE.exists():
+                # nepavykusi ankstesnė kompaktacija: prijungiam prie seno
+                with open(JOURNAL_OLD_FILE, "ab") as dst, open(JOURNAL_FILE, "rb") as src:
+                    while True:
+                        chunk = src.read(1 << 20)
+                        if not chunk:
+                            break
+                        dst.write(chunk)
+                JOURNAL_FILE.unlink()
+            else:
+                os.replace(JOURNAL_FILE, JOURNAL_OLD_FILE)
+    except Exception:
+        PERSIST_METRICS["errors"] += 1
+        _journal_records = 0  # kitas bandymas – po naujų įrašų / intervalo
+        _last_compaction_mono = time.monotonic()
+        return False
+
+    t_lock = time.perf_counter()
+    with CACHE_LOCK:
+        snapshot = CACHE.copy()
+        meta = _state_meta()
+    PERSIST_METRICS["last_snapshot_copy_ms"] = round((time.perf_counter() - t_lock) * 1000, 3)
+    _journal_records = 0
+
+    payload = {"version": 2, "saved_at": now_iso(), **meta}
+    ok = _write_snapshot(payload, snapshot)
+    if ok:
+        try:
+            if JOURNAL_OLD_FILE.exists():
+                JOURNAL_OLD_FILE.unlink()
+        except Exception:
+            pass
+    else:
+        PERSIST_METRICS["errors"] += 1
+
+    _last_compaction_mono = time.monotonic()
+    PERSIST_METRICS["compactions"] += 1
+    PERSIST_METRICS["last_compaction_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    PERSIST_METRICS["last_compaction_at"] = now_iso()
+    return ok
+
+
+def _persist_loop():
+    """Persister thread'as: group commit į journal'ą, fsync pagal PERSIST_FSYNC, kompaktacija.
+
+    Rašantys thread'ai tik įdeda įrašą į buferį; buferiai sukeičiami (double-buffer)
+    po trumpu _persist_cond lock'u, o JSON serializacija ir disko I/O – be jokių lock'ų.
+    Nepavykusi grupė grąžinama į buferio priekį ir kartojama po PERSIST_RETRY_SECONDS backoff'o;
+    klaidos tekstas – PERSIST_METRICS["last_error"], persist_flush() tuo metu nelaikomas įvykdytu.
+    """
+    global _persist_pending, _persist_oldest_mono, _persist_urgent, _persist_flush_done, _journal_records
+    last_fsync = time.monotonic()
+    dirty_since_fsync = False
+    retry = 0.0
+
+    while True:
+        with _persist_cond:
+            deadline = None
+            while True:
+                now = time.monotonic()
+                if _persist_pending:
+                    age = now - _persist_oldest_mono
+                    if _persist_urgent or len(_persist_pending) >= PERSIST_GROUP_COMMIT_N or age >= PERSIST_GROUP_COMMIT_SECONDS:
+                        break
+                    deadline = PERSIST_GROUP_COMMIT_SECONDS - age
+                elif _persist_flush_requested > _persist_flush_done:
+                    break
+                else:
+                    deadline = 1.0
+                    if dirty_since_fsync and PERSIST_FSYNC == "interval":
+                        deadline = max(0.0, PERSIST_FSYNC_INTERVAL_SECONDS - (now - last_fsync))
+                        if deadline == 0.0:
+                            break
+                    if (_journal_records > 0 and _journal_records >= max(JOURNAL_COMPACT_MIN_RECORDS, len(CACHE))) or (
+                        _journal_records > 0 and now - _last_compaction_mono >= STATE_COMPACT_INTERVAL_SECONDS
+                    ):
+                        break
+                _persist_cond.wait(deadline)
+
+            batch = _persist_pending
+            batch_oldest = _persist_oldest_mono
+            _persist_pending = []
+            serving = _persist_flush_requested
+            urgent = _persist_urgent or serving > _persist_flush_done
+            _persist_urgent = False
+            lag = (time.monotonic() - _persist_oldest_mono) if batch else 0.0
+
+        t0 = time.perf_counter()
+        written = not batch
+        try:
+            if batch and STATE_BACKEND == "sqlite":
+                # viena transakcija grupei; fsync'ą valdo PRAGMA synchronous
+                t_w = time.perf_counter()
+                CACHE.commit_records(batch)
+                written = True
+                PERSIST_METRICS["commits"] += 1
+                PERSIST_METRICS["records_written"] += len(batch)
+                PERSIST_METRICS["last_batch_records"] = len(batch)
+                PERSIST_METRICS["last_lag_ms"] = round(lag * 1000, 3)
+                PERSIST_METRICS["max_lag_ms"] = max(PERSIST_METRICS["max_lag_ms"], PERSIST_METRICS["last_lag_ms"])
+                PERSIST_METRICS["last_fsync_ms"] = round((time.perf_counter() - t_w) * 1000, 3)
+            elif batch:
+                nbytes = _journal_write_records(batch)
+                written = True
+                _journal_records += len(batch)
+                dirty_since_fsync = True
+                PERSIST_METRICS["commits"] += 1
+                PERSIST_METRICS["records_written"] += len(batch)
+                PERSIST_METRICS["bytes_written"] += nbytes
+                PERSIST_METRICS["last_batch_records"] = len(batch)
+                PERSIST_METRICS["last_lag_ms"] = round(lag * 1000, 3)
+                PERSIST_METRICS["max_lag_ms"] = max(PERSIST_METRICS["max_lag_ms"], PERSIST_METRICS["last_lag_ms"])
+
+            now = time.monotonic()
+            if dirty_since_fsync and (
+                PERSIST_FSYNC == "always"
+                or urgent and PERSIST_FSYNC != "never"
+                or PERSIST_FSYNC == "interval" and now - last_fsync >= PERSIST_FSYNC_INTERVAL_SECONDS
+            ):
+                _journal_fsync()
+                last_fsync = now
+                dirty_since_fsync = False
+        except Exception as e:
+            PERSIST_METRICS["errors"] += 1
+            PERSIST_METRICS["last_error"] = f"{type(e).__name__}: {e}"
+            PERSIST_METRICS["last_error_at"] = now_iso()
+
+        if not written:
+            # grupė (visa) neįrašyta: atgal į priekį – vėlesni tų pačių ID įrašai lieka po jos
+            with _persist_cond:
+                _persist_pending = batch + _persist_pending
+                _persist_oldest_mono = batch_oldest
+                if urgent:
+                    _persist_urgent = True
+            PERSIST_METRICS["retries"] += 1
+            retry = min(PERSIST_RETRY_SECONDS[1], retry * 2 if retry else PERSIST_RETRY_SECONDS[0])
+            time.sleep(retry)
+            continue
+        retry = 0.0
+
+        if batch:
+            ms = (time.perf_counter() - t0) * 1000
+            PERSIST_METRICS["last_commit_ms"] = round(ms, 3)
+            PERSIST_METRICS["max_commit_ms"] = max(PERSIST_METRICS["max_commit_ms"], round(ms, 3))
+
+        if _journal_records > 0 and (
+            _journal_records >= max(JOURNAL_COMPACT_MIN_RECORDS, len(CACHE))
+            or time.monotonic() - _last_compaction_mono >= STATE_COMPACT_INTERVAL_SECONDS
+        ):
+            compact_state()
+            last_fsync = time.monotonic()
+            dirty_since_fsync = False
+
+        with _persist_cond:
+            _persist_flush_done = max(_persist_flush_done, serving)
+            _persist_cond.notify_all()  # persist_flush() laukiantiems
+
+
+def persist_flush(timeout: float = 5.0) -> bool:
+    """Paprašo persister'io iškart įrašyti (+fsync) buferį ir palaukia (pvz. prieš išjungimą)."""
+    global _persist_flush_requested
+    end = time.monotonic() + timeout
+    with _persist_cond:
+        _persist_flush_requested += 1
+        mine = _persist_flush_requested
+        _persist_cond.notify_all()
+        while _persist_flush_done < mine:
+            left = end - time.monotonic()
+            if left <= 0:
+                return False
+            _persist_cond.wait(left)
+    return True
+
+
+def persist_metrics() -> dict:
+    with _persist_cond:
+        pending = len(_persist_pending)
+        lag = (time.monotonic() - _persist_oldest_mono) if pending else 0.0
+    m = dict(PERSIST_METRICS)
+    m.update({
+        "pending": pending,
+        "lag_ms": round(lag * 1000, 3),
+        "journal_records": _journal_records,
+        "group_commit_n": PERSIST_GROUP_COMMIT_N,
+        "group_commit_ms": PERSIST_GROUP_COMMIT_SECONDS * 1000,
+        "fsync": PERSIST_FSYNC,
+        "fsync_interval_seconds": PERSIST_FSYNC_INTERVAL_SECONDS,
+    })
+    return m
+
+
+def mark_state_dirty_locked(force: bool = False, parts: tuple = ()):
+    """Meta įrašas (config/range/job) kas STATE_SAVE_EVERY_N / STATE_SAVE_MIN_INTERVAL_SECONDS,
+    force – iš karto ir su fsync. Disko I/O čia nėra – viskas persister thread'e.
+    Rezultatai į eilę jau įdėti per cache_put_locked. CALL ONLY UNDER CACHE_LOCK.
+
+    SHARED_STATE: rašomos tik parts (šio worker'io pakeistos dalys) + job / frontier (jei juos vykdo šis
+    worker'is) – kad pasenusios kopijos neperrašytų kitų worker'ių config / range."""
+    global _dirty_since_save, _last_state_save_mono
+
+    _dirty_since_save += 1
+    now = time.monotonic()
+    if force or _dirty_since_save >= STATE_SAVE_EVERY_N or (now - _last_state_save_mono) >= STATE_SAVE_MIN_INTERVAL_SECONDS:
+        meta = _state_meta()
+        if SHARED_STATE:
+            keep = set(parts) | ({"job", "frontier"} if is_job_owner() else set())
+            meta = {k: v for k, v in meta.items() if k in keep}
+        if meta:
+            _persist_enqueue({"t": "m", **meta}, urgent=force)
+        _dirty_since_save = 0
+        _last_state_save_mono = now
+
+
+def get_cached_stats_for_current_range_locked() -> dict:
+    return CACHE.stats_range(START_NUM, END_NUM)
+
+
+# =========================
+# Intervalo dalinimas tarp instancijų (lease sharding)
+# =========================
+# Didelis intervalas dalinamas į SHARD_BLOCK_SIZE blokus; kiekviena instancija (Fly mašina / procesas)
+# blokus nuomojasi iš bendro koordinatoriaus: SQLite failas (tas pats host'as) arba kito node'o
+# /api/shard/* (SHARD_COORDINATOR=http://...). Nuoma pratęsiama heartbeat'u kas SHARD_LEASE_SECONDS/3;
+# mirusios instancijos blokas po SHARD_LEASE_SECONDS atiduodamas kitai nuo paskutinio pranešto cursor'iaus.
+SHARD_COORDINATOR = (os.getenv("SHARD_COORDINATOR") or "").strip().rstrip("/")
+SHARD_DB_FILE = Path(os.getenv("SHARD_DB_FILE") or STATE_FILE.with_suffix(".shards.sqlite3"))
+SHARD_BLOCK_SIZE = max(1, int(os.getenv("SHARD_BLOCK_SIZE", "1000")))
+SHARD_LEASE_SECONDS = float(os.getenv("SHARD_LEASE_SECONDS", "60"))
+SHARD_POLL_SECONDS = float(os.getenv("SHARD_POLL_SECONDS", "2"))  # visi blokai išnuomoti – po kiek bandom vėl
+SHARD_INSTANCE = (
+    os.getenv("SHARD_INSTANCE") or os.getenv("FLY_MACHINE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+)
+
+
+class ShardCoordinator:
+    """Blokų nuoma SQLite'e: run'as (start..end, bloko dydis) + po eilutę kiekvienam blokui.
+
+    Visos operacijos – BEGIN IMMEDIATE transakcijos, todėl saugu keliems procesams.
+    Blokas: owner + lease_until (time.time()) + cursor (pirmas neapdorotas ID) + done.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS shard_runs (
+            key TEXT PRIMARY KEY,
+            start INTEGER NOT NULL,
+            end INTEGER NOT NULL,
+            block_size INTEGER NOT NULL,
+            created_at TEXT,
+            finished_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS shard_blocks (
+            key TEXT NOT NULL,
+            block INTEGER NOT NULL,
+            lo INTEGER NOT NULL,
+            hi INTEGER NOT NULL,
+            cursor INTEGER NOT NULL,
+            owner TEXT,
+            lease_until REAL NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0,
+            leases INTEGER NOT NULL DEFAULT 0,   -- kiek kartų išnuomotas (>1 – perduotas kitam)
+            PRIMARY KEY (key, block)
+        );
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def _tx(self, fn):
+        with self._lock:
+            c = self._conn
+            c.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(c)
+                c.execute("COMMIT")
+            except Exception:
+                c.execute("ROLLBACK")
+                raise
+        return out
+
+    @staticmethod
+    def _progress(c, key: str) -> dict:
+        total, done = c.execute(
+            "SELECT COUNT(*), COALESCE(SUM(done), 0) FROM shard_blocks WHERE key = ?", (key,)
+        ).fetchone()
+        return {"blocks_total": total, "blocks_done": done}
+
+    def join(self, start: int, end: int, block_size: int) -> dict:
+        """Neužbaigtas run'as tam pačiam intervalui (prisijungiam) arba naujas."""
+        def fn(c):
+            row = c.execute(
+                "SELECT key, block_size FROM shard_runs WHERE start = ? AND end = ? AND finished_at IS NULL",
+                (start, end),
+            ).fetchone()
+            if row is None:
+                key = f"{start}-{end}-{time.time_ns()}"
+                c.execute(
+                    "INSERT INTO shard_runs (key, start, end, block_size, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, start, end, block_size, now_iso()),
+                )
+                c.executemany(
+                    "INSERT INTO shard_blocks (key, block, lo, hi, cursor) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (key, i, lo, min(end, lo + block_size - 1), lo)
+                        for i, lo in enumerate(range(start, end + 1, block_size))
+                    ),
+                )
+                row = (key, block_size)
+            return {"key": row[0], "block_size": row[1], **self._progress(c, row[0])}
+
+        return self._tx(fn)
+
+    def lease(self, key: str, owner: str, lease_seconds: float) -> dict:
+        """Savas dar galiojantis blokas (po restarto) arba pirmas laisvas / pasibaigusios nuomos.
+
+        Grąžina {"block", "lo", "hi", "cursor", ...}, {"done": True} – viskas baigta,
+        arba {"block": None} – likę blokai išnuomoti kitiems.
+        """
+        def fn(c):
+            now = time.time()
+            row = c.execute(
+                "SELECT block, lo, hi, cursor FROM shard_blocks"
+                " WHERE key = ? AND done = 0 AND owner = ? AND lease_until >= ? ORDER BY block LIMIT 1",
+                (key, owner, now),
+            ).fetchone()
+            if row is None:
+                row = c.execute(
+                    "SELECT block, lo, hi, cursor FROM shard_blocks"
+                    " WHERE key = ? AND done = 0 AND (owner IS NULL OR lease_until < ?) ORDER BY block LIMIT 1",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    c.execute(
+                        "UPDATE shard_blocks SET leases = leases + 1 WHERE key = ? AND block = ?", (key, row[0])
+                    )
+            prog = self._progress(c, key)
+            if row is None:
+                if prog["blocks_done"] >= prog["blocks_total"]:
+                    c.execute(
+                        "UPDATE shard_runs SET finished_at = COALESCE(finished_at, ?) WHERE key = ?", (now_iso(), key)
+                    )
+                    return {"done": True, "block": None, **prog}
+                return {"done": False, "block": None, **prog}
+            c.execute(
+                "UPDATE shard_blocks SET owner = ?, lease_until = ? WHERE key = ? AND block = ?",
+                (owner, now + lease_seconds, key, row[0]),
+            )
+            return {"done": False, "block": row[0], "lo": row[1], "hi": row[2], "cursor": row[3], **prog}
+
+        return self._tx(fn)
+
+    def heartbeat(self, key: str, block: int, owner: str, cursor: int, lease_seconds: float) -> bool:
+        """Pratęsia nuomą ir įsimena cursor'ių; False – blokas jau perduotas kitam (nebetęsti)."""
+        def fn(c):
+            cur = c.execute(
+                "UPDATE shard_blocks SET lease_until = ?, cursor = MAX(cursor, ?)"
+                " WHERE key = ? AND block = ? AND owner = ? AND done = 0",
+                (time.time() + lease_seconds, cursor, key, block, owner),
+            )
+            return cur.rowcount == 1
+
+        return self._tx(fn)
+
+    def release(self, key: str, block: int, owner: str, cursor: int) -> bool:
+        """Atiduoda bloką (pauzė / atšaukimas) – kitas tęs nuo cursor."""
+        def fn(c):
+            cur = c.execute(
+                "UPDATE shard_blocks SET owner = NULL, lease_until = 0, cursor = MAX(cursor, ?)"
+                " WHERE key = ? AND block = ? AND owner = ? AND done = 0",
+                (cursor, key, block, owner),
+            )
+            return cur.rowcount == 1
+
+        return self._tx(fn)
+
+    def complete(self, key: str, block: int, owner: str) -> bool:
+        def fn(c):
+            cur = c.execute(
+                "UPDATE shard_blocks SET done = 1, cursor = hi + 1, lease_until = 0"
+                " WHERE key = ? AND block = ? AND owner = ? AND done = 0",
+                (key, block, owner),
+            )
+            return cur.rowcount == 1
+
+        return self._tx(fn)
+
+    def status(self, key: str) -> dict:
+        with self._lock:
+            c = self._conn
+            run = c.execute(
+                "SELECT start, end, block_size, created_at, finished_at FROM shard_runs WHERE key = ?", (key,)
+            ).fetchone()
+            if run is None:
+                return {"key": key, "exists": False}
+            now = time.time()
+            owners = dict(c.execute(
+                "SELECT owner, COUNT(*) FROM shard_blocks WHERE key = ? AND done = 0 AND owner IS NOT NULL"
+                " AND lease_until >= ? GROUP BY owner",
+                (key, now),
+            ).fetchall())
+            reassigned = c.execute(
+                "SELECT COUNT(*) FROM shard_blocks WHERE key = ? AND leases > 1", (key,)
+            ).fetchone()[0]
+            return {
+                "key": key,
+                "exists": True,
+                "start": run[0],
+                "end": run[1],
+                "block_size": run[2],
+                "created_at": run[3],
+                "finished_at": run[4],
+                "leased_by": owners,
+                "reassigned_blocks": reassigned,
+                **self._progress(c, key),
+            }
+
+
+class HttpShardCoordinator:
+    """Ta pati sąsaja per kito node'o /api/shard/* (ten – ShardCoordinator)."""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _post(self, op: str, **payload):
+        r = self._session.post(f"{self.base_url}/api/shard/{op}", json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()["result"]
+
+    def join(self, start: int, end: int, block_size: int) -> dict:
+        return self._post("join", start=start, end=end, block_size=block_size)
+
+    def lease(self, key: str, owner: str, lease_seconds: float) -> dict:
+        return self._post("lease", key=key, owner=owner, lease_seconds=lease_seconds)
+
+    def heartbeat(self, key: str, block: int, owner: str, cursor: int, lease_seconds: float) -> bool:
+        return self._post("heartbeat", key=key, block=block, owner=owner, cursor=cursor, lease_seconds=lease_seconds)
+
+    def release(self, key: str, block: int, owner: str, cursor: int) -> bool:
+        return self._post("release", key=key, block=block, owner=owner, cursor=cursor)
+
+    def complete(self, key: str, block: int, owner: str) -> bool:
+        return self._post("complete", key=key, block=block, owner=owner)
+
+    def status(self, key: str) -> dict:
+        return self._post("status", key=key)
+
+
+_shard_local: ShardCoordinator | None = None
+_shard_local_lock = threading.Lock()
+
+
+def shard_local() -> ShardCoordinator:
+    """Šio node'o SQLite koordinatorius (ir /api/shard/* kitiems node'ams) – kuriamas tingiai."""
+    global _shard_local
+    with _shard_local_lock:
+        if _shard_local is None:
+            _shard_local = ShardCoordinator(SHARD_DB_FILE)
+        return _shard_local
+
+
+_shard_http: HttpShardCoordinator | None = None
+
+
+def shard_coordinator():
+    global _shard_http
+    if not SHARD_COORDINATOR:
+        return shard_local()
+    if _shard_http is None:
+        _shard_http = HttpShardCoordinator(SHARD_COORDINATOR)
+    return _shard_http
+
+
+# =========================
+# Tankio prioritetai (density scheduling)
+# =========================
+# Skelbimai ID erdvėje pasiskirstę netolygiai: vienuose blokuose gyvų daug, kitur – beveik vien
+# ištrinti. Job'as (JOB_ORDER=density) intervalą skaido į SCHED_BLOCK_SIZE blokus ir pirmiausia
+# tikrina tuos, kurių FOUND dalis didžiausia. Įvertis – (found + SCHED_PRIOR_WEIGHT * p) /
+# (seen + SCHED_PRIOR_WEIGHT), kur p – viso intervalo vidurkis: nepaliestas blokas gauna vidurkį, todėl
+# tankūs blokai baigiami pirma, o retieji (žemiau vidurkio) – po nepaliestų. Prioritetų eilė (heapq)
+# atnaujinama po kiekvieno rezultato; blokas iš eilės išeina tik kai jame nebėra ID – padengimas pilnas.
+JOB_ORDER = (os.getenv("JOB_ORDER") or "density").strip().lower()
+if JOB_ORDER not in ("density", "asc"):
+    JOB_ORDER = "density"
+SCHED_BLOCK_SIZE = max(1, int(os.getenv("SCHED_BLOCK_SIZE", "256")))
+SCHED_CHUNK = max(1, int(os.getenv("SCHED_CHUNK", "16")))  # kiek ID iš eilės imam iš bloko prieš perskaičiuojant
+SCHED_PRIOR_WEIGHT = float(os.getenv("SCHED_PRIOR_WEIGHT", "4"))
+
+
+class DensityScheduler:
+    """Tikrinimo tvarka pagal blokų tankį. Naudoja tik job thread'as (be lock'ų).
+
+    Blokas: [lo, hi, next, found, seen, ver]. next() – kitas ID (blokų viduje didėjančiai),
+    record() – rezultatas atnaujina bloko įvertį. Eilėje pasenę įrašai (ver) praleidžiami,
+    o vidurkiui pasikeitus raktas perskaičiuojamas išimant (lazy).
+    """
+
+    def __init__(self, start: int, end: int, block_size: int = SCHED_BLOCK_SIZE, stats=None, ceiling: int | None = None):
+        """stats(lo, hi) -> {"found", "not_found"} – jau žinomi rezultatai (pradiniai įverčiai).
+        ceiling – frontier: blokai virš jo (dar neegzistuojantys ID) tikrinami paskutiniai."""
+        self.blocks = []
+        self.start = start
+        self.block_size = block_size
+        self.found = 0
+        self.seen = 0
+        self.remaining = end - start + 1
+        self._ceiling = ceiling
+        self._heap = []
+        self._cur = None
+        self._left = 0
+        for lo in range(start, end + 1, block_size):
+            hi = min(end, lo + block_size - 1)
+            found = seen = 0
+            if stats is not None:
+                st = stats(lo, hi)
+                found, seen = st["found"], st["found"] + st["not_found"]
+            self.blocks.append([lo, hi, lo, found, seen, 0])
+            self.found += found
+            self.seen += seen
+        for i in range(len(self.blocks)):
+            self._push(i)
+
+    def _prior(self) -> float:
+        return (self.found + 1.0) / (self.seen + 2.0)
+
+    def score(self, i: int) -> float:
+        lo, _, _, found, seen, _ = self.blocks[i]
+        if self._ceiling is not None and lo > self._ceiling:
+            return 0.0  # virš frontier – po visų kitų, bet vis tiek patikrinami
+        return (found + SCHED_PRIOR_WEIGHT * self._prior()) / (seen + SCHED_PRIOR_WEIGHT)
+
+    def _push(self, i: int):
+        b = self.blocks[i]
+        b[5] += 1
+        heapq.heappush(self._heap, (-self.score(i), b[5], i))
+
+    def next(self) -> int | None:
+        while True:
+            if self._cur is not None:
+                b = self.blocks[self._cur]
+                if b[2] <= b[1] and self._left > 0:
+                    break
+                if b[2] <= b[1]:
+                    self._push(self._cur)  # gabalas baigtas – atgal į eilę su nauju įverčiu
+                self._cur = None
+            if not self._heap:
+                return None
+            _, ver, i = heapq.heappop(self._heap)
+            b = self.blocks[i]
+            if ver != b[5] or b[2] > b[1]:
+                continue
+            s = self.score(i)
+            if self._heap and s < -self._heap[0][0] - 1e-9:
+                heapq.heappush(self._heap, (-s, ver, i))  # vidurkis pasikeitė – raktas perskaičiuotas
+                continue
+            self._cur, self._left = i, SCHED_CHUNK
+        b = self.blocks[self._cur]
+        n = b[2]
+        b[2] += 1
+        self._left -= 1
+        self.remaining -= 1
+        return n
+
+    def record(self, n: int, status: str | None):
+        """FOUND / NOT_FOUND keičia bloko ir vidurkio įvertį; CHALLENGE / ERROR – nieko nesako."""
+        if status not in ("FOUND", "NOT_FOUND"):
+            return
+        i = (n - self.start) // self.block_size
+        if not 0 <= i < len(self.blocks):
+            return
+        b = self.blocks[i]
+        hit = status == "FOUND"
+        b[3] += hit
+        b[4] += 1
+        self.found += hit
+        self.seen += 1
+        if i != self._cur and b[2] <= b[1]:
+            self._push(i)
+
+
+# =========================
+# Serverio crawl job (fone, be naršyklės)
+# =========================
+# Job'as eina per START_NUM..END_NUM serveryje (EXECUTOR thread'uose), todėl
+# progresas nebepriklauso nuo atidaryto tab'o ir /api/check_batch round-trip'ų.
+JOB_AUTORESUME = os.getenv("JOB_AUTORESUME", "1") != "0"
+JOB_MAX_CONSECUTIVE_ERRORS = int(os.getenv("JOB_MAX_CONSECUTIVE_ERRORS", "10"))
+JOB_SKIP_SCAN_CHUNK = 5000  # kiek jau tikrintų ID praleidžiam per vieną ciklo iteraciją
+
+JOB_LOCK = threading.Lock()
+JOB_COND = threading.Condition(JOB_LOCK)
+
+
+def _new_job_state() -> dict:
+    return {
+        "state": "idle",  # idle / running / paused / done / cancelled
+        "start": None,
+        "end": None,
+        "cursor": None,  # mažiausias dar neužbaigtas ID numeris
+        "force": False,
+        "stop_on_error": False,
+        "order": "asc",  # asc / density (DensityScheduler; cursor – tada tik progreso pozicija)
+        "checked": 0,
+        "fetched": 0,
+        "skipped": 0,
+        "found": 0,
+        "errors": 0,
+        "consecutive_errors": 0,
+        "last_id": None,
+        "last_error": None,
+        "created_at": None,
+        "updated_at": None,
+        "finished_at": None,
+        "shard": None,  # koordinatoriaus run'o raktas (lease sharding) arba None
+        "lease": None,  # šiuo metu išnuomoto bloko numeris
+        "blocks_done": 0,
+        "blocks_total": 0,
+        "shard_lost": 0,  # kiek kartų nuoma pasibaigė ir blokas atiteko kitam
+    }
+
+
+JOB = _new_job_state()
+_job_thread: threading.Thread | None = None
+_job_fetch_times: deque = deque()  # monotonic laikai (greičio skaičiavimui)
+
+
+def job_snapshot() -> dict:
+    if not is_job_owner() and _shared_job:
+        return dict(_shared_job)  # job'ą vykdo kitas worker'is – jo paskutinis įrašytas snapshot'as
+    with JOB_LOCK:
+        snap = dict(JOB)
+        now = time.monotonic()
+        while _job_fetch_times and _job_fetch_times[0] < now - 60.0:
+            _job_fetch_times.popleft()
+        per_min = len(_job_fetch_times)
+
+    total = 0
+    done = 0
+    if snap["start"] is not None and snap["end"] is not None:
+        total = range_count(int(snap["start"]), int(snap["end"]), 1)
+        cur = snap["cursor"] if snap["cursor"] is not None else snap["start"]
+        done = max(0, min(total, int(cur) - int(snap["start"])))
+        if snap["state"] == "done":
+            done = total
+    snap["total"] = total
+    snap["progress"] = (done / total) if total else 0.0
+    if snap["shard"] and snap["blocks_total"]:
+        snap["progress"] = snap["blocks_done"] / snap["blocks_total"]  # visų instancijų
+    snap["fetch_per_min"] = per_min
+    return snap
+
+
+def restore_job_state(saved):
+    """Atstato job'ą iš state failo. Jei jis buvo 'running' – tęsiam (JOB_AUTORESUME)."""
+    if not isinstance(saved, dict):
+        return
+    st = saved.get("state")
+    if st not in ("running", "paused", "done", "cancelled"):
+        return
+
+    job = _new_job_state()
+    for k in job:
+        if k in saved:
+            job[k] = saved[k]
+    try:
+        job["start"] = int(job["start"])
+        job["end"] = int(job["end"])
+        job["cursor"] = int(job["cursor"] if job["cursor"] is not None else job["start"])
+    except Exception:
+        return
+
+    if st == "running" and not JOB_AUTORESUME:
+        job["state"] = "paused"
+    job["consecutive_errors"] = 0
+
+    with JOB_LOCK:
+        JOB.clear()
+        JOB.update(job)
+
+
+def _ensure_job_thread():
+    """Paleidžia job thread'ą, jei jis dar nebėga (CALL ONLY UNDER JOB_LOCK)."""
+    global _job_thread
+    if _job_thread is not None and _job_thread.is_alive():
+        return
+    _job_thread = threading.Thread(target=_job_runner, name="crawl-job", daemon=True)
+    _job_thread.start()
+
+
+def _job_record_result(n: int, id_str: str, out: dict, in_flight_nums, next_n: int):
+    """Atnaujina job skaitliukus ir cursor po vieno rezultato."""
+    st = out.get("status")
+    with JOB_COND:
+        JOB["checked"] += 1
+        JOB["fetched"] += 1
+        _job_fetch_times.append(time.monotonic())
+        if st == "FOUND" or out.get("sugiharos_found") is True:
+            JOB["found"] += 1
+        if st == "ERROR":
+            JOB["errors"] += 1
+            JOB["consecutive_errors"] += 1
+            JOB["last_error"] = f"{id_str}: {out.get('error')}"
+        else:
+            JOB["consecutive_errors"] = 0
+        JOB["last_id"] = id_str
+        JOB["cursor"] = min([next_n, *in_flight_nums])
+        JOB["updated_at"] = now_iso()
+
+        if st == "ERROR" and JOB["state"] == "running":
+            if JOB["stop_on_error"] or JOB["consecutive_errors"] >= JOB_MAX_CONSECUTIVE_ERRORS:
+                JOB["state"] = "paused"
+        JOB_COND.notify_all()
+
+
+def _shard_step(shard: str, lease: dict | None, next_n: int) -> tuple[dict | None, int, str]:
+    """Shard'into job'o blokų kaita (kai ore nieko nėra): užbaigia baigtą bloką, nuomoja kitą.
+
+    Grąžina (lease, next_n, status): "ok" – turim bloką, "wait" – visi išnuomoti / koordinatorius
+    nepasiekiamas, "done" – visi blokai užbaigti.
+    """
+    coord = shard_coordinator()
+    try:
+        if lease is not None and next_n > lease["hi"]:
+            if not coord.complete(shard, lease["block"], SHARD_INSTANCE):
+                with JOB_COND:
+                    JOB["shard_lost"] += 1  # nuoma spėjo pasibaigti – blokas jau kito
+            lease = None
+        if lease is not None:
+            return lease, next_n, "ok"
+        got = coord.lease(shard, SHARD_INSTANCE, SHARD_LEASE_SECONDS)
+    except Exception as e:
+        with JOB_COND:
+            JOB["last_error"] = f"shard koordinatorius: {e}"
+        return lease, next_n, "wait"
+
+    with JOB_COND:
+        JOB["blocks_total"] = got.get("blocks_total", JOB["blocks_total"])
+        JOB["blocks_done"] = got.get("blocks_done", JOB["blocks_done"])
+        JOB["lease"] = got.get("block")
+        if got.get("block") is not None:
+            JOB["cursor"] = max(int(got["cursor"]), int(got["lo"]))
+            JOB["updated_at"] = now_iso()
+    if got.get("done"):
+        return None, next_n, "done"
+    if got.get("block") is None:
+        return None, next_n, "wait"
+    return got, max(int(got["cursor"]), int(got["lo"])), "ok"
+
+
+def _shard_release(shard: str, lease: dict, cursor: int):
+    """Pauzė / atšaukimas: blokas atiduodamas kitiems nuo cursor (nelaukiant nuomos pabaigos)."""
+    try:
+        shard_coordinator().release(shard, lease["block"], SHARD_INSTANCE, cursor)
+    except Exception:
+        pass  # nepavyko – blokas atsilaisvins pasibaigus nuomai
+    with JOB_COND:
+        JOB["lease"] = None
+
+
+def _job_scheduler(start: int, end: int) -> DensityScheduler:
+    """Tankio tvarka job'ui: pradiniai įverčiai iš CACHE, blokai virš frontier – paskutiniai."""
+    ceiling = frontier_snapshot().get("frontier")
+    with CACHE_LOCK:
+        return DensityScheduler(start, end, stats=CACHE.stats_range, ceiling=ceiling)
+
+
+def _job_runner():
+    """Job ciklas: laiko iki TARGET_CONCURRENCY fetch'ų ore per EXECUTOR.
+
+    Pauzė – nebeteikiam naujų ID, palaukiam kol baigsis esami.
+    Atšaukimas – atšaukiam dar nepradėtus, palaukiam pradėtų ir išeinam.
+    Shard'intas job'as (JOB["shard"]) eina ne start..end, o koordinatoriaus išnuomotais blokais:
+    blokas užbaigiamas, kai jo ID nebėra ore; nuoma pratęsiama heartbeat'u.
+    JOB["order"] == "density" – ID ima DensityScheduler; next_n tada – kiek ID jau išduota (start + k),
+    todėl cursor / progresas ir pabaigos sąlyga (next_n > end) lieka tie patys. Po restarto
+    tvarka sudaroma iš naujo: ID, patikrinti iki paleidimo (CACHE status_codes momentinė kopija),
+    praleidžiami neskaičiuojant – checked / skipped / cursor atkuriami iš jų kiekio.
+    """
+    in_flight: dict = {}  # Future -> (n, id_str)
+    next_n = None
+    lease = None  # shard: {"block", "lo", "hi", "cursor", ...}
+    last_hb = 0.0
+    sched = None  # DensityScheduler
+    known = None  # density: status baitai iki paleidimo (nenulis – jau patikrintas ir įskaičiuotas)
+    with JOB_COND:
+        density = JOB.get("order") == "density"
+        start, end = int(JOB["start"]), int(JOB["end"])
+        force = bool(JOB["force"])
+    if density:
+        sched = _job_scheduler(start, end)
+        next_n = start
+        if not force:
+            with CACHE_LOCK:
+                known = CACHE.status_codes(start, end)
+            done = len(known) - known.count(0)
+            next_n = start + done
+            with JOB_COND:
+                JOB["checked"] = done
+                JOB["skipped"] = max(0, done - JOB["fetched"])  # šio job'o fetch'ai irgi CACHE'e
+                JOB["cursor"] = next_n
+                JOB["updated_at"] = now_iso()
+
+    while True:
+        with JOB_COND:
+            shard = JOB.get("shard")
+            idle_stop = JOB["state"] in ("paused", "cancelled") and not in_flight
+        if shard and lease is not None and idle_stop:
+            _shard_release(shard, lease, next_n)
+            lease = None
+
+        with JOB_COND:
+            while JOB["state"] == "paused" and not in_flight:
+                JOB_COND.wait()
+            state = JOB["state"]
+            if next_n is None:
+                next_n = int(JOB["cursor"])
+            end = int(JOB["end"])
+            force = bool(JOB["force"])
+
+        if shard and state == "running":
+            if not in_flight:
+                prev = lease
+                lease, next_n, st = _shard_step(shard, lease, next_n)
+                if st == "done":
+                    _job_finish(end)
+                    return
+                if st == "wait":
+                    with JOB_COND:
+                        JOB_COND.wait(SHARD_POLL_SECONDS)  # pause / cancel pažadina
+                    continue
+                if lease is not prev:
+                    last_hb = time.monotonic()
+            end = lease["hi"] if lease is not None else next_n - 1
+
+        if state == "running":
+            skipped = quiet = 0
+            while len(in_flight) < TARGET_CONCURRENCY and next_n <= end and skipped + quiet < JOB_SKIP_SCAN_CHUNK:
+                n = next_n if sched is None else sched.next()
+                if known is not None and known[n - start]:
+                    quiet += 1  # patikrintas iki paleidimo – jau įskaičiuotas į checked / cursor
+                    continue
+                id_str = f"1-{n}"
+                next_n += 1
+                prior = None
+                if not force:
+                    with CACHE_LOCK:
+                        cached = id_str in CACHE
+                    if cached:
+                        skipped += 1
+                        continue
+                else:
+                    with CACHE_LOCK:
+                        prior = CACHE.get(id_str)
+                in_flight[EXECUTOR.submit(fetch_page, id_str, prior)] = (n, id_str)
+
+            if skipped:
+                with JOB_COND:
+                    JOB["skipped"] += skipped
+                    JOB["checked"] += skipped
+                    JOB["cursor"] = min([next_n, *(x[0] for x in in_flight.values() if sched is None)])
+                    JOB["updated_at"] = now_iso()
+
+        elif state == "cancelled":
+            for fut in list(in_flight):
+                if fut.cancel():
+                    in_flight.pop(fut, None)
+
+        if shard and lease is not None and time.monotonic() - last_hb >= SHARD_LEASE_SECONDS / 3:
+            cursor = min([next_n, *(x[0] for x in in_flight.values())])
+            try:
+                ok = shard_coordinator().heartbeat(shard, lease["block"], SHARD_INSTANCE, cursor, SHARD_LEASE_SECONDS)
+                last_hb = time.monotonic()
+            except Exception:
+                ok = time.monotonic() - last_hb < SHARD_LEASE_SECONDS  # dar galioja – bandysim vėl
+            if not ok:
+                # blokas perduotas kitam (buvom per lėti / nepasiekiami) – nepradėtus atšaukiam
+                for fut in list(in_flight):
+                    if fut.cancel():
+                        in_flight.pop(fut, None)
+                lease = None
+                with JOB_COND:
+                    JOB["lease"] = None
+                    JOB["shard_lost"] += 1
+
+        if not in_flight:
+            if state == "running" and not shard and next_n > end:
+                _job_finish(end)
+                return
+            if state == "cancelled":
+                with CACHE_LOCK:
+                    mark_state_dirty_locked(force=True)
+                return
+            continue
+
+        done, _ = wait(list(in_flight), timeout=1.0, return_when=FIRST_COMPLETED)
+        for fut in done:
+            n, id_str = in_flight.pop(fut)
+            if fut.cancelled():
+                continue
+            raw_html = None
+            try:
+                out, raw_html, _ = fut.result()
+            except Exception as e:
+                out = make_error_result(id_str, e)
+
+            store_raw(id_str, raw_html)  # suspaudžiama be CACHE_LOCK
+            with CACHE_LOCK:
+                cache_put_locked(id_str, out)
+                mark_state_dirty_locked(force=False)
+            if sched is not None:
+                sched.record(n, out.get("status"))
+
+            _job_record_result(n, id_str, out, [x[0] for x in in_flight.values() if sched is None], next_n)
+
+
+def _job_finish(end: int):
+    with JOB_COND:
+        if JOB["state"] == "running":
+            JOB["state"] = "done"
+            JOB["cursor"] = end + 1
+            JOB["lease"] = None
+            JOB["blocks_done"] = JOB["blocks_total"]
+            JOB["finished_at"] = now_iso()
+            JOB["updated_at"] = JOB["finished_at"]
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+
+
+def job_start(
+    force: bool = False,
+    stop_on_error: bool = False,
+    start: int | None = None,
+    end: int | None = None,
+    shard: bool = False,
+    order: str | None = None,
+) -> dict:
+    """Naujas job'as per start..end (numatyta – dabartinis START_NUM..END_NUM).
+
+    shard=True – prisijungia prie koordinatoriaus run'o tam pačiam intervalui (arba jį sukuria)
+    ir tikrina tik išsinuomotus blokus.
+    order – asc / density (numatyta JOB_ORDER); force ir shard job'ai visada eina asc.
+    """
+    start = START_NUM if start is None else int(start)
+    end = END_NUM if end is None else int(end)
+    order = str(order or JOB_ORDER).strip().lower()
+    if order not in ("asc", "density"):
+        raise ValueError("order turi būti asc arba density.")
+    if force or shard:
+        order = "asc"
+    if not is_job_owner():
+        return _job_command(
+            "start", force=bool(force), stop_on_error=bool(stop_on_error), start=start, end=end, shard=bool(shard),
+            order=order,
+        )
+    run = None
+    if shard:
+        try:
+            run = shard_coordinator().join(start, end, SHARD_BLOCK_SIZE)
+        except Exception as e:
+            raise RuntimeError(f"Shard koordinatorius nepasiekiamas: {e}")
+    with JOB_COND:
+        if JOB["state"] in ("running", "paused"):
+            raise RuntimeError("Job'as jau vykdomas (pirma atšauk).")
+        if _job_thread is not None and _job_thread.is_alive():
+            raise RuntimeError("Ankstesnis job'as dar baigiamas – pabandyk po kelių sekundžių.")
+        JOB.clear()
+        JOB.update(_new_job_state())
+        JOB.update({
+            "state": "running",
+            "start": start,
+            "end": end,
+            "cursor": start,
+            "force": bool(force),
+            "stop_on_error": bool(stop_on_error),
+            "order": order,
+            "created_at": now_iso(),
+        })
+        if run is not None:
+            JOB.update({"shard": run["key"], "blocks_total": run["blocks_total"], "blocks_done": run["blocks_done"]})
+        JOB["updated_at"] = JOB["created_at"]
+        _job_fetch_times.clear()
+        _ensure_job_thread()
+        JOB_COND.notify_all()
+
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+    return job_snapshot()
+
+
+def job_set_state(new_state: str) -> dict:
+    """pause / resume / cancel."""
+    allowed_from = {
+        "paused": ("running",),
+        "running": ("paused",),
+        "cancelled": ("running", "paused"),
+    }
+    if not is_job_owner():
+        return _job_command(new_state)
+    with JOB_COND:
+        if JOB["state"] not in allowed_from[new_state]:
+            raise RuntimeError(f"Negalima: job būsena yra '{JOB['state']}'.")
+        JOB["state"] = new_state
+        JOB["updated_at"] = now_iso()
+        if new_state == "running":
+            JOB["consecutive_errors"] = 0
+            _ensure_job_thread()
+        if new_state == "cancelled":
+            JOB["finished_at"] = JOB["updated_at"]
+        JOB_COND.notify_all()
+
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+    return job_snapshot()
+
+
+# =========================
+# Offline re-parse (iš RAW_ARCHIVE, be tinklo)
+# =========================
+# Pakeitus parse taisykles (PARSER_VERSION), archyvuoti puslapiai perparse'inami
+# ProcessPoolExecutor'iuje (parse_html – CPU, GIL'as neleistų išnaudoti branduolių).
+# Vaikams siunčiami suspausti blob'ai; CACHE atnaujinamas grupėmis (vienas CACHE_LOCK batch'ui).
+REPARSE_WORKERS = int(os.getenv("REPARSE_WORKERS", "0")) or max(1, os.cpu_count() or 1)
+REPARSE_BATCH = int(os.getenv("REPARSE_BATCH", "200"))
+
+REPARSE_LOCK = threading.Lock()
+REPARSE = {"state": "idle"}  # idle / running / done / cancelled / error
+_reparse_thread: threading.Thread | None = None
+
+
+def _reparse_batch(items: list) -> list:
+    """Vaiko procese: [(id, zlib blob, final_url, http_status)] -> [(id, parse_html rezultatas arba None)]."""
+    out = []
+    for id_str, blob, final_url, http_status in items:
+        try:
+            html_text = zlib.decompress(blob).decode("utf-8", "surrogatepass")
+            out.append((id_str, parse_html(html_text, final_url=final_url or "", http_status=http_status)))
+        except Exception:
+            out.append((id_str, None))
+    return out
+
+
+def _reparse_count(**kw):
+    with REPARSE_LOCK:
+        for k, v in kw.items():
+            REPARSE[k] += v
+
+
+def _reparse_apply(batch: list, results: list):
+    """Parse rezultatai -> CACHE (tik jei įrašas nepasikeitė, kol buvo parse'inamas).
+
+    Iš seno įrašo paimami tik fetch'o metu gauti laukai (checked_at, http_status, final_url,
+    validators), visa kita – iš parse_html: seni parse laukai, kurių naujas parser'is
+    nebegrąžina, neturi likti.
+    """
+    checked = {id_str: (fu, hs, ca) for id_str, _, fu, hs, ca in batch}
+    changed = unchanged = errors = 0
+    with CACHE_LOCK:
+        for id_str, parsed in results:
+            if parsed is None:
+                errors += 1
+                continue
+            cur = CACHE.get(id_str)
+            if cur is None or cur.get("checked_at") != checked[id_str][2]:
+                continue  # per tą laiką pertikrintas – naujesnis rezultatas laimi
+            new = {"id": cur["id"], "checked_at": cur.get("checked_at"), "http_status": cur.get("http_status"), **parsed}
+            if cur.get("final_url") is not None:
+                new["final_url"] = cur["final_url"]
+            if new["status"] == "FOUND" and "validators" in cur:
+                new["validators"] = cur["validators"]  # kaip fetch_page: validators tik FOUND
+            if {k: v for k, v in new.items() if k != "parser_version"} == {
+                k: v for k, v in cur.items() if k != "parser_version"
+            }:
+                unchanged += 1
+            else:
+                changed += 1
+            if new != cur:
+                cache_put_locked(id_str, new, publish=False)
+        mark_state_dirty_locked(force=False)
+    _reparse_count(parsed=len(results), changed=changed, unchanged=unchanged, errors=errors)
+
+
+def _reparse_batches(start: int, end: int, force: bool):
+    """Batch'ai (id, blob, final_url, http_status, checked_at) iš CACHE + RAW_ARCHIVE."""
+    batch = []
+    scanned = no_raw = skipped = 0
+    for id_str, e in _iter_range_pages(start, end, "all", None, 0):
+        scanned += 1
+        if e.get("status") == "ERROR" or (not force and e.get("parser_version") == PARSER_VERSION):
+            skipped += 1
+            continue
+        blob = RAW_ARCHIVE.get_blob(id_str)
+        if blob is None:
+            no_raw += 1
+            continue
+        batch.append((id_str, blob, e.get("final_url"), e.get("http_status"), e.get("checked_at")))
+        if len(batch) >= REPARSE_BATCH:
+            _reparse_count(scanned=scanned, no_raw=no_raw, skipped=skipped)
+            scanned = no_raw = skipped = 0
+            yield batch
+            batch = []
+    _reparse_count(scanned=scanned, no_raw=no_raw, skipped=skipped)
+    if batch:
+        yield batch
+
+
+def _reparse_runner(start: int, end: int, force: bool):
+    pending: dict = {}
+
+    def collect(block: bool):
+        done, _ = wait(list(pending), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for fut in done:
+            _reparse_apply(pending.pop(fut), fut.result())
+
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=REPARSE_WORKERS, mp_context=ctx) as pool:
+            for batch in _reparse_batches(start, end, force):
+                with REPARSE_LOCK:
+                    if REPARSE["state"] != "running":
+                        break
+                while len(pending) >= 2 * REPARSE_WORKERS:
+                    collect(block=True)
+                pending[pool.submit(_reparse_batch, [b[:4] for b in batch])] = batch
+                collect(block=False)
+            while pending:
+                collect(block=True)
+        state = "done"
+    except Exception as e:
+        with REPARSE_LOCK:
+            REPARSE["error"] = str(e)
+        state = "error"
+    with REPARSE_LOCK:
+        if REPARSE["state"] == "running":
+            REPARSE["state"] = state
+        REPARSE["finished_at"] = now_iso()
+        REPARSE["elapsed_s"] = round(time.monotonic() - REPARSE["_t0"], 2)
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+
+
+def reparse_snapshot() -> dict:
+    with REPARSE_LOCK:
+        snap = {k: v for k, v in REPARSE.items() if not k.startswith("_")}
+        if REPARSE["state"] == "running":
+            snap["elapsed_s"] = round(time.monotonic() - REPARSE["_t0"], 2)
+    if snap.get("elapsed_s"):
+        snap["per_second"] = round(snap.get("parsed", 0) / snap["elapsed_s"], 1)
+    snap["parser_version"] = PARSER_VERSION
+    return snap
+
+
+def reparse_start(start: int, end: int, force: bool = False) -> dict:
+    global _reparse_thread
+    if not RAW_ARCHIVE.enabled:
+        raise RuntimeError("RAW_ARCHIVE išjungtas (RAW_ARCHIVE_MAX_BYTES=0) – nėra ką perparse'inti.")
+    with REPARSE_LOCK:
+        if REPARSE["state"] == "running":
+            raise RuntimeError("Re-parse jau vyksta.")
+        REPARSE.clear()
+        REPARSE.update({
+            "state": "running", "start": start, "end": end, "force": force, "workers": REPARSE_WORKERS,
+            "scanned": 0, "skipped": 0, "no_raw": 0, "parsed": 0, "changed": 0, "unchanged": 0, "errors": 0,
+            "started_at": now_iso(), "finished_at": None, "_t0": time.monotonic(),
+        })
+        _reparse_thread = threading.Thread(target=_reparse_runner, args=(start, end, force), name="reparse", daemon=True)
+        _reparse_thread.start()
+    return reparse_snapshot()
+
+
+def reparse_cancel() -> dict:
+    with REPARSE_LOCK:
+        if REPARSE["state"] == "running":
+            REPARSE["state"] = "cancelled"
+    return reparse_snapshot()
+
+
+# =========================
+# Naujausių skelbimų riba (frontier)
+# =========================
+# ID dalinami didėjančiai, todėl virš didžiausio gyvo ID (frontier) visi – NOT_FOUND. Riba randama
+# galop'u (žingsnis dvigubinamas) ir binarine paieška per kelias dešimtis užklausų. Žemiau ribos
+# yra ištrintų skelbimų tarpų, todėl taškas x laikomas „gyvu“, jei FOUND yra bent viena imtis lange
+# [x, x + FRONTIER_WINDOW) – poslinkiai 0, 1, 2, 3, 7, 15...: 16 ID tarpas kainuoja 6 užklausas, ne 16,
+# o pirmi keturi iš eilės nepraleidžia periodiškų raštų (pvz. tik kas trečias ID).
+# Sekimas kartojamas kas FRONTIER_INTERVAL_SECONDS: nauji ID tarp senos
+# ir naujos ribos patikrinami iš eilės (po FRONTIER_FILL_MAX per ratą; filled_to – iki kur patikrinta,
+# likusieji – kituose ratuose, be pauzės), o NOT_FOUND ID šalia ribos (dar nepaskelbti juodraščiai)
+# pertikrinami vis retėjančiu grafiku (FRONTIER_RECHECK_SECONDS * 2^bandymas).
+FRONTIER_WINDOW = max(1, int(os.getenv("FRONTIER_WINDOW", "16")))
+FRONTIER_OFFSETS = sorted(
+    {n for n in range(4) if n < FRONTIER_WINDOW}
+    | {(1 << k) - 1 for k in range(FRONTIER_WINDOW.bit_length()) if (1 << k) <= FRONTIER_WINDOW}
+    | {FRONTIER_WINDOW - 1}
+)
+FRONTIER_STEP = max(FRONTIER_WINDOW, int(os.getenv("FRONTIER_STEP", "1024")))  # pirmos paieškos galop'o žingsnis
+FRONTIER_INTERVAL_SECONDS = float(os.getenv("FRONTIER_INTERVAL_SECONDS", "60"))
+FRONTIER_FILL_MAX = int(os.getenv("FRONTIER_FILL_MAX", "2000"))  # kiek naujų ID už ribos tikrinam per ratą
+FRONTIER_RECHECK_SPAN = int(os.getenv("FRONTIER_RECHECK_SPAN", "500"))  # kiek ID žemiau ribos pertikrinam
+FRONTIER_RECHECK_SECONDS = float(os.getenv("FRONTIER_RECHECK_SECONDS", "120"))
+FRONTIER_RECHECK_TRIES = int(os.getenv("FRONTIER_RECHECK_TRIES", "6"))
+
+FRONTIER_LOCK = threading.Lock()
+FRONTIER_COND = threading.Condition(FRONTIER_LOCK)
+
+
+def _new_frontier_state() -> dict:
+    return {
+        "state": "idle",  # idle / running / stopped
+        "frontier": None,  # didžiausias rastas gyvas ID numeris
+        "filled_to": None,  # iki kurio ID nauji (virš pirmos rastos ribos) jau patikrinti
+        "hint": None,  # nuo kur pradėta pirma paieška
+        "rounds": 0,
+        "requests": 0,  # visos frontier užklausos (paieška + nauji ID + pertikrinimai)
+        "last_search_requests": 0,
+        "filled": 0,  # nauji ID tarp senos ir naujos ribos
+        "rechecked": 0,
+        "revived": 0,  # NOT_FOUND -> FOUND pertikrinant
+        "last_error": None,
+        "started_at": None,
+        "updated_at": None,
+        "advanced_at": None,  # kada riba paskutinį kartą pasislinko
+    }
+
+
+FRONTIER = _new_frontier_state()
+_frontier_thread: threading.Thread | None = None
+_frontier_recheck: dict[int, list] = {}  # n -> [bandymai, kada (monotonic)]; RAM'e, po restarto iš naujo
+_shared_frontier: dict = {}  # lyderio frontier snapshot'as (SHARED_STATE, ne lyderis)
+
+
+class FrontierStopped(Exception):
+    pass
+
+
+def frontier_snapshot() -> dict:
+    if not is_job_owner() and _shared_frontier:
+        return dict(_shared_frontier)
+    with FRONTIER_LOCK:
+        snap = dict(FRONTIER)
+        snap["recheck_pending"] = len(_frontier_recheck)
+    if snap["frontier"] is not None and snap["filled_to"] is not None:
+        snap["fill_pending"] = max(0, snap["frontier"] - snap["filled_to"])
+    snap["frontier_id"] = f"1-{snap['frontier']}" if snap["frontier"] is not None else None
+    return snap
+
+
+def restore_frontier_state(saved):
+    """Atstato frontier iš state failo; 'running' – sekimas tęsiamas (kaip job'o JOB_AUTORESUME)."""
+    if not isinstance(saved, dict):
+        return
+    fr = _new_frontier_state()
+    for k in fr:
+        if k in saved:
+            fr[k] = saved[k]
+    if fr["state"] not in ("running", "stopped"):
+        return
+    if fr["state"] == "running" and not JOB_AUTORESUME:
+        fr["state"] = "stopped"
+    with FRONTIER_LOCK:
+        FRONTIER.clear()
+        FRONTIER.update(fr)
+
+
+def _frontier_count(**kw):
+    with FRONTIER_LOCK:
+        for k, v in kw.items():
+            FRONTIER[k] += v
+
+
+def _frontier_fetch(n: int) -> str:
+    """Vienas ID per fetch_page (rate limit / breaker – kaip job'e) -> CACHE. Grąžina status."""
+    with FRONTIER_LOCK:
+        if FRONTIER["state"] != "running":
+            raise FrontierStopped()
+        FRONTIER["requests"] += 1
+    id_str = f"1-{n}"
+    raw_html = None
+    try:
+        out, raw_html, _ = fetch_page(id_str)
+    except Exception as e:
+        out = make_error_result(id_str, e)
+    store_raw(id_str, raw_html)
+    with CACHE_LOCK:
+        cache_put_locked(id_str, out)
+        mark_state_dirty_locked(force=False)
+    return out.get("status")
+
+
+def _frontier_alive(x: int, seen: dict) -> int | None:
+    """Pirmas FOUND ID iš lango imčių (x + FRONTIER_OFFSETS) arba None. seen – šios paieškos atsakymai.
+
+    CACHE'o FOUND laikomas gyvu be užklausos; NOT_FOUND – ne (šalia ribos jis gali atgyti).
+    CHALLENGE / ERROR -> RuntimeError (atsakymas nieko nepasako apie ribą).
+    """
+    for n in (x + off for off in FRONTIER_OFFSETS):
+        live = seen.get(n)
+        if live is None:
+            with CACHE_LOCK:
+                e = CACHE.get(f"1-{n}")
+            if e is not None and e.get("status") == "FOUND":
+                live = True
+            else:
+                st = _frontier_fetch(n)
+                if st not in ("FOUND", "NOT_FOUND"):
+                    raise RuntimeError(f"1-{n}: {st}")
+                live = st == "FOUND"
+            seen[n] = live
+        if live:
+            return n
+    return None
+
+
+def _frontier_search(anchor: int, step: int) -> tuple[int | None, dict]:
+    """Galop'as nuo anchor (aukštyn, jei jis gyvas, kitaip žemyn), tada binarinė paieška.
+
+    Grąžina (didžiausias rastas gyvas ID arba None, {n: gyvas} visiems patikrintiems).
+    """
+    seen: dict[int, bool] = {}
+    lo = _frontier_alive(anchor, seen)
+    hi = None
+    if lo is None:
+        hi, step = anchor, max(step, FRONTIER_WINDOW)
+        while lo is None:
+            if hi <= 1:
+                return None, seen
+            x = max(1, hi - step)
+            lo = _frontier_alive(x, seen)
+            if lo is None:
+                hi, step = x, step * 2
+
+    while hi is None:
+        x = lo + step
+        f = _frontier_alive(x, seen)
+        if f is None:
+            hi = x
+        else:
+            lo, step = f, step * 2
+
+    # hi imtys tuščios; binarinė paieška (lo, hi) – seen sutaupo persidengiančius langus
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        f = _frontier_alive(mid, seen)
+        if f is None:
+            hi = mid
+        else:
+            lo, hi = f, max(hi, f + 1)
+    return max([lo, *(n for n, live in seen.items() if live)]), seen
+
+
+def _frontier_schedule(nums, frontier: int):
+    """NOT_FOUND ID šalia ribos -> pertikrinimų grafikas; per žemai nukritę išmetami."""
+    now = time.monotonic()
+    floor = frontier - FRONTIER_RECHECK_SPAN
+    with FRONTIER_LOCK:
+        for n in nums:
+            if floor < n <= frontier and n not in _frontier_recheck:
+                _frontier_recheck[n] = [0, now + FRONTIER_RECHECK_SECONDS]
+        for n in [n for n in _frontier_recheck if n <= floor]:
+            del _frontier_recheck[n]
+
+
+def _frontier_recheck_due():
+    """Pertikrina laikas atėjusius NOT_FOUND; FOUND – iš grafiko, kitaip atidedam dvigubai ilgiau."""
+    now = time.monotonic()
+    with FRONTIER_LOCK:
+        due = sorted(n for n, (_, at) in _frontier_recheck.items() if at <= now)
+    for n in due:
+        st = _frontier_fetch(n)
+        with FRONTIER_LOCK:
+            FRONTIER["rechecked"] += 1
+            entry = _frontier_recheck.get(n)
+            if entry is None:
+                continue
+            if st == "FOUND":
+                FRONTIER["revived"] += 1
+                del _frontier_recheck[n]
+                continue
+            if st == "NOT_FOUND":
+                entry[0] += 1
+            if entry[0] >= FRONTIER_RECHECK_TRIES:
+                del _frontier_recheck[n]
+            else:
+                entry[1] = time.monotonic() + FRONTIER_RECHECK_SECONDS * (2 ** entry[0])
+
+
+def _frontier_fetch_many(nums: list[int]) -> list[str]:
+    """_frontier_fetch kiekvienam ID; bendrame EXECUTOR'iuje vienu metu ne daugiau TARGET_CONCURRENCY.
+
+    Ne EXECUTOR.map: jis iškart pateiktų visus (iki FRONTIER_FILL_MAX) – job'o ir check_batch
+    užduotys lauktų eilėje už viso užpildymo. Čia, kaip _job_runner, naujas pateikiamas tik
+    kai baigiasi ankstesnis. FrontierStopped (ar kita klaida) – naujų nebeteikia, klaida kyla.
+    """
+    statuses: list[str] = [None] * len(nums)
+    in_flight = {}
+    i = 0
+    while i < len(nums) or in_flight:
+        while i < len(nums) and len(in_flight) < TARGET_CONCURRENCY:
+            in_flight[EXECUTOR.submit(_frontier_fetch, nums[i])] = i
+            i += 1
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for fut in done:
+            statuses[in_flight.pop(fut)] = fut.result()
+    return statuses
+
+
+def _frontier_round() -> bool:
+    """Vienas sekimo ratas: riba (paieška), nauji ID iki jos, pertikrinimai.
+
+    Grąžina True, jei liko nepatikrintų naujų ID (FRONTIER_FILL_MAX riba) – kitas ratas iškart.
+    """
+    with FRONTIER_LOCK:
+        prev = FRONTIER["frontier"]
+        filled_to = FRONTIER["filled_to"]
+        anchor = prev if prev is not None else (FRONTIER["hint"] or END_NUM)
+        step = 1 if prev is not None else FRONTIER_STEP  # sekant: ramus ratas – vienas langas virš ribos
+        requests_before = FRONTIER["requests"]
+
+    frontier, seen = _frontier_search(int(anchor), step)
+    with FRONTIER_LOCK:
+        FRONTIER["last_search_requests"] = FRONTIER["requests"] - requests_before
+    if frontier is None:
+        raise RuntimeError(f"Nerasta nė vieno gyvo ID žemiau 1-{anchor}.")
+
+    if prev is None:
+        filled_to = frontier  # pirma paieška: žemiau ribos – ne nauji skelbimai
+    elif filled_to is None:
+        filled_to = prev
+    if frontier > filled_to:
+        # nauji skelbimai: virš jau patikrintų (paieška juos peršoko) – iš eilės, cursor'ius
+        # pastumiamas tik per tuos, kurie šiame rate tikrinti (ar jau žinomi FOUND)
+        todo = []
+        cursor = filled_to
+        for n in range(filled_to + 1, frontier + 1):
+            if len(todo) >= FRONTIER_FILL_MAX:
+                break
+            cursor = n
+            if n in seen:
+                continue
+            with CACHE_LOCK:
+                e = CACHE.get(f"1-{n}")
+            if e is None or e.get("status") != "FOUND":
+                todo.append(n)
+        statuses = _frontier_fetch_many(todo)
+        _frontier_count(filled=len(todo))
+        seen.update((n, st == "FOUND") for n, st in zip(todo, statuses))
+        filled_to = cursor
+
+    with FRONTIER_LOCK:
+        FRONTIER["frontier"] = frontier
+        FRONTIER["filled_to"] = max(filled_to, FRONTIER["filled_to"] or filled_to)
+        FRONTIER["rounds"] += 1
+        FRONTIER["last_error"] = None
+        FRONTIER["updated_at"] = now_iso()
+        if prev is None or frontier > prev:
+            FRONTIER["advanced_at"] = FRONTIER["updated_at"]
+    _frontier_schedule([n for n, live in seen.items() if not live], frontier)
+    _frontier_recheck_due()
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+    return filled_to < frontier
+
+
+def _frontier_runner():
+    errors = 0
+    while True:
+        more = False
+        try:
+            more = _frontier_round()
+            errors = 0
+        except FrontierStopped:
+            pass
+        except Exception as e:
+            errors += 1
+            with FRONTIER_LOCK:
+                FRONTIER["last_error"] = str(e)
+                FRONTIER["updated_at"] = now_iso()
+        with FRONTIER_COND:
+            if FRONTIER["state"] == "running" and not more:
+                FRONTIER_COND.wait(FRONTIER_INTERVAL_SECONDS * min(8, 2 ** errors))  # stop pažadina
+            if FRONTIER["state"] != "running":
+                return
+
+
+def _ensure_frontier_thread():
+    """Paleidžia frontier thread'ą, jei jis dar nebėga (CALL ONLY UNDER FRONTIER_LOCK)."""
+    global _frontier_thread
+    if _frontier_thread is not None and _frontier_thread.is_alive():
+        return
+    _frontier_thread = threading.Thread(target=_frontier_runner, name="frontier", daemon=True)
+    _frontier_thread.start()
+
+
+def frontier_start(hint: int | None = None) -> dict:
+    """Pradeda (arba tęsia) ribos sekimą. hint – nuo kurio ID pradėti pirmą paiešką
+    (numatyta – paskutinė rasta riba arba END_NUM); nurodžius – riba ieškoma iš naujo."""
+    if not is_job_owner():
+        _job_command("frontier_start", hint=hint)
+        return frontier_snapshot()
+    with FRONTIER_COND:
+        if FRONTIER["state"] == "running":
+            raise RuntimeError("Frontier sekimas jau vyksta.")
+        if hint is not None:
+            FRONTIER.update(_new_frontier_state())
+            FRONTIER["hint"] = int(hint)
+            _frontier_recheck.clear()
+        FRONTIER["state"] = "running"
+        FRONTIER["started_at"] = now_iso()
+        FRONTIER["updated_at"] = FRONTIER["started_at"]
+        _ensure_frontier_thread()
+        FRONTIER_COND.notify_all()
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+    return frontier_snapshot()
+
+
+def frontier_stop() -> dict:
+    if not is_job_owner():
+        _job_command("frontier_stop")
+        return frontier_snapshot()
+    with FRONTIER_COND:
+        if FRONTIER["state"] == "running":
+            FRONTIER["state"] = "stopped"
+            FRONTIER["updated_at"] = now_iso()
+        FRONTIER_COND.notify_all()
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True)
+    return frontier_snapshot()
+
+
+# =========================
+# Keli gunicorn worker'iai (SHARED_STATE)
+# =========================
+# Kiekvienas worker'is – atskiras procesas: rezultatai bendroje SQLite DB, config / range – jos meta
+# eilutėje (shared_sync pritaiko kitų worker'ių pakeitimus), fetch tempas – SharedRateLimiter.
+# Job'ą vykdo tik lyderis (laiko flock'ą); kiti job komandas perduoda per meta('job_cmd') eilutę
+# ir rodo lyderio įrašytą job snapshot'ą. Lyderiui mirus, jo vietą perima pirmas pastebėjęs worker'is.
+SHARED_LEADER = FileLock(STATE_FILE.with_suffix(".leader")) if SHARED_STATE else None
+_shared_lock = threading.Lock()
+_shared_seen: dict = {}  # meta dalys, kokias paskutinį kartą matėm DB'e
+_shared_job: dict = {}   # lyderio job snapshot'as (kai lyderis – ne šis procesas)
+_shared_last_sync = 0.0
+_shared_sync_errors = 0
+_shared_sync_error = None  # paskutinė fono sync klaida (matosi shared_metrics)
+
+
+def is_job_owner() -> bool:
+    """Ar job'ą vykdo šis procesas (be SHARED_STATE – visada)."""
+    return SHARED_LEADER is None or SHARED_LEADER.held
+
+
+def _become_leader(meta: dict):
+    """Perimta lyderystė: job'as tęsiamas nuo paskutinio lyderio įrašyto cursor'iaus."""
+    global _shared_job, _shared_frontier
+    _shared_job = {}
+    _shared_frontier = {}
+    restore_job_state(meta.get("job"))
+    with JOB_LOCK:
+        if JOB["state"] in ("running", "paused"):
+            _ensure_job_thread()
+    restore_frontier_state(meta.get("frontier"))
+    with FRONTIER_LOCK:
+        if FRONTIER["state"] == "running":
+            _ensure_frontier_thread()
+
+
+def _job_command(action: str, **args) -> dict:
+    """Ne lyderis: job (ir frontier) komanda lyderiui per meta('job_cmd'); laukiam, kol jis ją įvykdys."""
+    global _shared_job, _shared_frontier
+    cmd_id = f"{os.getpid()}-{time.monotonic_ns()}"
+    CACHE.update_meta("job_cmd", lambda old: {"id": cmd_id, "action": action, "args": args, "done": False})
+    deadline = time.monotonic() + SHARED_CMD_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        cmd = CACHE.load_meta("job_cmd") or {}
+        if cmd.get("id") != cmd_id:
+            raise RuntimeError("Job komandą perrašė kito worker'io komanda – pabandyk dar kartą.")
+        if cmd.get("done"):
+            _shared_job = cmd.get("job") or _shared_job
+            _shared_frontier = cmd.get("frontier") or _shared_frontier
+            if cmd.get("error"):
+                raise RuntimeError(cmd["error"])
+            return dict(_shared_job)
+    raise RuntimeError("Job'o vykdytojas (lyderis) neatsako – pabandyk po kelių sekundžių.")
+
+
+def _job_command_run():
+    """Lyderis: įvykdo laukiančią kito worker'io job komandą ir įrašo atsakymą."""
+    cmd = CACHE.load_meta("job_cmd")
+    if not cmd or cmd.get("done"):
+        return
+    err = None
+    action = cmd.get("action")
+    try:
+        if action == "start":
+            job_start(**(cmd.get("args") or {}))
+        elif action == "frontier_start":
+            frontier_start(**(cmd.get("args") or {}))
+        elif action == "frontier_stop":
+            frontier_stop()
+        else:
+            job_set_state(action)
+    except (RuntimeError, KeyError, TypeError, ValueError) as e:
+        err = str(e) or "Nežinoma job komanda."
+    job, frontier = job_snapshot(), frontier_snapshot()
+
+    def done(cur):
+        if not cur or cur.get("id") != cmd.get("id"):
+            return None  # jau pakeista nauja komanda
+        return {**cur, "done": True, "error": err, "job": job, "frontier": frontier}
+
+    CACHE.update_meta("job_cmd", done)
+
+
+def shared_sync(min_age: float = 0.0):
+    """Pritaiko kitų worker'ių config / range pakeitimus, atnaujina job vaizdą; lyderis vykdo komandas.
+
+    Dalis pritaikoma tik jei ji DB'e pasikeitė nuo praeito karto ir skiriasi nuo vietinės –
+    taip neatšaukiamas šio worker'io dar neįrašytas pakeitimas ir nekartojamas savas.
+    """
+    global _shared_last_sync, _shared_job, _shared_frontier
+    if not SHARED_STATE:
+        return
+    with _shared_lock:
+        now = time.monotonic()
+        if now - _shared_last_sync < min_age:
+            return
+        _shared_last_sync = now
+
+        CACHE.sync()
+        meta = CACHE.load_meta() or {}
+        local = _state_meta()
+        changed = {}
+        for k in ("config", "range"):
+            if k in meta and meta[k] != _shared_seen.get(k) and meta[k] != local[k]:
+                changed[k] = meta[k]
+            _shared_seen[k] = meta.get(k)
+        if changed:
+            _apply_state_meta(changed)
+
+        if not SHARED_LEADER.held and SHARED_LEADER.acquire(blocking=False):
+            _become_leader(meta)
+        if SHARED_LEADER.held:
+            _job_command_run()
+        else:
+            _shared_job = meta.get("job") or {}
+            _shared_frontier = meta.get("frontier") or {}
+
+
+def _shared_sync_loop():
+    global _shared_sync_errors, _shared_sync_error
+    while True:
+        time.sleep(SHARED_SYNC_SECONDS)
+        try:
+            shared_sync()
+        except Exception as e:
+            _shared_sync_errors += 1
+            _shared_sync_error = f"{now_iso()} {type(e).__name__}: {e}"
+
+
+def shared_metrics() -> dict:
+    return {
+        "enabled": SHARED_STATE,
+        "web_workers": WEB_WORKERS,
+        "pid": os.getpid(),
+        "job_owner": is_job_owner(),
+        "rate_limit_file": str(RATE_LIMIT_FILE) if SHARED_STATE else None,
+        "sync_errors": _shared_sync_errors,
+        "last_sync_error": _shared_sync_error,
+    }
+
+
+if not IS_POOL_CHILD:
+    # užkraunam state iš karto startuojant
+    if SHARED_STATE:
+        SHARED_LEADER.acquire(blocking=False)
+        with FileLock(STATE_FILE.with_suffix(".init")):  # legacy importą į tuščią DB daro vienas worker'is
+            load_state_from_disk()
+    else:
+        load_state_from_disk()
+
+    # jei job'as / frontier sekimas buvo nutraukti restarto metu – tęsiam (SHARED_STATE – tik lyderis)
+    with JOB_LOCK:
+        if JOB["state"] in ("running", "paused") and is_job_owner():
+            _ensure_job_thread()
+    with FRONTIER_LOCK:
+        if FRONTIER["state"] == "running" and is_job_owner():
+            _ensure_frontier_thread()
+
+    threading.Thread(target=_persist_loop, name="state-persister", daemon=True).start()
+    if SHARED_STATE:
+        threading.Thread(target=_shared_sync_loop, name="shared-sync", daemon=True).start()
+    atexit.register(persist_flush)
+    atexit.register(set_parse_workers, 0)  # uždaro parse pool'ą
+
+# =========================
+# Flask
+# =========================
+app = Flask(__name__)
+
+
+@app.before_request
+def _shared_before_request():
+    shared_sync(min_age=0.05)  # kitų worker'ių config / range pakeitimai – prieš atsakant
+
+
+INDEX_HTML = r"""<!doctype html>
+<html lang="lt">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width,initial-scale=1" />
+  <title>Aruodas ID tikrintuvas</title>
+  <style>
+    body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 16px; }
+    .bar { display:flex; flex-wrap:wrap; gap:8px; align-items:center; margin-bottom: 12px; }
+    input[type="text"], input[type="number"], select { padding: 6px 8px; font-size: 14px; }
+    input[type="text"] { width: 170px; }
+    input[type="number"] { width: 140px; }
+    button { padding: 7px 10px; font-size: 14px; cursor:pointer; }
+    button:disabled { opacity: 0.55; cursor: not-allowed; }
+    small { color:#666; }
+    .grid { display:grid; grid-template-columns: 1fr; gap: 14px; }
+    @media (min-width: 1000px) { .grid { grid-template-columns: 1fr 1fr; } }
+    table { width:100%; border-collapse: collapse; table-layout: fixed; }
+    th, td { border: 1px solid #ddd; padding: 6px 8px; font-size: 13px; vertical-align: top; }
+    th { background: #f7f7f7; position: sticky; top:0; z-index: 1; }
+    td.nowrap { white-space:nowrap; }
+    tr.found { background: #eaffea; }
+    tr.notfound { background: #ffecec; }
+    tr.challenge { background: #fff4db; }
+    tr.error { background: #f5d6ff; }
+    tr.unknown { background: #fbfbfb; }
+    a { color: inherit; }
+    .status { font-weight: 700; }
+    .hit { color: #0b63d1; font-weight: 700; }
+    .mono { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; }
+    .note { color:#444; word-break: break-word; }
+    .pill { display:inline-block; padding:2px 6px; border:1px solid #ccc; border-radius:999px; font-size:12px; background:#fff; }
+    textarea { width: 100%; height: 180px; font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; font-size: 12px; }
+    .card { border:1px solid #ddd; border-radius:8px; padding:10px; }
+    .muted { color:#777; }
+    .rate-btn { border: 1px solid #bbb; background: #fff; border-radius: 8px; }
+    .rate-btn.active { border-color: #111; font-weight: 700; }
+    #btnAutoToggle { border-radius: 10px; }
+    #btnAutoToggle.running { font-weight: 800; }
+    .warn { background:#fff4db; border:1px solid #f0d28a; padding:10px; border-radius:8px; }
+  </style>
+</head>
+<body>
+  <h2 style="margin:0 0 6px 0;">Aruodas ID tikrintuvas</h2>
+
+  <div class="warn" style="margin: 8px 0 12px 0;">
+    <b>⚠️ ĮSPĖJIMAS:</b> tik testavimui/eksperimentams. <b>Nenaudoti produkcinėje aplinkoje.</b>
+    <div class="muted" style="margin-top:4px;">Pastaba: turi iki <b>__CONC__</b> lygiagrečių užklausų į tikslą (su global rate-limit).</div>
+  </div>
+
+  <div class="bar">
+    <span class="pill" id="rangePill">ID intervalas: <b class="mono" id="pillStart">1-__START__</b> … <b class="mono" id="pillEnd">1-__END__</b> (visi, STEP=1)</span>
+    <span class="pill" id="countPill">Kiekis: <b class="mono" id="countVal">—</b></span>
+    <span class="pill">User-Agent: <span class="mono">__UA__</span></span>
+    <span class="pill" id="ratePill">Rate limit: min <b class="mono" id="rateVal">__MIN__</b>s + jitter</span>
+    <span class="pill" id="autoPill">Auto: OFF</span>
+    <span class="pill" id="speedPill">Greitis: <b class="mono" id="speedVal">0</b>/min</span>
+  </div>
+
+  <div class="bar">
+    <span class="muted">Nustatyk ID intervalą:</span>
+    <input id="rangeStart" type="number" step="1" value="__START__" />
+    <input id="rangeEnd" type="number" step="1" value="__END__" />
+    <button id="btnGenerate">Generuoti sąrašą</button>
+    <small class="muted">Ši versija tikrina VISUS ID (lyginius+nelyginius) – STEP=1.</small>
+  </div>
+
+  <div class="bar">
+    <span class="muted">Rate limit:</span>
+    <button class="rate-btn" data-rate="0.02">0.02s</button>
+    <button class="rate-btn" data-rate="0.05">0.05s</button>
+    <button class="rate-btn" data-rate="0.1">0.1s</button>
+    <button class="rate-btn" data-rate="0.2">0.2s</button>
+    <button class="rate-btn" data-rate="0.5">0.5s</button>
+    <button class="rate-btn" data-rate="1">1s</button>
+    <button class="rate-btn" data-rate="2">2s</button>
+    <input id="rateCustom" type="number" step="0.001" min="0.01" max="60" placeholder="pvz. 0.35" style="width:100px;" />
+    <button id="btnRateCustom">Nustatyti</button>
+    <small class="muted">Keičia serverio limitą ir išsisaugo (persist). Galima bet kuri reikšmė 0.01..60 s.</small>
+    <label class="muted"><input id="adaptiveToggle" type="checkbox" /> Adaptyvus (AIMD)</label>
+    <span class="pill" id="adaptivePill">Adaptyvus: OFF</span>
+  </div>
+
+  <div class="bar">
+    <span class="muted">Auto batch (IDs per API call):</span>
+    <select id="batchSize">
+      <option value="1">1</option>
+      <option value="5">5</option>
+      <option value="10">10</option>
+      <option value="20">20</option>
+      <option value="50" selected>50</option>
+      <option value="100">100</option>
+      <option value="200">200</option>
+      <option value="250">250</option>
+      <option value="500">500</option>
+      <option value="1000">1000</option>
+    </select>
+    <small class="muted">Serveris vykdo iki __CONC__ fetch'ų į tikslą.</small>
+    <span class="muted">Tvarka (Auto ir job):</span>
+    <select id="crawlOrder">
+      <option value="density">tankiausi blokai pirma</option>
+      <option value="asc">iš eilės</option>
+    </select>
+  </div>
+
+  <div class="bar">
+    <input id="idInput" type="text" value="1-__START__" />
+    <button id="btnCheck">Tikrinti ID</button>
+    <button id="btnRandom">Atsitiktinis ID</button>
+    <button id="btnForce">Tikrinti (force)</button>
+    <button id="btnAutoToggle">▶ Auto (OFF)</button>
+    <small class="muted">Auto eina per netikrintus ID iš eilės. Sustos, jei gaus <b>ERROR</b>.</small>
+  </div>
+
+  <div class="bar">
+    <span class="muted">Serverio job:</span>
+    <button id="btnJobStart">▶ Start</button>
+    <button id="btnJobPause">⏸ Pauzė</button>
+    <button id="btnJobResume">⏯ Tęsti</button>
+    <button id="btnJobCancel">■ Atšaukti</button>
+    <span class="pill" id="jobPill">Job: —</span>
+    <small class="muted">Job'as eina serveryje per visą intervalą – naršyklę galima uždaryti.</small>
+  </div>
+
+  <div class="grid">
+    <div>
+      <h3 style="margin: 8px 0;">✅ Rasti skelbimai (FOUND arba sugiharos hit)</h3>
+      <table>
+        <thead>
+          <tr>
+            <th style="width:120px;">ID</th>
+            <th style="width:90px;">Įdėtas</th>
+            <th style="width:120px;">Miestas</th>
+            <th style="width:140px;">Rajonas</th>
+            <th>Pastabos</th>
+          </tr>
+        </thead>
+        <tbody id="foundBody"></tbody>
+      </table>
+      <div class="muted" style="margin-top:6px;">Rūšiuojama (naujausi viršuje).</div>
+    </div>
+
+    <div>
+      <h3 style="margin: 8px 0;">📋 Visi ID (puslapiais)</h3>
+
+      <div class="bar">
+        <span class="muted">Puslapis:</span>
+        <button id="btnPrevPage">◀</button>
+        <span class="pill mono" id="pagePill">—</span>
+        <button id="btnNextPage">▶</button>
+
+        <span class="muted">Eilutės/pusl.:</span>
+        <select id="pageSize">
+          <option value="100">100</option>
+          <option value="250">250</option>
+          <option value="500" selected>500</option>
+          <option value="1000">1000</option>
+        </select>
+
+        <span class="muted">Šokti į ID:</span>
+        <input id="jumpTo" type="text" value="1-__START__" style="width:170px;" />
+        <button id="btnJump">Eiti</button>
+
+        <small class="muted">Dideliems intervalams čia rodoma tik dalis – nebekuriama 50k+ eilučių DOM’e.</small>
+      </div>
+
+      <div class="bar">
+        <input id="filter" type="text" placeholder="Filtras (pvz. 3123)" />
+        <button id="btnClearFilter">Valyti filtrą</button>
+        <button id="btnShowOnlyBad">Rodyti tik raudonus/oranžinius</button>
+        <button id="btnShowAll">Rodyti visus</button>
+      </div>
+
+      <small class="muted">Pastaba: filtras taikomas tik dabartiniam puslapiui.</small>
+
+      <table>
+        <thead>
+          <tr>
+            <th style="width:120px;">ID</th>
+            <th style="width:90px;">Status</th>
+            <th style="width:90px;">Įdėtas</th>
+            <th style="width:120px;">Miestas</th>
+            <th style="width:140px;">Rajonas</th>
+            <th>Pastabos</th>
+          </tr>
+        </thead>
+        <tbody id="allBody"></tbody>
+      </table>
+    </div>
+  </div>
+
+  <h3 style="margin: 14px 0 6px 0;">🧪 Debug (įklijuok HTML atsakymą ir pasitikrink parserį)</h3>
+  <div class="card">
+    <div class="bar">
+      <input id="debugUrl" type="text" placeholder="(nebūtina) final_url pvz. https://www.aruodas.lt/..." style="width:420px;" />
+      <button id="btnDebugParse">Parse DEBUG</button>
+    </div>
+    <textarea id="debugHtml" placeholder="Čia įklijuok visą HTML (kurį gavai su curl ar kitu metodu)"></textarea>
+    <div id="debugOut" class="note" style="margin-top:8px;"></div>
+  </div>
+
+<script>
+// Dinaminis range (keičiamas po page load)
+let START = __START__;
+let END   = __END__;
+let STEP  = __STEP__;
+let showOnlyBad = false;
+
+// Auto režimo būsena
+let autoRunning = false;
+let autoStopRequested = false;
+let autoNextNum = START;
+
+// State krovimo apsauga
+let stateLoading = false;
+let statePromise = null;
+
+// Patikrintų ID žemėlapis (kad auto praleistų jau tikrintus): vienas baitas per ID
+// intervale (0 – netikrintas, kodai kaip /api/status_map); ID už intervalo – extra Set'e.
+const STATUS_CODE = {FOUND:1, NOT_FOUND:2, CHALLENGE:3, ERROR:4};
+const checkedIds = {
+  start: 0,
+  codes: new Uint8Array(0),
+  count: 0,
+  extra: new Set(),
+  etag: null,
+
+  reset(start, end){
+    this.start = start;
+    this.codes = new Uint8Array(Math.max(0, end - start + 1));
+    this.count = 0;
+    this.extra.clear();
+    this.etag = null;
+  },
+  clear(){ this.reset(START, END); },
+  load(start, codes, etag){
+    this.start = start;
+    this.codes = codes;
+    let c = 0;
+    for(let i=0;i<codes.length;i++){ if(codes[i]) c++; }
+    this.count = c;
+    this.extra.clear();
+    this.etag = etag;
+  },
+  index(id){
+    const i = numFromId(id) - this.start;
+    return (i >= 0 && i < this.codes.length) ? i : -1;
+  },
+  has(id){
+    const i = this.index(id);
+    return i >= 0 ? this.codes[i] !== 0 : this.extra.has(id);
+  },
+  hasNum(n){
+    const i = n - this.start;
+    return (i >= 0 && i < this.codes.length) ? this.codes[i] !== 0 : this.extra.has(makeId(n));
+  },
+  add(id, data){
+    const i = this.index(id);
+    if(i < 0){ this.extra.add(id); return; }
+    if(!this.codes[i]) this.count++;
+    const st = data && data.status;
+    this.codes[i] = (STATUS_CODE[st] || 5) | ((data && data.sugiharos_found === true) ? 8 : 0);
+  },
+  get size(){ return this.count + this.extra.size; },
+};
+
+// Visas intervalo padengimas vienu binary request'u (ETag – jei nepasikeitė, 304)
+async function loadStatusMap(){
+  const url = `/api/status_map?start=${START}&end=${END}`;
+  const headers = {};
+  if(checkedIds.etag && checkedIds.start === START && checkedIds.codes.length === END - START + 1){
+    headers["If-None-Match"] = checkedIds.etag;
+  }
+  const resp = await fetch(url, {headers, cache: "no-store"});
+  if(resp.status === 304) return;
+  if(!resp.ok) throw new Error("status_map HTTP " + resp.status);
+  const buf = await resp.arrayBuffer();
+  checkedIds.load(START, new Uint8Array(buf), resp.headers.get("ETag"));
+}
+
+// Lokalus rezultato cache (tik tai, ką UI jau parsisiuntė iš serverio)
+const resultsMap = new Map(); // id -> data
+
+// ===== Greičio skaičiavimas (checks per minute) =====
+// Skaičiuojam tik realius fetch į aruodas.lt: data.from_cache === false
+const speedWindow = []; // timestamps (ms)
+function recordSpeed(data){
+  if(data && data.from_cache === false){
+    const now = Date.now();
+    speedWindow.push(now);
+    while(speedWindow.length && speedWindow[0] < now - 60000){
+      speedWindow.shift();
+    }
+  }
+}
+function updateSpeedUi(){
+  const now = Date.now();
+  while(speedWindow.length && speedWindow[0] < now - 60000){
+    speedWindow.shift();
+  }
+  const el = document.getElementById("speedVal");
+  if(el) el.textContent = String(speedWindow.length);
+}
+setInterval(updateSpeedUi, 1000);
+
+// Auto batch dydis (IDs per API call)
+const AUTO_BATCH_OPTIONS = [1,5,10,20,50,100,200,250,500,1000];
+let AUTO_BATCH_SIZE = parseInt(localStorage.getItem("autoBatchSize") || "50", 10);
+if(!Number.isFinite(AUTO_BATCH_SIZE) || AUTO_BATCH_SIZE <= 0) AUTO_BATCH_SIZE = 50;
+if(!AUTO_BATCH_OPTIONS.includes(AUTO_BATCH_SIZE)) AUTO_BATCH_SIZE = 50;
+
+// Tikrinimo tvarka: density – pirma blokai, kuriuose daugiausia FOUND (kaip serverio DensityScheduler)
+const SCHED_BLOCK = __SCHED_BLOCK__;
+const SCHED_PRIOR_WEIGHT = __SCHED_PRIOR__;
+let CRAWL_ORDER = localStorage.getItem("crawlOrder") || "__ORDER__";
+if(CRAWL_ORDER !== "asc" && CRAWL_ORDER !== "density") CRAWL_ORDER = "density";
+
+// „Visi ID“ puslapiavimas
+const PAGE_SIZE_OPTIONS = [100,250,500,1000];
+let PAGE_SIZE = parseInt(localStorage.getItem("pageSize") || "500", 10);
+if(!Number.isFinite(PAGE_SIZE) || PAGE_SIZE <= 0) PAGE_SIZE = 500;
+if(!PAGE_SIZE_OPTIONS.includes(PAGE_SIZE)) PAGE_SIZE = 500;
+
+let currentPage = 0;
+let pageLoadToken = 0;
+
+function totalCount(){
+  return Math.floor((END-START)/STEP)+1;
+}
+function totalPages(){
+  return Math.max(1, Math.ceil(totalCount()/PAGE_SIZE));
+}
+function checkedCount(){
+  return checkedIds.size;
+}
+
+function numFromId(id) { const m=/^1-(\d+)$/.exec(id); return m?parseInt(m[1],10):NaN; }
+function makeId(n){ return "1-"+String(n); }
+
+function randomInRange(){
+  const count = totalCount();
+  const k = Math.floor(Math.random()*count);
+  return START + k*STEP;
+}
+
+function statusToClass(s){
+  if(s==="FOUND") return "found";
+  if(s==="NOT_FOUND") return "notfound";
+  if(s==="CHALLENGE") return "challenge";
+  if(s==="ERROR") return "error";
+  return "unknown";
+}
+function statusLabel(s){
+  if(s==="FOUND") return "FOUND";
+  if(s==="NOT_FOUND") return "NĖRA";
+  if(s==="CHALLENGE") return "CHALLENGE";
+  if(s==="ERROR") return "ERROR";
+  return "—";
+}
+function safeText(x){ return (x===null||x===undefined)?"":String(x); }
+
+function updatePagePill(extraText=""){
+  const pill = document.getElementById("pagePill");
+  if(!pill) return;
+  const tp = totalPages();
+  const cur = Math.min(tp, Math.max(1, currentPage+1));
+  pill.textContent = `${cur}/${tp} (ps=${PAGE_SIZE})${extraText ? " – " + extraText : ""}`;
+}
+
+function updateRangeUi(){
+  const rs = document.getElementById("rangeStart");
+  const re = document.getElementById("rangeEnd");
+  if(rs) rs.value = String(START);
+  if(re) re.value = String(END);
+
+  const ps = document.getElementById("pillStart");
+  const pe = document.getElementById("pillEnd");
+  if(ps) ps.textContent = "1-" + String(START);
+  if(pe) pe.textContent = "1-" + String(END);
+
+  const cnt = totalCount();
+  const cv = document.getElementById("countVal");
+  if(cv) cv.textContent = String(cnt);
+
+  const idInput = document.getElementById("idInput");
+  if(idInput){
+    const cur = idInput.value.trim();
+    const n = numFromId(cur);
+    if(!cur || !Number.isFinite(n) || n < START || n > END){
+      idInput.value = makeId(START);
+    }
+  }
+
+  const jump = document.getElementById("jumpTo");
+  if(jump){
+    const cur = jump.value.trim();
+    const n = numFromId(cur);
+    if(!cur || !Number.isFinite(n) || n < START || n > END){
+      jump.value = makeId(START);
+    }
+  }
+
+  autoNextNum = START;
+  currentPage = 0;
+  updatePagePill();
+}
+
+function buildAllRow(id){
+  const tr=document.createElement("tr");
+  tr.dataset.id=id;
+  tr.dataset.num=String(numFromId(id));
+  tr.className="unknown";
+  tr.innerHTML=`
+    <td class="nowrap mono">
+      <a href="https://www.aruodas.lt/${id}/" target="_blank" rel="noopener">${id}</a>
+      <div><button data-action="check" data-id="${id}">Tikrinti</button></div>
+    </td>
+    <td class="status">—</td>
+    <td class="mono"></td>
+    <td></td><td></td>
+    <td class="note"></td>`;
+  return tr;
+}
+
+function buildFoundRow(id,data){
+  const tr=document.createElement("tr");
+  tr.dataset.id=id;
+  tr.dataset.num=String(numFromId(id));
+  tr.dataset.date=data.inserted_date||"";
+  tr.className="found";
+
+  const pill = (data.status && data.status !== "FOUND")
+    ? `<span class="pill mono">${statusLabel(data.status)}</span> `
+    : "";
+
+  tr.innerHTML=`
+    <td class="nowrap mono">
+      <a href="https://www.aruodas.lt/${id}/" target="_blank" rel="noopener">${id}</a>
+      <div><a class="mono" href="/raw?id=${encodeURIComponent(id)}" target="_blank" rel="noopener">raw</a></div>
+    </td>
+    <td class="mono">${safeText(data.inserted_date||"")}</td>
+    <td>${safeText(data.city||"")}</td>
+    <td>${safeText(data.district||"")}</td>
+    <td class="note">${pill}${data.sugiharos_snippet_html||""}</td>`;
+  return tr;
+}
+
+function updateAllRow(tr,data){
+  tr.className=statusToClass(data.status);
+  const tds=tr.querySelectorAll("td");
+  tds[1].textContent=statusLabel(data.status);
+  tds[2].textContent=data.inserted_date||"";
+  tds[3].textContent=data.city||"";
+  tds[4].textContent=data.district||"";
+
+  if(data.status==="ERROR" && data.error){
+    tds[5].textContent = data.error;
+  } else {
+    tds[5].innerHTML = data.sugiharos_snippet_html||"";
+  }
+
+  const idCell=tds[0];
+  if(!idCell.querySelector('a[href^="/raw"]') && (data.status && data.status!=="—")){
+    const div=document.createElement("div");
+    div.innerHTML=`<a class="mono" href="/raw?id=${encodeURIComponent(data.id||tr.dataset.id)}" target="_blank" rel="noopener">raw</a>`;
+    idCell.appendChild(div);
+  }
+}
+
+function sortFoundTable(){
+  const body=document.getElementById("foundBody");
+  const rows=Array.from(body.querySelectorAll("tr"));
+  rows.sort((a,b)=>{
+    const da=a.dataset.date||"", db=b.dataset.date||"";
+    if(da!==db) return db.localeCompare(da);
+    return (parseInt(b.dataset.num,10)-parseInt(a.dataset.num,10));
+  });
+  for(const r of rows) body.appendChild(r);
+}
+
+function applyFilter(){
+  const q=document.getElementById("filter").value.trim();
+  const rows=document.querySelectorAll("#allBody tr");
+  for(const tr of rows){
+    const id=tr.dataset.id, cls=tr.className;
+    const isBad=(cls==="notfound"||cls==="challenge"||cls==="error");
+    const passQ=!q||id.includes(q)||tr.dataset.num.includes(q);
+    const passBad=!showOnlyBad||isBad;
+    tr.style.display=(passQ&&passBad)?"":"none";
+  }
+}
+
+function updateAutoPill(extraText=""){
+  const pill = document.getElementById("autoPill");
+  if(!pill) return;
+  const base = autoRunning ? "Auto: ON" : "Auto: OFF";
+  const prog = `${checkedCount()}/${totalCount()}`;
+  const bs = `batch=${AUTO_BATCH_SIZE}`;
+  pill.textContent = `${base} (${prog}, ${bs})${extraText ? " – " + extraText : ""}`;
+}
+
+function chunkArray(arr, size){
+  const out=[];
+  for(let i=0;i<arr.length;i+=size){
+    out.push(arr.slice(i,i+size));
+  }
+  return out;
+}
+
+function pageIds(pageIndex){
+  const total = totalCount();
+  const startIndex = pageIndex * PAGE_SIZE;
+  const out = [];
+
+  for(let i=0;i<PAGE_SIZE;i++){
+    const idx = startIndex + i;
+    if(idx >= total) break;
+    const n = START + idx*STEP;
+    out.push(makeId(n));
+  }
+  return out;
+}
+
+function renderAllPage(){
+  const body=document.getElementById("allBody");
+  body.innerHTML = "";
+  const ids = pageIds(currentPage);
+  const frag=document.createDocumentFragment();
+
+  for(const id of ids){
+    const tr = buildAllRow(id);
+    const cached = resultsMap.get(id);
+    if(cached) updateAllRow(tr, cached);
+    frag.appendChild(tr);
+  }
+  body.appendChild(frag);
+
+  updatePagePill();
+  applyFilter();
+}
+
+async function fetchCacheBatch(ids){
+  let resp, data;
+  try{
+    resp = await fetch("/api/cache_batch", {
+      method:"POST",
+      headers:{"Content-Type":"application/json"},
+      body: JSON.stringify({ ids })
+    });
+    data = await resp.json();
+  } catch(err){
+    return [];
+  }
+
+  if(!resp || !resp.ok || !data || data.error){
+    return [];
+  }
+  return data.items || [];
+}
+
+async function loadCacheForVisiblePage(){
+  const token = ++pageLoadToken;
+  const ids = pageIds(currentPage);
+
+  // tik tie, kurie jau patikrinti (kad nerizikuotume fetch'int į tikslą)
+  const need = ids.filter(id => checkedIds.has(id) && !resultsMap.has(id));
+  if(!need.length){
+    updatePagePill();
+    return;
+  }
+
+  updatePagePill("kraunama…");
+
+  const chunks = chunkArray(need, 500);
+
+  for(const chunk of chunks){
+    if(token !== pageLoadToken) return;
+    const items = await fetchCacheBatch(chunk);
+    for(const item of items){
+      applyResultToUi(item, false);
+    }
+  }
+
+  sortFoundTable();
+  applyFilter();
+  updateAutoPill();
+  updatePagePill();
+}
+
+function setPage(p){
+  const tp = totalPages();
+  currentPage = Math.max(0, Math.min(tp-1, p));
+  renderAllPage();
+  loadCacheForVisiblePage();
+}
+
+function jumpToId(idLike){
+  const s = (idLike||"").trim();
+  if(!s) return;
+
+  let n = NaN;
+  const m = /^1-(\d+)$/.exec(s);
+  if(m) n = parseInt(m[1],10);
+  else if(/^\d+$/.test(s)) n = parseInt(s,10);
+
+  if(!Number.isFinite(n)){
+    alert("Netinkamas ID / skaičius. Pvz: 1-3000000");
+    return;
+  }
+  if(n < START || n > END){
+    alert("ID ne intervale.");
+    return;
+  }
+
+  const idx = Math.floor((n - START) / STEP);
+  const page = Math.floor(idx / PAGE_SIZE);
+  setPage(page);
+
+  const jump = document.getElementById("jumpTo");
+  if(jump) jump.value = makeId(n);
+
+  setTimeout(()=>{
+    const id = makeId(n);
+    const row = document.querySelector(`#allBody tr[data-id="${CSS.escape(id)}"]`);
+    if(row){
+      row.style.outline = "2px solid #0b63d1";
+      setTimeout(()=>{ row.style.outline = ""; }, 1200);
+    }
+  }, 50);
+}
+
+function applyResultToUi(data, doSort=true){
+  recordSpeed(data);
+  updateSpeedUi();
+
+  const idNorm=data.id;
+  checkedIds.add(idNorm, data);
+  resultsMap.set(idNorm, data);
+
+  const putToFound = (data.status === "FOUND") || (data.sugiharos_found === true);
+
+  if(putToFound){
+    const existing=document.querySelector(`#foundBody tr[data-id="${CSS.escape(idNorm)}"]`);
+    if(existing) existing.remove();
+    document.getElementById("foundBody").appendChild(buildFoundRow(idNorm,data));
+    if(doSort) sortFoundTable();
+  }
+
+  const allRow=document.querySelector(`#allBody tr[data-id="${CSS.escape(idNorm)}"]`);
+  if(allRow){
+    updateAllRow(allRow, data);
+  }
+}
+
+async function checkId(id, force=false, silent=false){
+  let resp, data;
+  try{
+    resp = await fetch(`/api/check?id=${encodeURIComponent(id)}&force=${force?"1":"0"}`);
+    data = await resp.json();
+  } catch(err){
+    data = {
+      id: id,
+      checked_at: new Date().toISOString(),
+      status: "ERROR",
+      error: String(err),
+      http_status: null,
+      inserted_date: null,
+      city: null,
+      district: null,
+      final_url: null,
+      sugiharos_found: false,
+      sugiharos_snippet_html: null,
+      from_cache: false
+    };
+  }
+
+  if(!resp || !resp.ok || data.error){
+    data = data || {};
+    if(!data.id) data.id = id;
+    if(!data.status) data.status = "ERROR";
+    if(!data.error) data.error = data.error || "Klaida tikrinant ID";
+    if(data.from_cache === undefined) data.from_cache = false;
+    applyResultToUi(data, true);
+    applyFilter();
+    updateAutoPill();
+    if(!silent){
+      alert(data.error || "Klaida tikrinant ID");
+    }
+    return data;
+  }
+
+  applyResultToUi(data, true);
+  applyFilter();
+  updateAutoPill();
+  return data;
+}
+
+async function checkBatch(ids, force=false, silent=false, stopOnError=false){
+  let resp, data;
+  try{
+    resp = await fetch("/api/check_batch", {
+      method:"POST",
+      headers:{"Content-Type":"application/json"},
+      body: JSON.stringify({
+        ids: ids,
+        force: force ? 1 : 0,
+        stop_on_error: stopOnError ? 1 : 0
+      })
+    });
+    data = await resp.json();
+  } catch(err){
+    const msg = String(err);
+    if(!silent) alert(msg);
+    return [{
+      id: (ids && ids[0]) ? ids[0] : "1-0",
+      checked_at: new Date().toISOString(),
+      status: "ERROR",
+      error: msg,
+      http_status: null,
+      inserted_date: null,
+      city: null,
+      district: null,
+      final_url: null,
+      sugiharos_found: false,
+      sugiharos_snippet_html: null,
+      from_cache: false
+    }];
+  }
+
+  if(!resp || !resp.ok || !data || data.error){
+    const msg = (data && data.error) ? data.error : "Klaida tikrinant batch";
+    if(!silent) alert(msg);
+    return [{
+      id: (ids && ids[0]) ? ids[0] : "1-0",
+      checked_at: new Date().toISOString(),
+      status: "ERROR",
+      error: msg,
+      http_status: null,
+      inserted_date: null,
+      city: null,
+      district: null,
+      final_url: null,
+      sugiharos_found: false,
+      sugiharos_snippet_html: null,
+      from_cache: false
+    }];
+  }
+
+  return data.items || [];
+}
+
+function updateRateUi(minInterval){
+  const el=document.getElementById("rateVal");
+  if(el) el.textContent = String(minInterval);
+
+  const btns = document.querySelectorAll("button.rate-btn");
+  btns.forEach(b => {
+    const r = parseFloat(b.dataset.rate);
+    b.classList.toggle("active", Math.abs(r - parseFloat(minInterval)) < 1e-9);
+  });
+}
+
+async function setRate(minInterval){
+  const resp = await fetch("/api/config", {
+    method:"POST",
+    headers:{"Content-Type":"application/json"},
+    body: JSON.stringify({min_interval: minInterval})
+  });
+  const data = await resp.json();
+  if(!resp.ok || data.error){
+    alert(data.error || "Nepavyko pakeisti rate limit");
+    return;
+  }
+  updateRateUi(data.min_interval);
+}
+
+async function setRangeOnServer(startVal, endVal){
+  const resp = await fetch("/api/range", {
+    method:"POST",
+    headers:{"Content-Type":"application/json"},
+    body: JSON.stringify({start: startVal, end: endVal})
+  });
+  const data = await resp.json();
+  if(!resp.ok || data.error){
+    alert(data.error || "Nepavyko nustatyti intervalo");
+    return false;
+  }
+  return true;
+}
+
+function setControlsDisabled(disabled, disableAuto=false){
+  const autoBtn = document.getElementById("btnAutoToggle");
+  if(autoBtn){
+    autoBtn.disabled = disableAuto ? disabled : false;
+  }
+
+  const ids = ["btnCheck","btnRandom","btnForce","btnGenerate"];
+  ids.forEach(id=>{
+    const el = document.getElementById(id);
+    if(el) el.disabled = disabled;
+  });
+
+  document.querySelectorAll("button.rate-btn").forEach(b => b.disabled = disabled);
+  ["rateCustom","btnRateCustom"].forEach(id=>{
+    const el = document.getElementById(id);
+    if(el) el.disabled = disabled;
+  });
+  document.querySelectorAll("button[data-action='check']").forEach(b => b.disabled = disabled);
+
+  [
+    "filter","btnClearFilter","btnShowOnlyBad","btnShowAll",
+    "idInput","rangeStart","rangeEnd","batchSize",
+    "btnPrevPage","btnNextPage","pageSize","jumpTo","btnJump"
+  ].forEach(id=>{
+    const el = document.getElementById(id);
+    if(el) el.disabled = disabled;
+  });
+}
+
+function setAutoButtonUi(){
+  const btn = document.getElementById("btnAutoToggle");
+  if(!btn) return;
+  btn.classList.toggle("running", autoRunning);
+  btn.textContent = autoRunning ? "⏸ Auto (STOP)" : "▶ Auto (OFF)";
+}
+
+function findNextUncheckedBatch(fromNum, limit){
+  if(CRAWL_ORDER === "density" && STEP === 1 && checkedIds.start === START && checkedIds.codes.length === END - START + 1){
+    return findDenseUncheckedBatch(limit);
+  }
+  const total = totalCount();
+  let n = fromNum;
+  const out = [];
+
+  for(let i=0;i<total && out.length<limit;i++){
+    if(n > END) n = START; // wrap – jei kažką praleidai, vis tiek viską patikrins
+    if(!checkedIds.hasNum(n)){
+      out.push({id: makeId(n), n});
+    }
+    n += STEP;
+  }
+
+  return out.length ? out : null;
+}
+
+// Blokas su didžiausiu (found + W*p) / (seen + W), kuriame dar yra netikrintų ID (p – viso intervalo
+// FOUND dalis). Statistika kas batch'ą perskaičiuojama iš checkedIds kodų – visada su naujausiais rezultatais.
+function findDenseUncheckedBatch(limit){
+  const codes = checkedIds.codes;
+  const nb = Math.ceil(codes.length / SCHED_BLOCK);
+  const bf = new Uint32Array(nb), bs = new Uint32Array(nb), bu = new Uint32Array(nb);
+  let found = 0, seen = 0;
+  for(let i=0;i<codes.length;i++){
+    const c = codes[i] & 7, b = (i / SCHED_BLOCK) | 0;
+    if(!c) bu[b]++;
+    else if(c === STATUS_CODE.FOUND){ bf[b]++; bs[b]++; found++; seen++; }
+    else if(c === STATUS_CODE.NOT_FOUND){ bs[b]++; seen++; }
+  }
+  const p = (found + 1) / (seen + 2);
+  let best = -1, bestScore = -1;
+  for(let b=0;b<nb;b++){
+    if(!bu[b]) continue;
+    const score = (bf[b] + SCHED_PRIOR_WEIGHT * p) / (bs[b] + SCHED_PRIOR_WEIGHT);
+    if(score > bestScore){ best = b; bestScore = score; }
+  }
+  if(best < 0) return null;
+
+  const out = [];
+  const hi = Math.min(codes.length, (best + 1) * SCHED_BLOCK);
+  for(let i=best*SCHED_BLOCK;i<hi && out.length<limit;i++){
+    if(!codes[i]) out.push({id: makeId(START + i), n: START + i});
+  }
+  return out;
+}
+
+async function runAuto(){
+  if(autoRunning) return;
+
+  if(stateLoading && statePromise){
+    await statePromise;
+  }
+
+  autoRunning = true;
+  autoStopRequested = false;
+
+  setControlsDisabled(true, false);
+  setAutoButtonUi();
+  updateAutoPill("start");
+
+  let n = autoNextNum;
+
+  while(autoRunning && !autoStopRequested){
+    const batch = findNextUncheckedBatch(n, AUTO_BATCH_SIZE);
+    if(!batch){
+      updateAutoPill("baigta (viskas patikrinta)");
+      break;
+    }
+
+    const ids = batch.map(x => x.id);
+    updateAutoPill(`tikrinama batch: ${ids[0]} … (${ids.length})`);
+
+    const items = await checkBatch(ids, false, true, true);
+
+    for(const item of items){
+      applyResultToUi(item, false);
+    }
+    sortFoundTable();
+    applyFilter();
+    updateAutoPill();
+
+    const bad = items.find(it => (it && (it.status === "ERROR" || it.error)));
+    if(bad){
+      const bid = bad.id || (ids[0] || "");
+      updateAutoPill(`SUSTABDYTA: ERROR ties ${bid}`);
+      break;
+    }
+
+    const processed = items.length;
+    if(processed <= 0){
+      updateAutoPill("SUSTABDYTA: tuščias batch atsakymas");
+      break;
+    }
+    const last = batch[Math.min(processed, batch.length) - 1];
+    n = last.n + STEP;
+    autoNextNum = n;
+
+    await new Promise(r => setTimeout(r, 30));
+  }
+
+  autoRunning = false;
+  autoStopRequested = false;
+
+  setControlsDisabled(false, true);
+  setAutoButtonUi();
+  updateAutoPill();
+}
+
+function stopAuto(){
+  if(!autoRunning) return;
+  autoStopRequested = true;
+  updateAutoPill("stabdoma…");
+}
+
+async function reloadEverything(){
+  if(stateLoading && statePromise) return statePromise;
+
+  stateLoading = true;
+  setControlsDisabled(true, !autoRunning);
+  setAutoButtonUi();
+  updateAutoPill("kraunama…");
+  updatePagePill("kraunama…");
+
+  statePromise = (async()=>{
+    try{
+      checkedIds.clear();
+      resultsMap.clear();
+      speedWindow.length = 0;
+      updateSpeedUi();
+
+      document.getElementById("foundBody").innerHTML = "";
+      document.getElementById("allBody").innerHTML = "";
+
+      // NDJSON srautas: header -> item... -> ids... -> end (nelaukiam viso atsakymo)
+      const resp = await fetch("/api/state?items=found&include_ids=0&format=ndjson");
+      const onMessage = (msg)=>{
+        if(msg.type === "header"){
+          const cfg = msg.config || {};
+          if(cfg.min_interval !== undefined && cfg.min_interval !== null){
+            updateRateUi(cfg.min_interval);
+          }
+
+          const rng = msg.range || {};
+          if(rng.start !== undefined && rng.end !== undefined && rng.step !== undefined){
+            START = parseInt(rng.start,10);
+            END   = parseInt(rng.end,10);
+            STEP  = parseInt(rng.step,10);
+          }
+          checkedIds.reset(START, END);
+          updateRangeUi();
+        } else if(msg.type === "item"){
+          applyResultToUi(msg.item, false);
+        } else if(msg.type === "ids"){
+          for(const id of (msg.ids || [])){
+            checkedIds.add(id);
+          }
+        }
+      };
+
+      const reader = resp.body.getReader();
+      const decoder = new TextDecoder();
+      let buf = "";
+      while(true){
+        const {value, done} = await reader.read();
+        if(done) break;
+        buf += decoder.decode(value, {stream: true});
+        let nl;
+        while((nl = buf.indexOf("\n")) >= 0){
+          const line = buf.slice(0, nl);
+          buf = buf.slice(nl + 1);
+          if(line) onMessage(JSON.parse(line));
+        }
+      }
+      if(buf.trim()) onMessage(JSON.parse(buf));
+
+      await loadStatusMap();
+      updateRangeUi();
+      sortFoundTable();
+
+      renderAllPage();
+      await loadCacheForVisiblePage();
+
+      applyFilter();
+      updateAutoPill();
+    } finally {
+      stateLoading = false;
+
+      if(autoRunning){
+        setControlsDisabled(true, false);
+      } else {
+        setControlsDisabled(false, true);
+      }
+
+      setAutoButtonUi();
+      updateAutoPill();
+      updatePagePill();
+    }
+  })();
+
+  return statePromise;
+}
+
+document.addEventListener("click",async(e)=>{
+  const btn=e.target.closest("button[data-action='check']");
+  if(btn) await checkId(btn.dataset.id,false,false);
+
+  const rbtn = e.target.closest("button.rate-btn");
+  if(rbtn){
+    const val = parseFloat(rbtn.dataset.rate);
+    await setRate(val);
+  }
+});
+
+document.getElementById("btnRateCustom").addEventListener("click",async()=>{
+  const val = parseFloat(document.getElementById("rateCustom").value);
+  if(!Number.isFinite(val)){
+    alert("Įvesk intervalą sekundėmis, pvz. 0.35");
+    return;
+  }
+  await setRate(val);
+});
+
+document.getElementById("btnCheck").addEventListener("click",async()=>{
+  await checkId(document.getElementById("idInput").value.trim(),false,false);
+});
+document.getElementById("btnForce").addEventListener("click",async()=>{
+  await checkId(document.getElementById("idInput").value.trim(),true,false);
+});
+document.getElementById("btnRandom").addEventListener("click",async()=>{
+  const id=makeId(randomInRange());
+  document.getElementById("idInput").value=id;
+  await checkId(id,false,false);
+});
+
+document.getElementById("btnAutoToggle").addEventListener("click", async()=>{
+  if(autoRunning){
+    stopAuto();
+    return;
+  }
+  await runAuto();
+});
+
+const batchSel = document.getElementById("batchSize");
+if(batchSel){
+  batchSel.value = String(AUTO_BATCH_SIZE);
+  batchSel.addEventListener("change", ()=>{
+    const v = parseInt(batchSel.value, 10);
+    if(Number.isFinite(v) && v > 0){
+      AUTO_BATCH_SIZE = v;
+      localStorage.setItem("autoBatchSize", String(v));
+      updateAutoPill();
+    }
+  });
+}
+
+const orderSel = document.getElementById("crawlOrder");
+if(orderSel){
+  orderSel.value = CRAWL_ORDER;
+  orderSel.addEventListener("change", ()=>{
+    CRAWL_ORDER = orderSel.value === "asc" ? "asc" : "density";
+    localStorage.setItem("crawlOrder", CRAWL_ORDER);
+  });
+}
+
+const pageSel = document.getElementById("pageSize");
+if(pageSel){
+  pageSel.value = String(PAGE_SIZE);
+  pageSel.addEventListener("change", ()=>{
+    const v = parseInt(pageSel.value, 10);
+    if(Number.isFinite(v) && v > 0){
+      const firstIdx = currentPage * PAGE_SIZE;
+      PAGE_SIZE = v;
+      localStorage.setItem("pageSize", String(v));
+      const newPage = Math.floor(firstIdx / PAGE_SIZE);
+      setPage(newPage);
+    }
+  });
+}
+
+document.getElementById("btnPrevPage").addEventListener("click", ()=>{
+  setPage(currentPage - 1);
+});
+document.getElementById("btnNextPage").addEventListener("click", ()=>{
+  setPage(currentPage + 1);
+});
+document.getElementById("btnJump").addEventListener("click", ()=>{
+  jumpToId(document.getElementById("jumpTo").value.trim());
+});
+document.getElementById("jumpTo").addEventListener("keydown", (e)=>{
+  if(e.key === "Enter"){
+    jumpToId(document.getElementById("jumpTo").value.trim());
+  }
+});
+
+document.getElementById("btnGenerate").addEventListener("click", async()=>{
+  if(autoRunning){
+    alert("Sustabdyk Auto prieš keičiant intervalą.");
+    return;
+  }
+
+  setControlsDisabled(true, true);
+
+  const s = document.getElementById("rangeStart").value;
+  const e = document.getElementById("rangeEnd").value;
+
+  document.getElementById("filter").value = "";
+  showOnlyBad = false;
+
+  const ok = await setRangeOnServer(s, e);
+  if(!ok){
+    setControlsDisabled(false, true);
+    return;
+  }
+
+  await reloadEverything();
+});
+
+document.getElementById("filter").addEventListener("input",applyFilter);
+document.getElementById("btnClearFilter").addEventListener("click",()=>{
+  document.getElementById("filter").value="";
+  showOnlyBad=false;
+  applyFilter();
+});
+document.getElementById("btnShowOnlyBad").addEventListener("click",()=>{
+  showOnlyBad=true;
+  applyFilter();
+});
+document.getElementById("btnShowAll").addEventListener("click",()=>{
+  showOnlyBad=false;
+  applyFilter();
+});
+
+document.getElementById("btnDebugParse").addEventListener("click", async()=>{
+  const html=document.getElementById("debugHtml").value;
+  const final_url=document.getElementById("debugUrl").value.trim();
+  const out=document.getElementById("debugOut");
+  out.textContent="Skaičiuoju…";
+  const resp=await fetch("/api/debug/parse",{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify({html,final_url})});
+  const data=await resp.json();
+  out.innerHTML=`
+    <div><b>Status:</b> <span class="mono">${safeText(data.status)}</span></div>
+    <div><b>Įdėtas:</b> <span class="mono">${safeText(data.inserted_date||"")}</span></div>
+    <div><b>Miestas:</b> ${safeText(data.city||"")}</div>
+    <div><b>Rajonas:</b> ${safeText(data.district||"")}</div>
+    <div><b>Sugiharos:</b> ${data.sugiharos_found?"TAIP":"NE"}</div>
+    <div style="margin-top:6px;"><b>Snippet:</b><div class="note">${data.sugiharos_snippet_html||""}</div></div>`;
+});
+
+// ===== Adaptyvus greitis =====
+function updateAdaptiveUi(cfg){
+  const a = (cfg && cfg.adaptive) || {};
+  const tgl = document.getElementById("adaptiveToggle");
+  if(tgl) tgl.checked = !!a.enabled;
+  const pill = document.getElementById("adaptivePill");
+  if(!pill) return;
+  if(!a.enabled){
+    pill.textContent = "Adaptyvus: OFF";
+    return;
+  }
+  let txt = `Adaptyvus: ${a.state}, ${a.interval}s (${a.rate_per_sec}/s), conc ${a.concurrency_limit}`;
+  if(a.state === "OPEN") txt += `, pauzė ${Math.ceil(a.open_for_seconds)}s`;
+  if(a.last_reason) txt += ` – ${a.last_reason}`;
+  pill.textContent = txt;
+}
+
+async function refreshConfig(){
+  try{
+    const resp = await fetch("/api/config");
+    updateAdaptiveUi(await resp.json());
+  } catch(err){}
+}
+
+document.getElementById("adaptiveToggle").addEventListener("change", async(e)=>{
+  const resp = await fetch("/api/config", {
+    method:"POST",
+    headers:{"Content-Type":"application/json"},
+    body: JSON.stringify({adaptive: e.target.checked})
+  });
+  const data = await resp.json();
+  if(!resp.ok || data.error){
+    alert(data.error || "Nepavyko");
+    return;
+  }
+  updateAdaptiveUi(data);
+});
+setInterval(refreshConfig, 3000);
+
+// ===== Serverio job =====
+let lastJobState = null;
+
+function updateJobUi(job){
+  const pill = document.getElementById("jobPill");
+  const st = (job && job.state) || "idle";
+  if(pill){
+    if(st === "idle"){
+      pill.textContent = "Job: —";
+    } else {
+      const pct = Math.floor((job.progress || 0) * 1000) / 10;
+      let txt = `Job: ${st} ${pct}% (tikrinta ${job.checked}, fetch ${job.fetched}, rasta ${job.found}, klaidų ${job.errors}, ${job.fetch_per_min}/min)`;
+      if(job.last_error && st === "paused") txt += ` – ${job.last_error}`;
+      pill.textContent = txt;
+    }
+  }
+  const running = (st === "running"), paused = (st === "paused");
+  const b = (id, dis) => { const el = document.getElementById(id); if(el) el.disabled = dis; };
+  b("btnJobStart", running || paused);
+  b("btnJobPause", !running);
+  b("btnJobResume", !paused);
+  b("btnJobCancel", !(running || paused));
+}
+
+async function refreshJob(){
+  let data;
+  try{
+    const resp = await fetch("/api/job");
+    data = await resp.json();
+  } catch(err){
+    return;
+  }
+  const job = (data && data.job) || {};
+  updateJobUi(job);
+
+  // kai job'as sustoja / pasibaigia – perkraunam lentelę iš serverio
+  if(lastJobState === "running" && job.state !== "running" && !autoRunning && !stateLoading){
+    reloadEverything();
+  } else if(job.state === "running" && !stateLoading){
+    // padengimas – vienas binary request'as (304, jei niekas nepasikeitė)
+    try{
+      await loadStatusMap();
+      updateAutoPill();
+    } catch(err){}
+  }
+  lastJobState = job.state;
+}
+
+async function jobAction(action){
+  let resp, data;
+  try{
+    resp = await fetch(`/api/job/${action}`, {
+      method:"POST",
+      headers:{"Content-Type":"application/json"},
+      body: JSON.stringify(action === "start" ? {order: CRAWL_ORDER} : {})
+    });
+    data = await resp.json();
+  } catch(err){
+    alert(String(err));
+    return;
+  }
+  if(!resp.ok || data.error){
+    alert(data.error || "Nepavyko");
+  }
+  if(data && data.job) updateJobUi(data.job);
+  lastJobState = data && data.job ? data.job.state : lastJobState;
+}
+
+document.getElementById("btnJobStart").addEventListener("click", ()=>{
+  if(autoRunning){
+    alert("Sustabdyk naršyklės Auto prieš paleidžiant serverio job'ą.");
+    return;
+  }
+  jobAction("start");
+});
+document.getElementById("btnJobPause").addEventListener("click", ()=>jobAction("pause"));
+document.getElementById("btnJobResume").addEventListener("click", ()=>jobAction("resume"));
+document.getElementById("btnJobCancel").addEventListener("click", ()=>jobAction("cancel"));
+setInterval(refreshJob, 3000);
+
+// Rezultatai realiu laiku (SSE): serverio job'o rezultatai atsiranda be /api/state poll'inimo.
+// Naršyklės Auto savo rezultatus pritaiko pats (iš /api/check_batch atsakymo).
+function connectEvents(){
+  if(!window.EventSource) return;
+  const es = new EventSource("/api/events");
+  es.addEventListener("result", (ev)=>{
+    if(autoRunning || stateLoading) return;
+    let data;
+    try{ data = JSON.parse(ev.data); } catch(err){ return; }
+    const n = numFromId(data.id || "");
+    if(!Number.isFinite(n) || n < START || n > END) return;
+    applyResultToUi(data);
+  });
+  es.addEventListener("tick", (ev)=>{
+    let t;
+    try{ t = JSON.parse(ev.data); } catch(err){ return; }
+    if(t.job) updateJobUi(t.job);
+    updateAutoPill();
+  });
+}
+
+// init
+applyFilter();
+updateAutoPill();
+setAutoButtonUi();
+updatePagePill();
+updateSpeedUi();
+
+statePromise = reloadEverything();
+refreshJob();
+refreshConfig();
+connectEvents();
+</script>
+</body>
+</html>
+"""
+
+@app.get("/")
+def index():
+    html_page = (
+        INDEX_HTML
+        .replace("__START__", str(START_NUM))
+        .replace("__END__", str(END_NUM))
+        .replace("__STEP__", str(STEP))
+        .replace("__UA__", html.escape(USER_AGENT))
+        .replace("__MIN__", str(MIN_INTERVAL_SECONDS))
+        .replace("__CONC__", str(TARGET_CONCURRENCY))
+        .replace("__SCHED_BLOCK__", str(SCHED_BLOCK_SIZE))
+        .replace("__SCHED_PRIOR__", str(SCHED_PRIOR_WEIGHT))
+        .replace("__ORDER__", JOB_ORDER)
+    )
+    return Response(html_page, mimetype="text/html; charset=utf-8")
+
+
+STATE_STREAM_PAGE = int(os.getenv("STATE_STREAM_PAGE", "500"))  # kiek įrašų paimam po vienu CACHE_LOCK
+
+
+def _state_config_locked() -> dict:
+    return {
+        "min_interval": MIN_INTERVAL_SECONDS,
+        "allowed_rates": ALLOWED_RATE_LIMITS,
+        "state_file": str(STATE_FILE),
+        "journal_file": str(JOURNAL_FILE),
+        "state_backend": STATE_BACKEND,
+        "state_db_file": str(STATE_DB_FILE) if STATE_BACKEND == "sqlite" else None,
+        "persist": persist_metrics(),
+        "parse_mode": PARSE_MODE,
+        "parse_stats": dict(PARSE_STATS),
+        "parse_pool": parse_pool_metrics(),
+        "fetch": fetch_metrics(),
+        "max_range_items": MAX_RANGE_ITEMS,
+        "max_batch_ids": MAX_BATCH_IDS,
+        "max_cache_batch_ids": MAX_CACHE_BATCH_IDS,
+        "target_concurrency": TARGET_CONCURRENCY,
+        "jitter_seconds": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
+        "raw_cache_max_items": RAW_CACHE_MAX_ITEMS,
+        "raw_cache_max_bytes": RAW_CACHE_MAX_BYTES,
+        "raw_cache": RAW_CACHE.stats(),
+        "raw_archive": RAW_ARCHIVE.stats(),
+        "shared": shared_metrics(),
+        "state_save_min_interval_seconds": STATE_SAVE_MIN_INTERVAL_SECONDS,
+        "state_save_every_n": STATE_SAVE_EVERY_N,
+    }
+
+
+def _parse_after(raw) -> int | None:
+    """after= kursorius: ID ("1-3000123") arba skaičius; None – nenurodytas."""
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    return id_num(raw) if "-" in raw else int(raw)
+
+
+def _iter_range_pages(start: int, end: int, mode: str, after: int | None, limit: int):
+    """(id, entry) puslapiais po STATE_STREAM_PAGE: CACHE_LOCK laikomas tik puslapiui paimti,
+    serializacija – be lock'o. Kursorius – paskutinio ID numeris (keyset)."""
+    lo = start if after is None else max(start, after + 1)
+    left = limit or -1
+    while lo <= end and left:
+        page = STATE_STREAM_PAGE if left < 0 else min(left, STATE_STREAM_PAGE)
+        with CACHE_LOCK:
+            chunk = list(islice(CACHE.iter_range(lo, end, mode), page))
+        if not chunk:
+            return
+        yield from chunk
+        left -= len(chunk)
+        lo = id_num(chunk[-1][0]) + 1
+        if len(chunk) < page:
+            return
+
+
+def _iter_id_pages(start: int, end: int):
+    lo = start
+    while lo <= end:
+        with CACHE_LOCK:
+            ids = CACHE.ids_in_range(lo, end, limit=STATE_STREAM_PAGE * 10)
+        if not ids:
+            return
+        yield ids
+        if len(ids) < STATE_STREAM_PAGE * 10:
+            return
+        lo = id_num(ids[-1]) + 1
+
+
+def _ndjson(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+@app.get("/api/state")
+def api_state():
+    """Būsena: config + range + stats + items (+ checked_ids).
+
+    Puslapiavimas: after=<id> (keyset, O(log n + k)) arba offset; limit. Atsakyme
+    next_after – kitam puslapiui (null, jei daugiau nėra).
+    format=ndjson – srautas: {"type":"header",...}, {"type":"item","item":...},
+    {"type":"ids","ids":[...]}, {"type":"end",...}; RAM ir lock'o laikas nepriklauso nuo intervalo dydžio.
+    """
+    items_mode = (request.args.get("items") or "all").strip().lower()
+    if items_mode not in ("all", "found", "bad", "none"):
+        items_mode = "all"
+
+    include_ids = (request.args.get("include_ids", "1") != "0")
+    stream = (request.args.get("format") or "").strip().lower() == "ndjson"
+
+    try:
+        offset = int(request.args.get("offset", "0"))
+    except Exception:
+        offset = 0
+    try:
+        limit = int(request.args.get("limit", "0"))
+    except Exception:
+        limit = 0
+    if offset < 0:
+        offset = 0
+    if limit < 0:
+        limit = 0
+    try:
+        after = _parse_after(request.args.get("after"))
+    except Exception:
+        return jsonify({"error": "after turi būti ID (pvz. 1-3000000) arba skaičius"}), 400
+
+    with CACHE_LOCK:
+        stats = get_cached_stats_for_current_range_locked()
+        cfg = _state_config_locked()
+        start, end = START_NUM, END_NUM
+        rng = {
+            "start": START_NUM,
+            "end": END_NUM,
+            "step": STEP,
+            "count": range_count(START_NUM, END_NUM, STEP),
+        }
+        if offset and after is None and items_mode != "none":
+            # offset -> kursorius (vienas praleidimas indekse), toliau – keyset
+            skipped = list(islice(CACHE.iter_range(start, end, items_mode, offset=offset - 1), 1))
+            after = id_num(skipped[0][0]) if skipped else end
+
+    if stream:
+        def generate():
+            yield _ndjson({"type": "header", "config": cfg, "range": rng, "stats": stats})
+            count = 0
+            last = None
+            buf = []
+            if items_mode != "none":
+                for id_str, entry in _iter_range_pages(start, end, items_mode, after, limit):
+                    buf.append(_ndjson({"type": "item", "item": entry}))
+                    count += 1
+                    last = id_str
+                    if len(buf) >= STATE_STREAM_PAGE:
+                        yield "".join(buf)  # vienas chunk'as puslapiui, ne po eilutę
+                        buf = []
+            if buf:
+                yield "".join(buf)
+            if include_ids:
+                for ids in _iter_id_pages(start, end):
+                    yield _ndjson({"type": "ids", "ids": ids})
+            next_after = last if limit and count >= limit else None
+            yield _ndjson({"type": "end", "count": count, "next_after": next_after})
+
+        return Response(generate(), mimetype="application/x-ndjson; charset=utf-8")
+
+    items = []
+    if items_mode != "none":
+        items = [entry for _, entry in _iter_range_pages(start, end, items_mode, after, limit)]
+    payload = {"config": cfg, "range": rng, "stats": stats, "items": items}
+    payload["next_after"] = items[-1].get("id") if limit and len(items) >= limit else None
+    if include_ids:
+        payload["checked_ids"] = [x for ids in _iter_id_pages(start, end) for x in ids]
+
+    return jsonify(payload)
+
+
+@app.get("/api/persist")
+def api_persist():
+    """Persistencijos metrikos: commit/fsync/kompaktacijos trukmės, eilė ir vėlavimas (lag)."""
+    return jsonify(persist_metrics())
+
+
+@app.get("/api/stats")
+def api_stats():
+    """Statistika bet kuriam sub-intervalui (?start=&end=, default – dabartinis intervalas), O(log n)."""
+    try:
+        start = int(request.args.get("start", START_NUM))
+        end = int(request.args.get("end", END_NUM))
+    except Exception:
+        return jsonify({"error": "start/end turi būti sveiki skaičiai"}), 400
+    if end < start:
+        return jsonify({"error": "end turi būti >= start"}), 400
+
+    with CACHE_LOCK:
+        stats = CACHE.stats_range(start, end)
+    return jsonify({"start": start, "end": end, "stats": stats})
+
+
+_STATUS_MAP_EPOCH = format(int(time.time()), "x")  # ETag'ai negalioja po restarto
+
+
+@app.get("/api/status_map")
+def api_status_map():
+    """Vienas baitas per ID start..end: 0 netikrintas, 1 FOUND, 2 NOT_FOUND, 3 CHALLENGE,
+    4 ERROR, 5 kita; +8 jei sugiharos_found. Binary (default) arba ?format=base64.
+    ETag – pagal CACHE versiją, todėl nepasikeitus grąžinam 304."""
+    try:
+        start = int(request.args.get("start", START_NUM))
+        end = int(request.args.get("end", END_NUM))
+    except Exception:
+        return jsonify({"error": "start/end turi būti sveiki skaičiai"}), 400
+    if end < start:
+        return jsonify({"error": "end turi būti >= start"}), 400
+    if end - start + 1 > STATUS_MAP_MAX_IDS:
+        return jsonify({"error": f"Per didelis intervalas: {end - start + 1}. Max: {STATUS_MAP_MAX_IDS}."}), 400
+    as_base64 = (request.args.get("format") or "").strip().lower() == "base64"
+
+    with CACHE_LOCK:
+        etag = f"{_STATUS_MAP_EPOCH}-{CACHE.version}-{start}-{end}{'-b64' if as_base64 else ''}"
+        codes = None if etag in request.if_none_match else CACHE.status_codes(start, end)
+
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": "no-cache",
+        "X-Range-Start": str(start),
+        "X-Range-End": str(end),
+    }
+    if codes is None:
+        return Response(status=304, headers=headers)
+
+    if as_base64:
+        return Response(base64.b64encode(codes), mimetype="text/plain; charset=us-ascii", headers=headers)
+    return Response(bytes(codes), mimetype="application/octet-stream", headers=headers)
+
+
+def _sse(event: str, data, event_id=None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+def _events_tick() -> dict:
+    with CACHE_LOCK:
+        stats = get_cached_stats_for_current_range_locked()
+        rng = {"start": START_NUM, "end": END_NUM, "step": STEP}
+    return {
+        "stats": stats,
+        "range": rng,
+        "job": job_snapshot(),
+        "fetches_last_minute": RATE_LIMITER.stats()["sent_last_minute"],
+        "effective_interval": RATE_LIMITER.interval,
+        "subscribers": EVENTS.subscriber_count(),
+    }
+
+
+@app.get("/api/events")
+def api_events():
+    """SSE: "result" – kiekvienas naujas rezultatas (kai tik įrašomas į CACHE),
+    "tick" – stats/job/greitis kas EVENTS_TICK_SECONDS, komentaras-heartbeat proxy'ams.
+    Lėtas klientas (pilna eilė) atjungiamas – EventSource pats prisijungs iš naujo."""
+    sub = EVENTS.subscribe()
+    if sub is None:
+        return jsonify({"error": f"Per daug prenumeratorių (max {EVENTS.max_subscribers})."}), 503
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            yield _sse("tick", _events_tick())
+            last_tick = last_send = time.monotonic()
+            while not sub.dropped:
+                now = time.monotonic()
+                timeout = max(0.0, min(last_tick + EVENTS_TICK_SECONDS, last_send + EVENTS_HEARTBEAT_SECONDS) - now)
+                items = EVENTS.wait(sub, timeout)
+                chunks = [_sse(ev, data, seq) for seq, ev, data in items]
+                now = time.monotonic()
+                if now - last_tick >= EVENTS_TICK_SECONDS:
+                    chunks.append(_sse("tick", _events_tick()))
+                    last_tick = now
+                if not chunks and now - last_send >= EVENTS_HEARTBEAT_SECONDS:
+                    chunks.append(": ping\n\n")
+                if chunks:
+                    yield "".join(chunks)
+                    last_send = now
+        finally:
+            EVENTS.unsubscribe(sub)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/cache_batch")
+def api_cache_batch():
+    """Gražina tik CACHE įrašus (be fetch į tikslą)."""
+    payload = request.get_json(silent=True) or {}
+    ids = payload.get("ids", None)
+
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "ids turi būti sąrašas (pvz. {ids:[\"1-3000000\", ...]})."}), 400
+    if len(ids) > MAX_CACHE_BATCH_IDS:
+        return jsonify({"error": f"Per didelis cache batch: {len(ids)}. Max: {MAX_CACHE_BATCH_IDS}."}), 400
+
+    norm_ids: list[str] = []
+    try:
+        for x in ids:
+            id_str = normalize_id(str(x))
+            norm_ids.append(id_str)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    with CACHE_LOCK:
+        out = []
+        for id_str in norm_ids:
+            entry = CACHE.get(id_str)
+            if isinstance(entry, dict):
+                d = dict(entry)
+                d["from_cache"] = True
+                out.append(d)
+
+    return jsonify({"items": out, "count": len(out)})
+
+
+@app.get("/api/config")
+def api_config_get():
+    return jsonify({
+        "min_interval": MIN_INTERVAL_SECONDS,
+        "min_interval_bounds": list(MIN_INTERVAL_BOUNDS),
+        "allowed_rates": ALLOWED_RATE_LIMITS,
+        "jitter_seconds": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
+        "target_concurrency": TARGET_CONCURRENCY,
+        "effective_interval": RATE_LIMITER.interval,
+        "rate_limiter": RATE_LIMITER.stats(),
+        "adaptive": CONTROLLER.snapshot(),
+    })
+
+
+@app.post("/api/config")
+def api_config_set():
+    """min_interval sekundėmis arba rate (užklausų/s) – bet kuri reikšmė iš MIN_INTERVAL_BOUNDS.
+    adaptive: true/false – įjungia/išjungia AIMD valdiklį (min_interval tada – starto taškas).
+    """
+    payload = request.get_json(silent=True) or {}
+    val = payload.get("min_interval", None)
+    rate = payload.get("rate", None)
+    adaptive = payload.get("adaptive", None)
+
+    f = None
+    if val is not None or rate is not None or adaptive is None:
+        try:
+            if val is None and rate is not None:
+                f = 1.0 / float(rate)
+            else:
+                f = float(val)
+        except Exception:
+            return jsonify({"error": "min_interval (s) arba rate (užklausų/s) turi būti skaičius."}), 400
+
+        if not is_allowed_rate(f):
+            lo, hi = MIN_INTERVAL_BOUNDS
+            return jsonify({"error": f"min_interval turi būti tarp {lo} ir {hi} s."}), 400
+
+    if f is not None:
+        set_min_interval(f)
+    if adaptive is not None:
+        CONTROLLER.set_enabled(str(adaptive).lower() in ("1", "true", "yes", "y"), MIN_INTERVAL_SECONDS)
+
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True, parts=("config",))
+
+    return jsonify({
+        "min_interval": MIN_INTERVAL_SECONDS,
+        "jitter_seconds": [float(JITTER_SECONDS[0]), float(JITTER_SECONDS[1])],
+        "target_concurrency": TARGET_CONCURRENCY,
+        "effective_interval": RATE_LIMITER.interval,
+        "rate_limiter": RATE_LIMITER.stats(),
+        "adaptive": CONTROLLER.snapshot(),
+    })
+
+
+@app.get("/api/range")
+def api_range_get():
+    return jsonify({
+        "range": {
+            "start": START_NUM,
+            "end": END_NUM,
+            "step": STEP,
+            "count": range_count(START_NUM, END_NUM, STEP),
+        }
+    })
+
+
+@app.post("/api/range")
+def api_range_set():
+    global START_NUM, END_NUM, STEP
+
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        start = parse_range_value(payload.get("start", None))
+        end = parse_range_value(payload.get("end", None))
+        step_raw = payload.get("step", STEP)
+        step = int(step_raw)
+        start, end, step = normalize_range(start, end, step)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    START_NUM, END_NUM, STEP = start, end, step
+
+    with CACHE_LOCK:
+        mark_state_dirty_locked(force=True, parts=("range",))
+
+    return jsonify({
+        "range": {
+            "start": START_NUM,
+            "end": END_NUM,
+            "step": STEP,
+            "count": range_count(START_NUM, END_NUM, STEP),
+        }
+    })
+
+
+@app.get("/api/job")
+def api_job_get():
+    return jsonify({"job": job_snapshot()})
+
+
+@app.post("/api/job/start")
+def api_job_start():
+    """Paleidžia serverio job'ą per dabartinį intervalą (naršyklė nebereikalinga).
+    shard: true – intervalas dalinamas su kitomis instancijomis per koordinatorių (SHARD_COORDINATOR).
+    order: asc / density – tikrinimo tvarka (numatyta JOB_ORDER)."""
+    payload = request.get_json(silent=True) or {}
+    force = str(payload.get("force", "0")).lower() in ("1", "true", "yes", "y")
+    stop_on_error = str(payload.get("stop_on_error", "0")).lower() in ("1", "true", "yes", "y")
+    shard = str(payload.get("shard", "0")).lower() in ("1", "true", "yes", "y")
+    try:
+        job = job_start(force=force, stop_on_error=stop_on_error, shard=shard, order=payload.get("order"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "job": job_snapshot()}), 409
+    return jsonify({"job": job})
+
+
+@app.post("/api/job/<action>")
+def api_job_action(action: str):
+    new_state = {"pause": "paused", "resume": "running", "cancel": "cancelled"}.get(action)
+    if new_state is None:
+        return jsonify({"error": "Nežinomas veiksmas (start / pause / resume / cancel)."}), 404
+    try:
+        job = job_set_state(new_state)
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "job": job_snapshot()}), 409
+    return jsonify({"job": job})
+
+
+SHARD_OPS = {
+    "join": ("start", "end", "block_size"),
+    "lease": ("key", "owner", "lease_seconds"),
+    "heartbeat": ("key", "block", "owner", "cursor", "lease_seconds"),
+    "release": ("key", "block", "owner", "cursor"),
+    "complete": ("key", "block", "owner"),
+    "status": ("key",),
+}
+
+
+@app.get("/api/shard")
+def api_shard_get():
+    """Dabartinio (arba ?key=) shard run'o būsena iš koordinatoriaus."""
+    key = request.args.get("key") or job_snapshot().get("shard")
+    if not key:
+        return jsonify({"error": "Nėra shard'into job'o (key=...)."}), 404
+    try:
+        return jsonify({"shard": shard_coordinator().status(key), "instance": SHARD_INSTANCE})
+    except Exception as e:
+        return jsonify({"error": f"Shard koordinatorius nepasiekiamas: {e}"}), 502
+
+
+@app.post("/api/shard/<op>")
+def api_shard_op(op: str):
+    """Koordinatorius kitoms instancijoms (HttpShardCoordinator): šio node'o SQLite nuomos lentelė."""
+    names = SHARD_OPS.get(op)
+    if names is None:
+        return jsonify({"error": "Nežinoma operacija (join / lease / heartbeat / release / complete / status)."}), 404
+    payload = request.get_json(silent=True) or {}
+    try:
+        args = [payload[k] for k in names]
+    except KeyError as e:
+        return jsonify({"error": f"Trūksta lauko: {e.args[0]}"}), 400
+    return jsonify({"result": getattr(shard_local(), op)(*args)})
+
+
+@app.get("/api/frontier")
+def api_frontier_get():
+    return jsonify({"frontier": frontier_snapshot()})
+
+
+@app.post("/api/frontier/start")
+def api_frontier_start():
+    """Ribos (didžiausio gyvo ID) paieška ir sekimas fone. hint – nuo kurio ID pradėti paiešką."""
+    payload = request.get_json(silent=True) or {}
+    try:
+        hint = parse_range_value(payload["hint"]) if payload.get("hint") not in (None, "") else None
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        fr = frontier_start(hint=hint)
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "frontier": frontier_snapshot()}), 409
+    return jsonify({"frontier": fr})
+
+
+@app.post("/api/frontier/stop")
+def api_frontier_stop():
+    try:
+        fr = frontier_stop()
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "frontier": frontier_snapshot()}), 409
+    return jsonify({"frontier": fr})
+
+
+@app.get("/api/reparse")
+def api_reparse_get():
+    return jsonify({"reparse": reparse_snapshot()})
+
+
+@app.post("/api/reparse/start")
+def api_reparse_start():
+    """Perparse'ina archyvuotus puslapius (default – dabartinis intervalas, tik senesnė parser_version)."""
+    payload = request.get_json(silent=True) or {}
+    force = str(payload.get("force", "0")).lower() in ("1", "true", "yes", "y")
+    try:
+        start = int(payload.get("start", START_NUM))
+        end = int(payload.get("end", END_NUM))
+    except (TypeError, ValueError):
+        return jsonify({"error": "start/end turi būti skaičiai."}), 400
+    if end < start:
+        return jsonify({"error": "end < start"}), 400
+    try:
+        snap = reparse_start(start, end, force=force)
+    except RuntimeError as e:
+        return jsonify({"error": str(e), "reparse": reparse_snapshot()}), 409
+    return jsonify({"reparse": snap})
+
+
+@app.post("/api/reparse/cancel")
+def api_reparse_cancel():
+    return jsonify({"reparse": reparse_cancel()})
+
+
+@app.get("/api/check")
+def api_check():
+    id_like = request.args.get("id", "")
+    force = request.args.get("force", "0") == "1"
+
+    try:
+        id_str = normalize_id(id_like)
+        n = id_num(id_str)
+        if not in_range(n):
+            return jsonify({"error": "ID ne intervale", "id": id_str}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    with CACHE_LOCK:
+        cached = CACHE.get(id_str)
+        if cached is not None and not force:
+            d = dict(cached)
+            d["from_cache"] = True
+            return jsonify(d)
+
+    try:
+        out, raw_html, how = fetch_page(id_str, prior=cached)
+        store_raw(id_str, raw_html)
+        with CACHE_LOCK:
+            cache_put_locked(id_str, out)
+            mark_state_dirty_locked(force=False)
+
+        d = dict(out)
+        d["from_cache"] = False
+        if how != "fetched":
+            d["recheck"] = how  # not_modified / hash / refetched
+            d["revalidated"] = how != "refetched"
+        return jsonify(d)
+    except Exception as e:
+        err = make_error_result(id_str, e)
+        with CACHE_LOCK:
+            cache_put_locked(id_str, err)
+            mark_state_dirty_locked(force=False)
+
+        d = dict(err)
+        d["from_cache"] = False
+        return jsonify(d), 200
+
+
+@app.post("/api/check_batch")
+def api_check_batch():
+    payload = request.get_json(silent=True) or {}
+    ids = payload.get("ids", None)
+    force = str(payload.get("force", "0")).lower() in ("1", "true", "yes", "y")
+    stop_on_error = str(payload.get("stop_on_error", "0")).lower() in ("1", "true", "yes", "y")
+
+    if not isinstance(ids, list) or not ids:
+        return jsonify({"error": "ids turi būti sąrašas (pvz. {ids:[\"1-3000000\", ...]})."}), 400
+
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({"error": f"Per didelis batch: {len(ids)}. Max: {MAX_BATCH_IDS}."}), 400
+
+    norm_ids: list[str] = []
+    try:
+        for x in ids:
+            id_str = normalize_id(str(x))
+            n = id_num(id_str)
+            if not in_range(n):
+                raise ValueError(f"ID ne intervale: {id_str}")
+            norm_ids.append(id_str)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+    results: list[dict] = []
+    dirty = False
+    stopped_early = False
+
+    # pipeline su iki TARGET_CONCURRENCY lygiagrečių fetch'ų
+    futures: dict[int, object] = {}
+    next_to_submit = 0
+
+    def submit_until_full():
+        nonlocal next_to_submit
+        while next_to_submit < len(norm_ids) and len(futures) < TARGET_CONCURRENCY:
+            id_str2 = norm_ids[next_to_submit]
+
+            if not force:
+                with CACHE_LOCK:
+                    cached2 = CACHE.get(id_str2)
+                if cached2 is not None:
+                    next_to_submit += 1
+                    continue
+
+            with CACHE_LOCK:
+                prior2 = CACHE.get(id_str2)
+            futures[next_to_submit] = EXECUTOR.submit(fetch_page, id_str2, prior2)
+            next_to_submit += 1
+
+    submit_until_full()
+
+    for i, id_str in enumerate(norm_ids):
+        if not force:
+            with CACHE_LOCK:
+                cached = CACHE.get(id_str)
+            if cached is not None:
+                d = dict(cached)
+                d["from_cache"] = True
+                results.append(d)
+                submit_until_full()
+                continue
+
+        fut = futures.pop(i, None)
+        if fut is None:
+            with CACHE_LOCK:
+                prior = CACHE.get(id_str)
+            fut = EXECUTOR.submit(fetch_page, id_str, prior)
+
+        try:
+            out, raw_html, how = fut.result()
+            store_raw(id_str, raw_html)
+            with CACHE_LOCK:
+                cache_put_locked(id_str, out)
+            dirty = True
+
+            d = dict(out)
+            d["from_cache"] = False
+            if how != "fetched":
+                d["recheck"] = how  # not_modified / hash / refetched
+                d["revalidated"] = how != "refetched"
+            results.append(d)
+
+        except Exception as e:
+            err = make_error_result(id_str, e)
+            with CACHE_LOCK:
+                cache_put_locked(id_str, err)
+            dirty = True
+
+            d = dict(err)
+            d["from_cache"] = False
+            results.append(d)
+
+            if stop_on_error:
+                stopped_early = True
+                for f in futures.values():
+                    try:
+                        f.cancel()
+                    except Exception:
+                        pass
+                futures.clear()
+                break
+
+        submit_until_full()
+
+    if dirty:
+        with CACHE_LOCK:
+            mark_state_dirty_locked(force=False)
+
+    return jsonify({
+        "items": results,
+        "count": len(results),
+        "stopped_early": bool(stopped_early),
+    })
+
+
+@app.get("/raw")
+def raw():
+    id_like = request.args.get("id", "")
+    try:
+        id_str = normalize_id(id_like)
+    except Exception as e:
+        return Response(str(e), mimetype="text/plain; charset=utf-8"), 400
+
+    raw_html = RAW_CACHE.get(id_str)  # išskleidžiama tik čia
+    if raw_html is None:
+        raw_html = RAW_ARCHIVE.get(id_str)
+    if raw_html is None:
+        return Response(
+            "Nėra raw HTML (pirma paspausk 'Tikrinti'. Archyve jo nėra arba jis jau išmestas pagal RAW_ARCHIVE_MAX_BYTES.)",
+            mimetype="text/plain; charset=utf-8"
+        ), 404
+
+    return Response(raw_html, mimetype="text/plain; charset=utf-8")
+
+
+@app.post("/api/debug/parse")
+def api_debug_parse():
+    payload = request.get_json(silent=True) or {}
+    html_text = payload.get("html", "") or ""
+    final_url = payload.get("final_url", "") or ""
+    parsed = parse_html(html_text, final_url=final_url, http_status=None)
+    return jsonify(parsed)
+
+
+if __name__ == "__main__":
+    host = os.getenv("HOST", "127.0.0.1")
+    port = int(os.getenv("PORT", "5000"))
+    app.run(host=host, port=port, debug=False)
+
+
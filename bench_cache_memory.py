@@ -0,0 +1,89 @@
+"""
+CACHE atminties palyginimas: dict (CACHE_LAYOUT=dict) vs CompactResultStore.
+
+Paleidimas:
+    STATE_DIR=/tmp/bench python bench_cache_memory.py [N ...]
+
+Sugeneruoja tipinį mišinį (~90% NOT_FOUND, ~3% CHALLENGE, ~2% ERROR, ~5% FOUND)
+ir tracemalloc'u pamatuoja, kiek RAM užima N įrašų abiejuose variantuose.
+"""
+
+import gc
+import random
+import sys
+import tracemalloc
+
+import aruodas_clicker as A
+
+
+BASE_ID = 3000000
+
+
+def make_entry(n: int, rnd: random.Random) -> dict:
+    id_str = f"1-{n}"
+    checked_at = A.now_iso()
+    r = rnd.random()
+    if r < 0.05:
+        e = {
+            "id": id_str,
+            "checked_at": checked_at,
+            "http_status": 200,
+            "status": "FOUND",
+            "inserted_date": "2026-01-15",
+            "city": "Vilnius",
+            "district": rnd.choice(["Antakalnis", "Žirmūnai", "Senamiestis", "Pašilaičiai"]),
+            "final_url": f"https://www.aruodas.lt/butai-vilniuje-{n}/",
+            "sugiharos_found": r < 0.005,
+            "sugiharos_snippet_html": "… <mark>sugiharos</mark> …" if r < 0.005 else None,
+        }
+        return e
+    if r < 0.07:
+        return A.make_error_result(id_str, "Read timed out. (read timeout=25)")
+    return {
+        "id": id_str,
+        "checked_at": checked_at,
+        "http_status": 404 if r > 0.10 else 200,
+        "status": "NOT_FOUND" if r > 0.10 else "CHALLENGE",
+        "inserted_date": None,
+        "city": None,
+        "district": None,
+        "final_url": f"https://www.aruodas.lt/{id_str}/",
+        "sugiharos_found": False,
+        "sugiharos_snippet_html": None,
+    }
+
+
+def measure(store, count: int) -> int:
+    rnd = random.Random(42)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for n in range(BASE_ID, BASE_ID + count):
+        e = make_entry(n, rnd)
+        store[e["id"]] = e
+        del e
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used
+
+
+def main(argv):
+    sizes = [int(x) for x in argv] or [100_000, 500_000]
+    print(f"{'N':>9} {'dict MB':>9} {'compact MB':>11} {'B/ID dict':>10} {'B/ID compact':>13} {'x':>6}")
+    for count in sizes:
+        d = A.MemoryResultStore()
+        dict_bytes = measure(d, count)
+        del d
+        c = A.CompactResultStore()
+        compact_bytes = measure(c, count)
+        del c
+        print(
+            f"{count:>9} {dict_bytes / 1e6:>9.1f} {compact_bytes / 1e6:>11.1f}"
+            f" {dict_bytes / count:>10.0f} {compact_bytes / count:>13.1f}"
+            f" {dict_bytes / max(1, compact_bytes):>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,110 @@
+"""
+fetch_page(): pages/s su parse'u fetch thread'uose (PARSE_WORKERS=0) vs procesų pool'e.
+
+Paleidimas:
+    STATE_DIR=/tmp/bench python bench_fetch.py [N] [WORKERS ...]
+
+Lokalus stub serveris (atskiras procesas, kad nekonkuruotų dėl GIL'o) kiekvienam
+/{id}/ grąžina ~230 KB FOUND puslapį. Rate limit išjungtas; TARGET_CONCURRENCY
+thread'ų fetch'ina N ID. Kartu matuojamas "Flask thread'o" vėlavimas – kiek laiko
+trunka trumpas CPU darbas (json.dumps) kitame thread'e, kol vyksta crawl'as.
+"""
+
+import json
+import multiprocessing
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def serve(port: int, body: bytes):
+    class H(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    ThreadingHTTPServer(("127.0.0.1", port), H).serve_forever()
+
+
+def probe_latency(stop: threading.Event, out: list):
+    payload = {"items": [{"id": f"1-{i}", "status": "FOUND"} for i in range(200)]}
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        json.dumps(payload)
+        out.append((time.perf_counter() - t0) * 1000.0)
+        time.sleep(0.01)
+
+
+def run(A, n: int, workers: int, offset: int) -> tuple[float, float]:
+    A.set_parse_workers(workers)
+    if workers:
+        # pool'o startas (spawn + importas) – ne matavimo dalis
+        big = "<h1>Vilnius, X</h1>" + "x" * A.PARSE_POOL_MIN_CHARS
+        with ThreadPoolExecutor(workers) as ex:
+            list(ex.map(lambda _: A.parse_page(big), range(workers * 2)))
+    stop = threading.Event()
+    lat: list = []
+    prober = threading.Thread(target=probe_latency, args=(stop, lat), daemon=True)
+    prober.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(A.TARGET_CONCURRENCY) as ex:
+        results = list(ex.map(lambda i: A.fetch_page(f"1-{offset + i}")[0]["status"], range(n)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    prober.join()
+    assert results.count("FOUND") == n, results[:5]
+    p95 = statistics.quantiles(lat, n=20)[-1] if len(lat) >= 20 else max(lat or [0.0])
+    return n / elapsed, p95
+
+
+def main(argv):
+    n = int(argv[0]) if argv else 200
+    worker_counts = [int(x) for x in argv[1:]] or sorted({0, 1, max(1, (os.cpu_count() or 1) - 1), os.cpu_count() or 1})
+
+    # TARGET_BASE_URL skaitomas importuojant – todėl portas parenkamas prieš importą
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    os.environ["TARGET_BASE_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.setdefault("RAW_ARCHIVE_MAX_BYTES", "0")
+
+    import aruodas_clicker as A
+    import bench_parse
+
+    body = bench_parse.FIXTURES["big"][0].encode("utf-8")
+    server = multiprocessing.get_context("spawn").Process(target=serve, args=(port, body), daemon=True)
+    server.start()
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    A.RATE_LIMITER.set_interval(0.0)
+    A.JITTER_SECONDS = (0.0, 0.0)
+
+    print(f"cpu={os.cpu_count()} fetch thread'ai={A.TARGET_CONCURRENCY} puslapis={len(body) / 1024:.0f} KB N={n}")
+    base = None
+    for i, workers in enumerate(worker_counts):
+        pps, p95 = run(A, n, workers, offset=i * n)
+        base = base or pps
+        print(f"PARSE_WORKERS={workers:<2} {pps:7.1f} psl/s  x{pps / base:.2f}  kito thread'o p95 {p95:6.2f} ms")
+    A.set_parse_workers(0)
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
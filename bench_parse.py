@@ -0,0 +1,156 @@
+"""
+parse_html(): fast extractor (PARSE_MODE=fast) vs pilnas BeautifulSoup (PARSE_MODE=soup).
+
+Paleidimas:
+    STATE_DIR=/tmp/bench python bench_parse.py [SECONDS]
+
+1) Ekvivalentiškumas: kiekvienam fixture'ui abu režimai turi duoti identišką
+   parse_html() rezultatą (ir tą patį title tekstą). Neatitikimas -> exit 1.
+2) Greitis: FOUND puslapiai/s abiem režimais (~230 KB puslapis, kaip skelbimo).
+3) Markerių/raktažodžio skenavimas: senas detect_status + make_snippet_html
+   (du lower() + atskiri ieškojimai) vs scan_page (vienas lower()) dideliems puslapiams.
+"""
+
+import sys
+import time
+import timeit
+
+import aruodas_clicker as A
+
+
+URL_VLN = "https://www.aruodas.lt/butai-vilniuje-zirmunuose-kalvariju-g-1-3456789/"
+URL_KNS = "https://www.aruodas.lt/butai-kaune-centre-laisves-al-1-3456790/"
+
+
+def page(head: str = "", body: str = "", filler: int = 0) -> str:
+    pad = "".join(
+        f'<div class="obj-row" data-i="{i}"><span class="lbl">Savybė {i}</span>'
+        f'<span class="val">Reikšmė &amp; {i}</span></div>\n'
+        for i in range(filler)
+    )
+    return (
+        "<!doctype html><html lang=\"lt\"><head><meta charset=\"utf-8\">"
+        + head
+        + "<script>var cfg = {h1: '<h1>ne tas</h1>', d: 'Įdėtas 1999-01-01'};</script>"
+        + "<style>h1 { color: red }</style></head><body>"
+        + body
+        + pad
+        + "</body></html>"
+    )
+
+
+FIXTURES = {
+    "h1_plain": (page(body="<h1>Vilnius, Žirmūnai, Kalvarijų g.</h1><dl><dt>Įdėtas</dt><dd>2026-01-15</dd></dl>"), URL_VLN),
+    "h1_nested_entities": (page(body="<h1 class=\"obj-header\"><span>Vilnius</span>, <b>Antakalnis</b> &amp; <i>Saulėtekio al.</i></h1>"
+                                     "<table><tr><td>Įdėtas</td><td> 2025-12-31 </td></tr></table>"), URL_VLN),
+    "h1_other_city": (page(body="<h1>Kaunas, Centras, Laisvės al.</h1><p>Įdėtas 2026-02-01</p>"), URL_KNS),
+    "h1_empty": (page(head='<meta property="og:title" content="Vilnius, Senamiestis">', body="<h1>  </h1><p>Vilniuje</p>"), URL_VLN),
+    "og_only": (page(head='<meta content="Vilnius, Pašilaičiai, Gabijos g." property="og:title">', body="<p>Idetas 2024-05-06</p>"), URL_VLN),
+    "og_entities_single_quotes": (page(head="<meta property='og:title' content='Vilnius, U&#382;upis &amp; Co'>"), URL_VLN),
+    "og_empty_then_title": (page(head='<meta property="og:title" content=""><title> Kaunas, Žaliakalnis </title>'), URL_KNS),
+    "title_only": (page(head="<title>Vilnius, Naujamiestis | Aruodas</title>", body="<p>Įdėtas2026-03-03</p>"), URL_VLN),
+    "title_markup": (page(head="<title>Vilnius, <b>Lazdynai</b></title>"), URL_VLN),
+    "no_title_vilnius_text": (page(body="<p>Parduodamas butas <b>Vilniuje</b>, Fabijoniškėse.</p>"), URL_VLN),
+    "no_title_split_word": (page(body="<p>Vilni<b>us</b></p>"), URL_KNS),
+    "no_title_url_city": (page(body="<p>Nieko</p>"), URL_VLN),
+    "comment_h1": (page(body="<!-- <h1>Kaunas, X</h1> --><h1>Vilnius, Pilaitė</h1>"), URL_VLN),
+    "unclosed_h1": (page(body="<h1>Vilnius, Karoliniškės<p>Įdėtas 2026-04-04</p>"), URL_VLN),
+    "lt_in_text": (page(body="<h1>Vilnius, Baltupiai</h1><p>kaina < 100 000 ir > 50 000</p><p>Įdėtas 2026-05-05</p>"), URL_VLN),
+    "attr_with_gt": (page(body='<h1 data-x="a>b">Vilnius, Viršuliškės</h1><a title="x>y">Įdėtas</a> 2026-06-06'), URL_VLN),
+    "nbsp_date": (page(body="<h1>Vilnius,&nbsp;Šeškinė</h1><p>Įdėtas&nbsp;2026-07-07</p>"), URL_VLN),
+    "sugiharos": (page(body="<h1>Vilnius, Žvėrynas</h1><p>Puikūs <em>sugiharos</em> kaimynai</p>"), URL_VLN),
+    "big": (page(body="<h1>Vilnius, Žirmūnai</h1><dt>Įdėtas</dt><dd>2026-08-08</dd>", filler=2000), URL_VLN),
+}
+
+
+def parse_with(mode: str, html_text: str, url: str) -> tuple[dict, str]:
+    old = A.PARSE_MODE
+    A.PARSE_MODE = mode
+    try:
+        title, _ = A.extract_title_and_text(html_text)
+        return A.parse_html(html_text, final_url=url, http_status=200), title
+    finally:
+        A.PARSE_MODE = old
+
+
+def check_equivalence() -> bool:
+    ok = True
+    for name, (doc, url) in FIXTURES.items():
+        soup_res, soup_title = parse_with("soup", doc, url)
+        fast_res, fast_title = parse_with("fast", doc, url)
+        same = soup_res == fast_res and soup_title == fast_title
+        ok &= same
+        print(f"{'OK ' if same else 'BAD'} {name:28} city={fast_res['city']!s:8} district={fast_res['district']!s:14} date={fast_res['inserted_date']}")
+        if not same:
+            print("    soup:", soup_title, soup_res)
+            print("    fast:", fast_title, fast_res)
+    return ok
+
+
+def legacy_scan(html_text: str, http_status=None):
+    """Senas kelias (prieš scan_page): status ir snippet – kiekvienas su savo lower()."""
+    low = (html_text or "").lower()
+    if http_status == 404:
+        status = "NOT_FOUND"
+    elif any(m.lower() in low for m in A.NOT_FOUND_MARKERS):
+        status = "NOT_FOUND"
+    elif any(m.lower() in low for m in A.CHALLENGE_MARKERS):
+        status = "CHALLENGE"
+    else:
+        status = "FOUND"
+    low2 = html_text.lower()
+    idx = low2.find("sugiharos")
+    return status, A.make_snippet_html(html_text, "sugiharos", radius=120, idx=idx)
+
+
+def new_scan(html_text: str, http_status=None):
+    status, idx = A.scan_page(html_text, http_status)
+    return status, A.make_snippet_html(html_text, "sugiharos", radius=120, idx=idx)
+
+
+def bench_scan():
+    big = FIXTURES["big"][0]
+    pages = {
+        "FOUND 230 KB": big,
+        "FOUND 1 MB + sugiharos": big * 4 + "<p>SUGIHAROS</p>",
+        "NOT_FOUND 230 KB": big.replace("<body>", "<body><div class=\"block-404\">Šiame puslapyje nėra informacijos, kurios jūs ieškote</div>"),
+        "CHALLENGE 30 KB": "<title>Just a moment...</title>" + big[:30000],
+    }
+    for name, doc in pages.items():
+        assert legacy_scan(doc) == new_scan(doc), name
+        old = min(timeit.repeat(lambda: legacy_scan(doc), number=20, repeat=3)) / 20
+        new = min(timeit.repeat(lambda: new_scan(doc), number=20, repeat=3)) / 20
+        print(f"{name:24} senas {old * 1000:6.2f} ms, scan_page {new * 1000:6.2f} ms, x{old / new:.1f}")
+
+
+def bench(mode: str, doc: str, url: str, seconds: float) -> float:
+    old = A.PARSE_MODE
+    A.PARSE_MODE = mode
+    try:
+        n = 0
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < seconds:
+            A.parse_html(doc, final_url=url, http_status=200)
+            n += 1
+        return n / (time.perf_counter() - t0)
+    finally:
+        A.PARSE_MODE = old
+
+
+def main(argv):
+    seconds = float(argv[0]) if argv else 3.0
+    ok = check_equivalence()
+    print("fallback'ai:", A.PARSE_STATS)
+
+    doc, url = FIXTURES["big"]
+    soup_ps = bench("soup", doc, url, seconds)
+    fast_ps = bench("fast", doc, url, seconds)
+    print(f"\npuslapis {len(doc) / 1024:.0f} KB: soup {soup_ps:.1f} psl/s, fast {fast_ps:.1f} psl/s, x{fast_ps / soup_ps:.1f}")
+
+    print()
+    bench_scan()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,70 @@
+"""
+RateLimiter: pasiektas užklausų tempas prie 1..10 lygiagrečių worker'ių.
+
+Paleidimas:
+    STATE_DIR=/tmp/bench python bench_rate.py [SECONDS] [MIN_INTERVAL]
+
+Kiekvienas worker'is: acquire() -> simuliuota užklausos trukmė (uniform 20..80% intervalo) -> vėl.
+Tempas matuojamas iš acquire() grįžimo laikų (pirmas – atskaitos taškas, todėl burst netrukdo).
+Jei kuriai nors lygiagretumo reikšmei pasiektas tempas skiriasi nuo 1/MIN_INTERVAL daugiau
+nei TOLERANCE – exit 1.
+"""
+
+import random
+import sys
+import threading
+import time
+
+import aruodas_clicker as A
+
+
+TOLERANCE = 0.03  # 3%
+LATENCY_SHARE = (0.2, 0.8)  # užklausos trukmė intervalo dalimis
+
+
+def measure(concurrency: int, interval: float, seconds: float) -> tuple[float, int]:
+    limiter = A.RateLimiter(interval)
+    sent: list[float] = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker(seed: int):
+        rnd = random.Random(seed)
+        while time.monotonic() < deadline:
+            limiter.acquire()
+            with lock:
+                sent.append(time.monotonic())
+            time.sleep(interval * rnd.uniform(*LATENCY_SHARE))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    sent.sort()
+    sent = [t for t in sent if t <= deadline]
+    if len(sent) < 2:
+        return 0.0, len(sent)
+    return (len(sent) - 1) / (sent[-1] - sent[0]), len(sent)
+
+
+def main(argv):
+    seconds = float(argv[0]) if argv else 3.0
+    interval = float(argv[1]) if len(argv) > 1 else 0.05
+    target = 1.0 / interval
+    print(f"min_interval {interval} s -> tikslas {target:.2f} užkl./s, tolerancija ±{TOLERANCE:.0%}, po {seconds:.0f} s")
+    print(f"{'worker.':>7} {'užkl.':>6} {'užkl./s':>9} {'nuokrypis':>10}")
+    ok = True
+    for concurrency in range(1, 11):
+        rate, count = measure(concurrency, interval, seconds)
+        dev = rate / target - 1.0
+        good = abs(dev) <= TOLERANCE
+        ok &= good
+        print(f"{concurrency:>7} {count:>6} {rate:>9.2f} {dev:>+9.1%}{'' if good else '  BAD'}")
+    print("OK" if ok else "BAD")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
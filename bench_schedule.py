@@ -0,0 +1,97 @@
+"""
+Job'o tikrinimo tvarka: didėjanti (JOB_ORDER=asc) vs pagal blokų tankį (DensityScheduler).
+
+Paleidimas:
+    STATE_DIR=/tmp/bench python bench_schedule.py [N_IDS] [SEED]
+
+Sintetinis intervalas be tinklo: atkarpos (0.5k–5k ID) su skirtingu gyvų skelbimų tankiu
+(~2% / ~15% / ~50%), naujausia dalis tanki (~70%), viršuje – dar neegzistuojantys ID.
+Tikrinimas simuliuojamas: rezultatai grąžinami scheduler'iui po TARGET_CONCURRENCY (kaip ore).
+Lyginama, kokią crawl'o dalį (užklausų) reikia 50 / 90 / 99% gyvų skelbimų rasti.
+Density tvarka turi pasiekti 90% greičiau ir patikrinti visus ID lygiai po kartą, kitaip exit 1.
+"""
+
+import random
+import sys
+from collections import deque
+
+import aruodas_clicker as A
+
+
+START = 3000000
+
+
+def make_live(count: int, seed: int) -> bytearray:
+    rnd = random.Random(seed)
+    live = bytearray(count)
+    top = int(count * 0.9)  # virš – dar nepaskelbti ID
+    i = 0
+    while i < top:
+        length = rnd.randint(500, 5000)
+        density = rnd.choices([0.02, 0.15, 0.5], weights=[5, 3, 2])[0]
+        if i > top * 0.95:
+            density = 0.7
+        for j in range(i, min(top, i + length)):
+            live[j] = rnd.random() < density
+        i += length
+    return live
+
+
+def crawl(order, live: bytearray, ceiling=None) -> list[int]:
+    """Užklausų eilės numeriai, kuriais rasti gyvi skelbimai (+ padengimo patikra)."""
+    end = START + len(live) - 1
+    if order == "density":
+        sched = A.DensityScheduler(START, end, ceiling=ceiling)
+        take = sched.next
+    else:
+        sched = None
+        it = iter(range(START, end + 1))
+        take = lambda: next(it, None)
+
+    hits = []
+    seen = bytearray(len(live))
+    in_flight = deque()
+    k = 0
+    while True:
+        n = take()
+        if n is not None:
+            assert not seen[n - START], f"{order}: {n} du kartus"
+            seen[n - START] = 1
+            in_flight.append(n)
+        if len(in_flight) >= A.TARGET_CONCURRENCY or (n is None and in_flight):
+            done = in_flight.popleft()
+            k += 1
+            found = live[done - START]
+            if found:
+                hits.append(k)
+            if sched is not None:
+                sched.record(done, "FOUND" if found else "NOT_FOUND")
+        if n is None and not in_flight:
+            break
+    assert all(seen), f"{order}: ne visi ID patikrinti"
+    return hits
+
+
+def share_at(hits: list[int], total_requests: int, q: float) -> float:
+    return hits[max(0, int(len(hits) * q) - 1)] / total_requests
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 200_000
+    seed = int(argv[1]) if len(argv) > 1 else 1
+    live = make_live(count, seed)
+    frontier = START + max(i for i, x in enumerate(live) if x)
+    print(f"{count} ID, gyvų {sum(live)} ({sum(live) / count:.1%}), blokas {A.SCHED_BLOCK_SIZE}, gabalas {A.SCHED_CHUNK}")
+    print(f"{'tvarka':22} {'50%':>7} {'90%':>7} {'99%':>7}   (crawl'o dalis, kol rasta tiek gyvų)")
+    res = {}
+    for name, order, ceiling in (("asc", "asc", None), ("density", "density", None), ("density + frontier", "density", frontier)):
+        hits = crawl(order, live, ceiling)
+        res[name] = [share_at(hits, count, q) for q in (0.5, 0.9, 0.99)]
+        print(f"{name:22} " + " ".join(f"{x:>7.1%}" for x in res[name]))
+    ok = res["density"][1] < res["asc"][1]
+    print("OK" if ok else "BAD")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,180 @@
+"""
+Lease sharding: 3 instancijos (atskiri procesai, kiekviena su savo STATE_DIR) tikrina vieną
+intervalą per bendrą koordinatorių.
+
+Paleidimas:
+    python bench_shard.py [N_IDS] [--kill]
+
+Stub tikslas (šiame procese) skaičiuoja užklausas kiekvienam ID. Pirma instancija – koordinatorius
+(/api/shard/* per HTTP, SQLite jos STATE_DIR'e), kitos dvi jungiasi per SHARD_COORDINATOR.
+Tikrinama, kad kiekvienas ID užklaustas lygiai vieną kartą.
+
+--kill: trečia instancija nužudoma (SIGKILL) įpusėjus; jos blokas po SHARD_LEASE_SECONDS
+perduodamas kitoms nuo paskutinio heartbeat'o cursor'iaus. Tada tikrinama, kad visi ID užklausti,
+o pakartotinai – ne daugiau nei nužudytoji spėjo nuo paskutinio heartbeat'o.
+Neatitikimas -> exit 1.
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+START = 3000000
+BLOCK = 50
+LEASE_SECONDS = 3.0
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_instance(port: int, start: int, end: int):
+    """Vaiko procesas: Flask serveris (koordinatoriaus endpoint'ams) + shard'intas job'as."""
+    import logging
+
+    from werkzeug.serving import make_server
+
+    import aruodas_clicker as A
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    A.set_min_interval(0.01)
+    A.JITTER_SECONDS = (0.0, 0.0)
+    srv = make_server("127.0.0.1", port, A.app, threaded=True)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    print(json.dumps({"ready": A.SHARD_INSTANCE}), flush=True)
+
+    sys.stdin.readline()  # "go" – kai visos instancijos paleistos
+    A.job_start(start=start, end=end, shard=True)
+    while True:
+        job = A.job_snapshot()
+        if job["state"] not in ("running", "paused"):
+            break
+        time.sleep(0.2)
+    A.persist_flush()
+    print(json.dumps({"instance": A.SHARD_INSTANCE, "job": job}), flush=True)
+    sys.stdin.readline()  # koordinatorius turi veikti, kol baigs ir kitos instancijos
+
+
+class Stub(BaseHTTPRequestHandler):
+    hits: Counter = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self):
+        n = int(self.path.strip("/").split("-")[-1])
+        with self.lock:
+            self.hits[n] += 1
+        if n % 7 == 0:
+            body = f"<html><head><title>Vilnius, Žirmūnai</title></head><body><h1>Vilnius, Žirmūnai</h1><p>Įdėtas 2026-01-15</p>{'x' * 2000}</body></html>"
+            self.send_response(200)
+        else:
+            body = "<html><body><div class=\"block-404\">Šiame puslapyje nėra informacijos, kurios jūs ieškote</div></body></html>"
+            self.send_response(404)
+        data = body.encode("utf-8")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def main(argv) -> int:
+    kill = "--kill" in argv
+    nums = [a for a in argv if a.isdigit()]
+    count = int(nums[0]) if nums else 1500
+    end = START + count - 1
+
+    stub = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    tmp = tempfile.mkdtemp(prefix="bench_shard_")
+    ports = [free_port() for _ in range(3)]
+    procs = []
+    for i, port in enumerate(ports):
+        env = dict(
+            os.environ,
+            STATE_DIR=os.path.join(tmp, f"inst{i}"),
+            TARGET_BASE_URL=f"http://127.0.0.1:{stub.server_port}",
+            SHARD_INSTANCE=f"inst{i}",
+            SHARD_BLOCK_SIZE=str(BLOCK),
+            SHARD_LEASE_SECONDS=str(LEASE_SECONDS),
+            SHARD_POLL_SECONDS="0.2",
+            PARSE_WORKERS="0",
+            RAW_ARCHIVE_MAX_BYTES="0",
+        )
+        if i > 0:
+            env["SHARD_COORDINATOR"] = f"http://127.0.0.1:{ports[0]}"
+        p = subprocess.Popen(
+            [sys.executable, __file__, "--instance", str(port), str(START), str(end)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env, text=True,
+        )
+        json.loads(p.stdout.readline())  # ready
+        procs.append(p)
+
+    t0 = time.perf_counter()
+    for p in procs:
+        p.stdin.write("go\n")
+        p.stdin.flush()
+
+    killed_at = None
+    if kill:
+        while sum(Stub.hits.values()) < count // 2:
+            time.sleep(0.05)
+        procs[2].send_signal(signal.SIGKILL)
+        procs[2].wait()
+        killed_at = sum(Stub.hits.values())
+
+    results = {}
+    for i, p in enumerate(procs):
+        if kill and i == 2:
+            continue
+        out = json.loads(p.stdout.readline())
+        results[out["instance"]] = out["job"]
+    elapsed = time.perf_counter() - t0
+    for i, p in enumerate(procs):
+        if not (kill and i == 2):
+            p.stdin.write("exit\n")
+            p.stdin.flush()
+            p.wait()
+    stub.shutdown()
+
+    hits = Stub.hits
+    missing = [n for n in range(START, end + 1) if hits[n] == 0]
+    dupes = {n: c for n, c in hits.items() if c > 1}
+    extra = [n for n in hits if not START <= n <= end]
+
+    print(f"{count} ID, blokas {BLOCK}, 3 instancijos, {elapsed:.1f} s ({sum(hits.values()) / elapsed:.0f} užkl./s)")
+    for name, job in sorted(results.items()):
+        print(f"  {name}: {job['state']}, fetched {job['fetched']}, blokai {job['blocks_done']}/{job['blocks_total']}, shard_lost {job['shard_lost']}")
+    if kill:
+        print(f"  inst2 nužudyta po {killed_at} užklausų (nuoma {LEASE_SECONDS:.0f} s)")
+    print(f"užklausta: {len(hits)}, trūksta: {len(missing)}, pakartotinai: {len(dupes)}, už intervalo: {len(extra)}")
+
+    ok = not missing and not extra and all(j["state"] == "done" for j in results.values())
+    if kill:
+        # nužudytoji galėjo spėti ne daugiau nei heartbeat'o intervalas (LEASE/3) x greitis + ore buvę
+        ok &= sum(c - 1 for c in dupes.values()) <= BLOCK
+    else:
+        ok &= not dupes
+    print("OK" if ok else "BAD")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--instance"]:
+        run_instance(int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        sys.exit(main(sys.argv[1:]))